@@ -0,0 +1,117 @@
+"""
+JWT authentication without a user-table query on every request.
+
+CachedJWTAuthentication takes the user id from the validated token and
+answers from a small per-process cache of user rows, so repeat requests
+of the same user skip the `SELECT ... FROM auth_user`. The checks of the
+stock JWTAuthentication (user exists, is active, password unchanged when
+CHECK_REVOKE_TOKEN is on) still run on every request, against the cached
+row.
+
+Entries expire after a short TTL and the cache holds a bounded number of
+users (least recently used are dropped first). Saving or deleting a User
+evicts it at once in this process (accounts/signals.py); other worker
+processes pick the change up when their entry expires.
+
+Settings (all optional):
+
+    AUTH_USER_CACHE = {
+        "TTL": 60,          # seconds a cached row is trusted
+        "MAX_SIZE": 1024,   # users kept per process
+    }
+"""
+
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+DEFAULTS = {
+    "TTL": 60,
+    "MAX_SIZE": 1024,
+}
+
+
+def get_setting(name):
+    return getattr(settings, "AUTH_USER_CACHE", {}).get(name, DEFAULTS[name])
+
+
+class UserCache:
+    """
+    Thread-safe LRU of user rows with a per-entry expiry.
+
+    Keys are normalised to str: the token claim holds the id as a string,
+    signals pass the integer pk.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()  # user id -> (expires_at, user)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(user_id)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    def put(self, user_id, user):
+        user_id = str(user_id)
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + get_setting("TTL"), user)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > get_setting("MAX_SIZE"):
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+user_cache = UserCache()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        user = user_cache.get(user_id)
+        if user is None:
+            try:
+                user = self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+            except self.user_model.DoesNotExist as e:
+                raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+            user_cache.put(user_id, user)
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        # each request gets its own instance; views may set attributes on it
+        return copy.copy(user)
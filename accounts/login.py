@@ -0,0 +1,91 @@
+"""
+Email + password login, shared by LoginView and the async login view.
+
+Users are found by LOWER(email), which the accounts_user_email_lower_idx
+functional index (migration 0002) answers without scanning auth_user.
+The async path runs the password hash (PBKDF2, deliberately slow) in a
+small bounded thread pool so a burst of logins cannot occupy the event
+loop or every worker thread.
+"""
+
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.contrib.auth.models import User
+from django.db.models.functions import Lower
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .menu_cache import get_menu
+
+# concurrent password hashes per process on the async path
+HASH_WORKERS = getattr(settings, "LOGIN_HASH_WORKERS", 4)
+
+_hash_pool = ThreadPoolExecutor(max_workers=HASH_WORKERS, thread_name_prefix="login-hash")
+
+
+def normalize_email(email):
+    return (email or "").strip().lower()
+
+
+def is_credential(value):
+    """Emails and passwords must be non-empty strings (JSON allows anything)."""
+    return isinstance(value, str) and bool(value.strip())
+
+
+def users_by_email(email):
+    return (
+        User.objects.annotate(email_lower=Lower("email"))
+        .filter(email_lower=normalize_email(email))
+        .order_by("id")
+    )
+
+
+def find_user_by_email(email):
+    return users_by_email(email).first()
+
+
+async def afind_user_by_email(email):
+    return await users_by_email(email).afirst()
+
+
+def login_payload(user):
+    refresh = RefreshToken.for_user(user)
+
+    # Menu List (cached; menu_version lets clients skip /menu-list/)
+    (menu_version, _), menu_data = get_menu()
+
+    return {
+        "message": "User Login successfully",
+        "access": str(refresh.access_token),
+        "refresh": str(refresh),
+        "user": {
+            "id": user.id,
+            "username": user.username,
+            "email": user.email,
+        },
+        "menu": menu_data,
+        "menu_version": menu_version
+    }
+
+
+async def acheck_credentials(email, password):
+    """The active user with these credentials, or None."""
+    if not is_credential(email) or not is_credential(password):
+        return None
+
+    user = await afind_user_by_email(email)
+    loop = asyncio.get_running_loop()
+
+    if user is None:
+        # hash anyway so unknown emails take as long as wrong passwords
+        await loop.run_in_executor(_hash_pool, make_password, password)
+        return None
+
+    # check_password() without a setter: no hash upgrade (a DB write) from
+    # the pool thread; the sync login path still upgrades old hashes
+    valid = await loop.run_in_executor(_hash_pool, check_password, password, user.password)
+    if not valid or not user.is_active:
+        return None
+    return user
@@ -0,0 +1,42 @@
+"""
+In-process cache of the serialized menu.
+
+The menu only changes when an admin edits MenuList, so each worker keeps
+the serialized list and reloads it when the global "menu" version
+(bumped on every MenuList save / delete) moves.
+"""
+
+import threading
+
+from expenses import versioning
+
+from .models import MenuList
+from .serializers import MenuListSerializer
+
+MENU = "menu"
+
+_lock = threading.Lock()
+_snapshot = None  # (stamp, serialized menu)
+
+
+def get_menu(stamp=None):
+    """Returns (stamp, serialized menu)."""
+    global _snapshot
+
+    if stamp is None:
+        stamp = versioning.get_stamp(MENU)
+
+    snapshot = _snapshot
+    if snapshot is not None and snapshot[0] == stamp:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or _snapshot[0] != stamp:
+            items = MenuList.objects.all().order_by("menu_name")
+            _snapshot = (stamp, MenuListSerializer(items, many=True).data)
+        return _snapshot
+
+
+def clear():
+    global _snapshot
+    _snapshot = None
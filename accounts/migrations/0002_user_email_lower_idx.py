@@ -0,0 +1,23 @@
+# Generated by Django 6.0 on 2026-10-18 09:12
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        # after the last auth_user change: SQLite rebuilds the table on
+        # ALTER, dropping indexes Django does not know about
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    # auth_user belongs to django.contrib.auth, so the functional index on
+    # LOWER(email) used by the login lookup is created here with plain SQL
+
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS "accounts_user_email_lower_idx" ON "auth_user" (LOWER("email"))',
+            reverse_sql='DROP INDEX IF EXISTS "accounts_user_email_lower_idx"',
+        ),
+    ]
@@ -10,6 +10,10 @@ class RegisterSerializer(serializers.ModelSerializer):
         model = User
         fields = ('username', 'email', 'password', 'password2')
 
+    def validate_email(self, value):
+        # stored lower-case; logins match on LOWER(email)
+        return value.strip().lower()
+
     def validate(self, attrs):
         if attrs['password'] != attrs['password2']:
             raise serializers.ValidationError("Passwords do not match.")
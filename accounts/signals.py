@@ -0,0 +1,21 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from expenses import versioning
+
+from .authentication import user_cache
+from .menu_cache import MENU
+from .models import MenuList
+
+
+@receiver([post_save, post_delete], sender=MenuList)
+def bump_menu_version(sender, **kwargs):
+    versioning.bump(MENU)
+
+
+# deactivation / password change must not wait for the cache TTL
+
+@receiver([post_save, post_delete], sender=User)
+def evict_cached_user(sender, instance, **kwargs):
+    user_cache.evict(instance.pk)
@@ -1,3 +1,153 @@
-from django.test import TestCase
+from unittest import skipUnless
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from .authentication import UserCache
+from .login import users_by_email
+from .models import MenuList
+
+
+class MenuCacheTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", email="alice@example.com", password="pass12345")
+        MenuList.objects.create(menu_name="Dashboard", icon="home", path="/")
+
+    def login(self):
+        return self.client.post("/login/", {"email": "alice@example.com", "password": "pass12345"}).json()
+
+    def test_login_includes_menu_and_version(self):
+        data = self.login()
+        self.assertEqual([item["menu_name"] for item in data["menu"]], ["Dashboard"])
+        version = data["menu_version"]
+
+        self.client.force_authenticate(self.user)
+        response = self.client.post("/menu-list/", {"menu_name": "Budgets", "icon": "wallet", "path": "/budgets"})
+        self.assertEqual(response.status_code, 201)
+
+        data = self.login()
+        self.assertEqual([item["menu_name"] for item in data["menu"]], ["Budgets", "Dashboard"])
+        self.assertGreater(data["menu_version"], version)
+
+    def test_menu_list_is_cached_and_revalidated(self):
+        self.client.force_authenticate(self.user)
+        first = self.client.get("/menu-list/")
+
+        with CaptureQueriesContext(connection) as ctx:
+            again = self.client.get("/menu-list/")
+        self.assertEqual(len(ctx.captured_queries), 1)  # version lookup only
+        self.assertEqual(again.json(), first.json())
+
+        not_modified = self.client.get("/menu-list/", HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+
+        item = MenuList.objects.get(menu_name="Dashboard")
+        self.client.delete(f"/menu-list/{item.id}/")
+        self.assertEqual(self.client.get("/menu-list/").json(), [])
+
+
+class CachedJWTAuthenticationTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", email="alice@example.com", password="pass12345")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(self.user).access_token}")
+
+    def user_queries(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get("/api/expense-summary/")
+        self.assertEqual(response.status_code, 200)
+        return [q["sql"] for q in ctx.captured_queries if '"auth_user"' in q["sql"]]
+
+    def test_repeat_requests_skip_the_user_query(self):
+        self.assertEqual(len(self.user_queries()), 1)
+        self.assertEqual(self.user_queries(), [])
+
+    def test_deactivation_takes_effect_immediately(self):
+        self.user_queries()
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get("/api/expense-summary/").status_code, 401)
+
+
+class UserCacheTests(SimpleTestCase):
+
+    @override_settings(AUTH_USER_CACHE={"TTL": 60, "MAX_SIZE": 2})
+    def test_bounded_lru(self):
+        cache = UserCache()
+        cache.put(1, "a")
+        cache.put(2, "b")
+        cache.get(1)
+        cache.put(3, "c")
+        self.assertEqual((cache.get(1), cache.get(2), cache.get(3)), ("a", None, "c"))
+
+    @override_settings(AUTH_USER_CACHE={"TTL": 0, "MAX_SIZE": 10})
+    def test_entries_expire(self):
+        cache = UserCache()
+        cache.put(1, "a")
+        self.assertIsNone(cache.get(1))
+
+
+class EmailLoginTests(APITestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", email="Alice@Example.com", password="pass12345")
+
+    def async_login(self, **data):
+        return async_to_sync(self.async_client.post)("/login/async/", data, content_type="application/json")
+
+    def test_email_match_is_case_insensitive(self):
+        response = self.client.post("/login/", {"email": "alice@example.COM", "password": "pass12345"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["user"]["id"], self.user.id)
+
+    def test_async_login_matches_sync_login(self):
+        sync_data = self.client.post("/login/", {"email": "alice@example.com", "password": "pass12345"}).json()
+        response = self.async_login(email=" ALICE@example.com", password="pass12345")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data.keys(), sync_data.keys())
+        self.assertEqual((data["user"], data["menu_version"]), (sync_data["user"], sync_data["menu_version"]))
+
+        me = self.client.get("/users/", HTTP_AUTHORIZATION=f"Bearer {data['access']}")
+        self.assertEqual(me.status_code, 200)
+
+    def test_async_login_rejects_bad_credentials(self):
+        self.assertEqual(self.async_login(email="alice@example.com", password="wrong").status_code, 400)
+        self.assertEqual(self.async_login(email="nobody@example.com", password="pass12345").status_code, 400)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.async_login(email="alice@example.com", password="pass12345").status_code, 400)
+
+    def test_non_string_credentials_are_rejected(self):
+        for data in (
+            {"email": ["alice@example.com"], "password": "pass12345"},
+            {"email": {"a": 1}, "password": "pass12345"},
+            {"email": 1, "password": "pass12345"},
+            {"email": "alice@example.com", "password": ["pass12345"]},
+        ):
+            with self.subTest(data=data):
+                response = self.client.post("/login/", data, format="json")
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"error": "Invalid email or password"})
+
+                response = self.async_login(**data)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"error": "Invalid email or password"})
+
+    def test_register_stores_lower_case_email(self):
+        self.client.post("/register/", {
+            "username": "bob", "email": "Bob@Example.com", "password": "pass12345", "password2": "pass12345",
+        })
+        self.assertEqual(User.objects.get(username="bob").email, "bob@example.com")
+
+    @skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+    def test_lookup_uses_the_lower_email_index(self):
+        plan = users_by_email("alice@example.com").explain()
+        self.assertIn("accounts_user_email_lower_idx", plan)
@@ -7,10 +7,12 @@ from rest_framework.response import Response
 from rest_framework import status, permissions
 from .serializers import RegisterSerializer
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth.models import User
 from .models import MenuList
 from .serializers import MenuListSerializer
+from .menu_cache import MENU, get_menu
+from .login import find_user_by_email, is_credential, login_payload
+from expenses.conditional import conditional_get
 
 class LoginView(APIView):
     permission_classes = [permissions.AllowAny]
@@ -19,10 +21,12 @@ class LoginView(APIView):
         email = request.data.get("email")
         password = request.data.get("password")
 
-        # 1️⃣ Find user with this email
-        try:
-            user_obj = User.objects.get(email=email)
-        except User.DoesNotExist:
+        if not is_credential(email) or not is_credential(password):
+            return Response({"error": "Invalid email or password"}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 1️⃣ Find user with this email (indexed, case-insensitive)
+        user_obj = find_user_by_email(email)
+        if user_obj is None:
             return Response({"error": "Invalid email or password"}, status=status.HTTP_400_BAD_REQUEST)
 
         # 2️⃣ Authenticate using username (Django uses username internally)
@@ -31,28 +35,44 @@ class LoginView(APIView):
         if user is None:
             return Response({"error": "Invalid email or password"}, status=status.HTTP_400_BAD_REQUEST)
 
-        # 3️⃣ Generate tokens
-        refresh = RefreshToken.for_user(user)
-
-        # 4️⃣ Fetch Menu List
-        menu_items = MenuList.objects.all().order_by("menu_name")
-        menu_data = MenuListSerializer(menu_items, many=True).data
-
-        return Response({
-            "message": "User Login successfully",
-            "access": str(refresh.access_token),
-            "refresh": str(refresh),
-            "user": {
-                "id": user.id,
-                "username": user.username,
-                "email": user.email,
-            },
-            "menu": menu_data
-        }, status=status.HTTP_200_OK)
-        
+        # 3️⃣ Tokens + menu
+        return Response(login_payload(user), status=status.HTTP_200_OK)
+
+
+#  Async Login (ASGI): same body and response as LoginView, with the
+#  password hash run in a bounded thread pool (see login.py)
+
+import json
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+from rest_framework.utils.encoders import JSONEncoder
+from .login import acheck_credentials
+
+@csrf_exempt
+@require_POST
+async def async_login(request):
+    if request.content_type == "application/json":
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            data = None
+        if not isinstance(data, dict):
+            return JsonResponse({"error": "Invalid JSON body"}, status=400)
+    else:
+        data = request.POST
+
+    user = await acheck_credentials(data.get("email"), data.get("password"))
+    if user is None:
+        return JsonResponse({"error": "Invalid email or password"}, status=400)
+
+    payload = await sync_to_async(login_payload)(user)
+    return JsonResponse(payload, encoder=JSONEncoder)
     
 
 
+
 class RegisterView(APIView):
     permission_classes = [permissions.AllowAny]
 
@@ -86,10 +106,16 @@ class MenuListView(APIView):
             except MenuList.DoesNotExist:
                 return Response({"error": "Menu not found"}, status=404)
 
-        # GET all
-        items = MenuList.objects.all().order_by("menu_name")
-        serializer = MenuListSerializer(items, many=True)
-        return Response(serializer.data, status=200)
+        # GET all (cached, see get_all)
+        return self.get_all(request)
+
+    @conditional_get(MENU)
+    def get_all(self, request):
+        stamp = request.data_stamps[MENU]
+        (menu_version, _), menu_data = get_menu(stamp)
+        response = Response(menu_data, status=200)
+        response["X-Menu-Version"] = menu_version
+        return response
 
     def post(self, request):
         serializer = MenuListSerializer(data=request.data)
@@ -0,0 +1,53 @@
+"""
+Response cache backends, picked with the DJANGO_RESPONSE_CACHE
+environment variable (location in DJANGO_RESPONSE_CACHE_LOCATION).
+
+"locmem" (default) is an in-process LRU: each worker keeps its own
+entries, which is enough because keys carry the data versions (see
+expenses/response_cache.py), so a worker can never serve another
+worker's stale copy.
+
+"file" stores entries in a directory, shared by the workers of one host
+and kept across restarts.
+
+"redis" uses Django's RedisCache (needs the redis package) against any
+Redis-compatible server, shared by every host. The location is a
+redis:// URL.
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+BACKENDS = ("locmem", "file", "redis")
+
+DEFAULT_LOCATIONS = {
+    "locmem": "responses",
+    "file": "/var/tmp/expense_backend_responses",
+    "redis": "redis://127.0.0.1:6379/1",
+}
+
+
+def response_cache(backend="locmem", location=None, max_entries=2000):
+    if backend not in BACKENDS:
+        raise ImproperlyConfigured(
+            f"Unknown DJANGO_RESPONSE_CACHE {backend!r} (expected one of: {', '.join(BACKENDS)})"
+        )
+
+    location = location or DEFAULT_LOCATIONS[backend]
+
+    if backend == "redis":
+        return {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": location,
+            "KEY_PREFIX": "responses",
+        }
+
+    return {
+        "BACKEND": (
+            "django.core.cache.backends.locmem.LocMemCache"
+            if backend == "locmem"
+            else "django.core.cache.backends.filebased.FileBasedCache"
+        ),
+        "LOCATION": location,
+        # the least recently used entries are culled beyond this
+        "OPTIONS": {"MAX_ENTRIES": max_entries},
+    }
@@ -0,0 +1,178 @@
+"""
+Response compression.
+
+CompressionMiddleware compresses API payloads (JSON, CSV, NDJSON) with
+brotli when the client accepts it and the brotli package is
+installed, otherwise with gzip. Responses under MIN_SIZE bytes go out
+as they are: below roughly one packet the saving does not pay for the
+CPU. Streaming responses (the expense export) are compressed as they
+are produced, one compressor per response, flushed after every chunk
+so rows reach the client without waiting for the end of the stream.
+
+Like django.middleware.gzip.GZipMiddleware, it adds Vary:
+Accept-Encoding and weakens strong ETags (the body now differs per
+encoding; conditional GETs still match with the weak comparison).
+Unlike it, HTML is left alone: pages such as the admin and the
+browsable API carry CSRF tokens, and compressing them without
+GZipMiddleware's BREACH padding would let their size leak the token.
+
+Settings (all optional):
+
+    COMPRESSION = {
+        "ENABLED": True,
+        "MIN_SIZE": 1024,        # bytes; smaller bodies are not compressed
+        "GZIP_LEVEL": 6,
+        "BROTLI_QUALITY": 5,     # 0-11; above ~6 costs more CPU than it saves
+        "CONTENT_TYPES": [...],  # media types to compress (any +json too);
+                                 # keep pages with secrets in them out
+    }
+"""
+
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only
+    brotli = None
+
+DEFAULTS = {
+    "ENABLED": True,
+    "MIN_SIZE": 1024,
+    "GZIP_LEVEL": 6,
+    "BROTLI_QUALITY": 5,
+    "CONTENT_TYPES": [
+        "application/json",
+        "application/x-ndjson",
+        "text/csv",
+    ],
+}
+
+
+def get_setting(name):
+    return getattr(settings, "COMPRESSION", {}).get(name, DEFAULTS[name])
+
+
+def accepted_encodings(header):
+    """{coding: q} from an Accept-Encoding header."""
+    accepted = {}
+    for item in header.split(","):
+        coding, _, params = item.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.partition("=")
+            if key.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        accepted[coding] = q
+    return accepted
+
+
+def choose_encoding(header):
+    """"br", "gzip" or None for the request's Accept-Encoding header."""
+    accepted = accepted_encodings(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = ["br", "gzip"] if brotli is not None else ["gzip"]
+
+    best, best_q = None, 0.0
+    for coding in candidates:
+        q = accepted.get(coding, wildcard)
+        # on a tie br wins: smaller output
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compressible(content_type):
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.endswith("+json") or media_type in get_setting("CONTENT_TYPES")
+
+
+class Compressor:
+    """One response's compression stream: compress() chunks, then finish()."""
+
+    def __init__(self, encoding):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=get_setting("BROTLI_QUALITY"))
+        else:
+            # wbits 31: gzip header and trailer
+            self._compressor = zlib.compressobj(get_setting("GZIP_LEVEL"), zlib.DEFLATED, 31)
+
+    def compress(self, data, flush=False):
+        if self.encoding == "br":
+            out = self._compressor.process(data)
+            return out + self._compressor.flush() if flush else out
+        out = self._compressor.compress(data)
+        return out + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self):
+        return self._compressor.finish() if self.encoding == "br" else self._compressor.flush()
+
+    def stream(self, chunks):
+        for chunk in chunks:
+            data = self.compress(chunk, flush=True)
+            if data:
+                yield data
+        yield self.finish()
+
+    async def astream(self, chunks):
+        async for chunk in chunks:
+            data = self.compress(chunk, flush=True)
+            if data:
+                yield data
+        yield self.finish()
+
+
+def compress(data, encoding):
+    compressor = Compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+class CompressionMiddleware(MiddlewareMixin):
+
+    def process_response(self, request, response):
+        if not get_setting("ENABLED"):
+            return response
+        if response.has_header("Content-Encoding") or not compressible(response.get("Content-Type", "")):
+            return response
+        if not response.streaming and len(response.content) < get_setting("MIN_SIZE"):
+            return response
+
+        patch_vary_headers(response, ("Accept-Encoding",))
+
+        encoding = choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            # pull to lexical scope: streaming_content may be set again later
+            chunks = response.streaming_content
+            compressor = Compressor(encoding)
+            if response.is_async:
+                response.streaming_content = compressor.astream(chunks)
+            else:
+                response.streaming_content = compressor.stream(chunks)
+            # the compressed size is unknown until the stream ends
+            del response.headers["Content-Length"]
+        else:
+            compressed = compress(response.content, encoding)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response.headers["Content-Length"] = str(len(compressed))
+
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        response.headers["Content-Encoding"] = encoding
+
+        return response
@@ -0,0 +1,59 @@
+"""
+Database profiles, picked with the DJANGO_DB_PROFILE environment variable.
+
+"default" is the stock SQLite setup used for development and tests.
+
+"production" tunes SQLite for several gunicorn workers sharing one file:
+
+- WAL journaling, so readers no longer block on a writer (and vice versa)
+- synchronous=NORMAL, which is durable at checkpoints and safe with WAL
+- a busy timeout, so a writer waits for the lock instead of failing with
+  "database is locked"
+- BEGIN IMMEDIATE transactions: the write lock is taken up front, so two
+  transactions that read first and write later cannot deadlock (SQLite
+  answers that case with an immediate "database is locked", ignoring the
+  busy timeout)
+- memory-mapped reads, a larger page cache and in-memory temp tables
+- persistent connections (CONN_MAX_AGE) with health checks, so the
+  PRAGMAs above run once per connection rather than once per request
+"""
+
+from django.core.exceptions import ImproperlyConfigured
+
+PROFILES = ("default", "production")
+
+BUSY_TIMEOUT_SECONDS = 20
+
+PRODUCTION_PRAGMAS = [
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    f"PRAGMA busy_timeout={BUSY_TIMEOUT_SECONDS * 1000}",
+    "PRAGMA mmap_size=268435456",   # 256 MiB
+    "PRAGMA cache_size=-65536",     # 64 MiB (negative = KiB)
+    "PRAGMA temp_store=MEMORY",
+]
+
+
+def sqlite_database(name, profile="default"):
+    if profile not in PROFILES:
+        raise ImproperlyConfigured(
+            f"Unknown DJANGO_DB_PROFILE {profile!r} (expected one of: {', '.join(PROFILES)})"
+        )
+
+    database = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": name,
+    }
+
+    if profile == "production":
+        database.update({
+            "CONN_MAX_AGE": 600,
+            "CONN_HEALTH_CHECKS": True,
+            "OPTIONS": {
+                "init_command": ";".join(PRODUCTION_PRAGMAS),
+                "transaction_mode": "IMMEDIATE",
+                "timeout": BUSY_TIMEOUT_SECONDS,
+            },
+        })
+
+    return database
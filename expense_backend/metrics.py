@@ -0,0 +1,272 @@
+"""
+Per-request performance metrics.
+
+MetricsMiddleware times every request, counts and times its SQL through
+connection.execute_wrapper(), reports the numbers in a Server-Timing
+header and adds them to in-process histograms labelled by resolved view
+and method. metrics_view serves the histograms, and the response cache
+hit / miss counters, in the Prometheus text format.
+
+Settings (all optional):
+
+    METRICS = {
+        "ENABLED": True,         # record anything at all
+        "SERVER_TIMING": True,   # add the Server-Timing header
+        "ENDPOINT": False,       # serve /metrics/ (404 when False)
+        "TOKEN": None,           # scrape token, sent as "Authorization: Bearer <token>"
+    }
+
+/metrics/ is only served to a request carrying TOKEN or to a staff user
+logged in through the session (the admin); anyone else gets a 403.
+
+Histograms live in process memory, so each worker reports its own
+numbers; Prometheus sums them across scrape targets.
+"""
+
+import hmac
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.http import Http404, HttpResponse, HttpResponseForbidden
+
+DEFAULTS = {
+    "ENABLED": True,
+    "SERVER_TIMING": True,
+    "ENDPOINT": False,
+    "TOKEN": None,
+}
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def get_setting(name):
+    return getattr(settings, "METRICS", {}).get(name, DEFAULTS[name])
+
+
+class Histogram:
+    """A labelled Prometheus histogram, safe to observe from any thread."""
+
+    def __init__(self, name, help_text, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels, value):
+        # per-bucket counts; made cumulative only when rendered
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} histogram",
+        ]
+        for labels, counts, total, count in sorted(snapshot):
+            label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+            running = 0
+            for bound, bucket_count in zip(self.buckets + ("+Inf",), counts):
+                running += bucket_count
+                lines.append(f'{self.name}_bucket{{{label_text},le="{bound}"}} {running}')
+            lines.append(f"{self.name}_sum{{{label_text}}} {total}")
+            lines.append(f"{self.name}_count{{{label_text}}} {count}")
+        return lines
+
+
+class Counter:
+    """A labelled Prometheus counter, safe to increment from any thread."""
+
+    def __init__(self, name, help_text):
+        self.name = name
+        self.help_text = help_text
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels, value=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + value
+
+    def value(self, labels):
+        with self._lock:
+            return self._values.get(labels, 0)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def render(self):
+        with self._lock:
+            snapshot = sorted(self._values.items())
+
+        lines = [
+            f"# HELP {self.name} {self.help_text}",
+            f"# TYPE {self.name} counter",
+        ]
+        for labels, value in snapshot:
+            label_text = ",".join(f'{key}="{_escape(value)}"' for key, value in labels)
+            lines.append(f"{self.name}{{{label_text}}} {value}")
+        return lines
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds", "Wall time of a request, by view.", SECONDS_BUCKETS
+)
+DB_QUERIES = Histogram(
+    "http_request_db_queries", "SQL queries run by a request, by view.", QUERY_BUCKETS
+)
+DB_SECONDS = Histogram(
+    "http_request_db_duration_seconds", "Time spent in SQL by a request, by view.", SECONDS_BUCKETS
+)
+
+# incremented by expenses/response_cache.py
+RESPONSE_CACHE = Counter(
+    "response_cache_requests_total", "Response cache lookups, by view and result (hit, miss, error)."
+)
+
+HISTOGRAMS = [REQUEST_SECONDS, DB_QUERIES, DB_SECONDS]
+COUNTERS = [RESPONSE_CACHE]
+
+
+def clear():
+    for metric in HISTOGRAMS + COUNTERS:
+        metric.clear()
+
+
+def render():
+    lines = []
+    for metric in HISTOGRAMS + COUNTERS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class QueryTimer:
+    """execute_wrapper that counts and times every statement it sees."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - start
+            self.count += 1
+
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return match.view_name or match._func_path
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+
+        if not get_setting("ENABLED"):
+            return self.get_response(request)
+
+        timer = QueryTimer()
+        start = time.perf_counter()
+
+        with self.wrap_connections(timer):
+            response = self.get_response(request)
+
+        return self.record(request, response, timer, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        if not get_setting("ENABLED"):
+            return await self.get_response(request)
+
+        timer = QueryTimer()
+        start = time.perf_counter()
+
+        # The request's ORM calls run on its thread-sensitive sync thread,
+        # where connections are thread-local: install the wrappers there
+        wrappers = await sync_to_async(self.wrap_connections)(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(wrappers.close)()
+
+        return self.record(request, response, timer, time.perf_counter() - start)
+
+    def wrap_connections(self, timer):
+        """An ExitStack holding the wrappers; closing it removes them."""
+        stack = ExitStack()
+        with stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+            return stack.pop_all()
+
+    def record(self, request, response, timer, elapsed):
+        labels = (("method", request.method), ("view", view_label(request)))
+        REQUEST_SECONDS.observe(labels, elapsed)
+        DB_QUERIES.observe(labels, timer.count)
+        DB_SECONDS.observe(labels, timer.seconds)
+
+        if get_setting("SERVER_TIMING"):
+            response["Server-Timing"] = (
+                f"app;dur={elapsed * 1000:.1f}, "
+                f'db;dur={timer.seconds * 1000:.1f};desc="{timer.count} queries"'
+            )
+
+        return response
+
+
+def can_scrape(request):
+    token = get_setting("TOKEN")
+    if token:
+        scheme, _, given = request.META.get("HTTP_AUTHORIZATION", "").partition(" ")
+        if scheme.lower() == "bearer" and hmac.compare_digest(given.strip().encode(), token.encode()):
+            return True
+
+    user = getattr(request, "user", None)
+    return bool(user and user.is_active and user.is_staff)
+
+
+def metrics_view(request):
+    if not get_setting("ENDPOINT"):
+        raise Http404
+    if not can_scrape(request):
+        return HttpResponseForbidden()
+    return HttpResponse(render(), content_type=CONTENT_TYPE)
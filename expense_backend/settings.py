@@ -10,8 +10,12 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from .cache_backends import response_cache
+from .db_profiles import sqlite_database
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -44,6 +48,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # MUST BE FIRST
+    'expense_backend.metrics.MetricsMiddleware',
+    'expense_backend.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,10 +66,22 @@ CORS_ALLOWED_ORIGINS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication with a short-lived per-process user cache
+        'accounts.authentication.CachedJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        # JSONRenderer output, on orjson when it is installed
+        'expenses.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
 }
 
+# see accounts/authentication.py
+AUTH_USER_CACHE = {
+    "TTL": 60,
+    "MAX_SIZE": 1024,
+}
+
 from datetime import timedelta
 
 SIMPLE_JWT = {
@@ -73,6 +91,42 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Per-request timing, SQL counts and the /metrics/ endpoint
+# (see expense_backend/metrics.py); /metrics/ is for staff and for
+# scrapers sending DJANGO_METRICS_TOKEN
+METRICS = {
+    "ENABLED": True,
+    "SERVER_TIMING": True,
+    "ENDPOINT": True,
+    "TOKEN": os.environ.get("DJANGO_METRICS_TOKEN"),
+}
+
+# gzip, or brotli when the package is installed; see expense_backend/compression.py
+COMPRESSION = {
+    "ENABLED": True,
+    "MIN_SIZE": 1024,
+    "GZIP_LEVEL": 6,
+    "BROTLI_QUALITY": 5,
+}
+
+# Per-user response cache of the summary / budget reads
+# (see expenses/response_cache.py and expense_backend/cache_backends.py)
+RESPONSE_CACHE = {
+    "ENABLED": True,
+    "ALIAS": "responses",
+    "TIMEOUT": 300,
+}
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "responses": response_cache(
+        os.environ.get("DJANGO_RESPONSE_CACHE", "locmem"),
+        os.environ.get("DJANGO_RESPONSE_CACHE_LOCATION"),
+    ),
+}
+
 ROOT_URLCONF = 'expense_backend.urls'
 
 TEMPLATES = [
@@ -96,11 +150,13 @@ WSGI_APPLICATION = 'expense_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 
+# DJANGO_DB_PROFILE=production enables WAL, a busy timeout, mmap and
+# persistent connections (see expense_backend/db_profiles.py)
+
+DB_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'default')
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
+    'default': sqlite_database(BASE_DIR / 'db.sqlite3', DB_PROFILE),
 }
 
 
@@ -0,0 +1,156 @@
+"""
+Async versions of the dashboard read endpoints, for ASGI deployments.
+
+Same parameters and response bodies as the DRF views they mirror
+(ExpenseAPI list, ExpenseSummaryAPI, CategoryBudgetAPI), written as
+plain Django async views on the async ORM, so a request waiting on the
+database does not hold a worker thread. /api/async/dashboard/ serves the
+summary, budgets and recent expenses in one request, issuing the three
+independently with asyncio.gather.
+
+Authentication uses the classes in REST_FRAMEWORK's
+DEFAULT_AUTHENTICATION_CLASSES (they read the Authorization header, so
+they work on a plain HttpRequest).
+"""
+
+import asyncio
+import functools
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import APIException
+from rest_framework.settings import api_settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from . import rollups, versioning
+from .conditional import aconditional_get
+from .filters import filter_expenses, parse_date_range, parse_sort, parse_year_month
+from .models import Expense, CategoryBudget
+from .pagination import KeysetPaginator, get_page_size
+from .projections import expense_values, expense_dicts
+from .summaries import summary_payload, budget_payload
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, safe=False, encoder=JSONEncoder)
+
+
+def _authenticate(request):
+    for authentication_class in api_settings.DEFAULT_AUTHENTICATION_CLASSES:
+        result = authentication_class().authenticate(request)
+        if result is not None:
+            return result[0]
+    return None
+
+
+def async_api(view):
+    """GET-only, authenticated, with DRF-style error bodies."""
+
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD"):
+            return json_response({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+
+        try:
+            user = await sync_to_async(_authenticate)(request)
+            if user is None:
+                return json_response({"detail": "Authentication credentials were not provided."}, status=401)
+            request.user = user
+            return await view(request, *args, **kwargs)
+        except APIException as exc:
+            return json_response(exc.detail, status=exc.status_code)
+
+    return wrapper
+
+
+# ---- QUERIES ----
+
+async def expense_page(user, params):
+    expenses = expense_values(filter_expenses(Expense.objects.filter(user=user), params))
+    sort_field, descending = parse_sort(params)
+
+    paginator = KeysetPaginator(
+        field=sort_field,
+        descending=descending,
+        page_size=get_page_size(params),
+    )
+    rows, next_cursor, prev_cursor = await paginator.apaginate(expenses, params.get("cursor"))
+
+    return {
+        "next": next_cursor,
+        "prev": prev_cursor,
+        "results": expense_dicts(rows),
+    }
+
+
+async def summary(user, start, end):
+    rows = [row async for row in rollups.category_totals(user, start, end)]
+    return summary_payload(rows, start, end)
+
+
+async def budgets(user, year, month):
+    budget_rows = [
+        budget async for budget in CategoryBudget.objects.filter(
+            user=user,
+            month=month,
+            year=year
+        ).select_related("category")
+    ]
+    spent_query = rollups.spend_by_category_query(
+        user, year, month, [budget.category_id for budget in budget_rows]
+    )
+    spent_by_category = {category_id: total async for category_id, total in spent_query}
+    return budget_payload(budget_rows, spent_by_category)
+
+
+# ---- VIEWS ----
+
+# GET /api/async/expense/ : same parameters as /api/expense/ (paginated only)
+
+@async_api
+@aconditional_get("user", versioning.REFERENCE)
+async def expense_list(request):
+    return json_response(await expense_page(request.user, request.GET))
+
+
+# GET /api/async/expense-summary/ : same parameters as /api/expense-summary/
+
+@async_api
+@aconditional_get("user", versioning.REFERENCE)
+async def expense_summary(request):
+    start, end = parse_date_range(request.GET)
+    return json_response(await summary(request.user, start, end))
+
+
+# GET /api/async/category-budget/ : same parameters as /api/category-budget/
+
+@async_api
+@aconditional_get("user", versioning.REFERENCE)
+async def category_budget(request):
+    year, month = parse_year_month(request.GET)
+    return json_response(await budgets(request.user, year, month))
+
+
+# GET /api/async/dashboard/
+# summary range: ?from&to or ?period; budgets: ?year&month;
+# recent expenses: ?page_size (first page, newest first)
+
+@async_api
+@aconditional_get("user", versioning.REFERENCE)
+async def dashboard(request):
+    params = request.GET
+    start, end = parse_date_range(params)
+    year, month = parse_year_month(params)
+    page_params = {"page_size": params.get("page_size", "10")}
+
+    summary_data, budget_data, recent = await asyncio.gather(
+        summary(request.user, start, end),
+        budgets(request.user, year, month),
+        expense_page(request.user, page_params),
+    )
+
+    return json_response({
+        "summary": summary_data,
+        "budgets": budget_data,
+        "recent_expenses": recent["results"],
+    })
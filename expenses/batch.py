@@ -0,0 +1,136 @@
+"""
+Batched expense mutations.
+
+A batch is a list of create / update / delete operations. All of them are
+validated with ExpenseSerializer first; if any fails, nothing is written
+and the errors are returned per operation. Otherwise the whole batch is
+applied in one transaction with bulk_create, bulk_update and a single
+filtered delete.
+"""
+
+from django.db import transaction
+from rest_framework import serializers
+
+from .filters import MAX_ID
+from .models import Expense
+from .reference_cache import get_reference_data
+from .serializers import ExpenseSerializer
+
+MAX_OPERATIONS = 1000
+
+OPERATIONS = ("create", "update", "delete")
+
+UPDATE_FIELDS = [
+    "transaction_type",
+    "category",
+    "subcategory",
+    "income_type",
+    "payment_method",
+    "amount",
+    "date",
+    "description",
+]
+
+
+class BatchError(ValueError):
+    pass
+
+
+def _is_id(value):
+    # bool is an int subclass: true must not pass as pk 1
+    return isinstance(value, int) and not isinstance(value, bool) and 1 <= value <= MAX_ID
+
+
+def _validate(operations, user, refs):
+    """Returns (creates, updates, deletes, errors); creates/updates hold (index, instance)."""
+    ids = {
+        op["id"] for op in operations
+        if isinstance(op, dict) and op.get("op") in ("update", "delete") and _is_id(op.get("id"))
+    }
+    existing = Expense.objects.filter(user=user, id__in=ids).in_bulk()
+
+    creates, updates, deletes, errors = [], [], [], []
+    seen_ids = set()
+
+    for index, op in enumerate(operations):
+        if not isinstance(op, dict) or op.get("op") not in OPERATIONS:
+            errors.append({"index": index, "errors": {"op": ["Must be one of: create, update, delete"]}})
+            continue
+
+        kind = op["op"]
+        instance = None
+
+        if kind != "create":
+            pk = op.get("id")
+            if not _is_id(pk):
+                errors.append({"index": index, "errors": {"id": ["Must be an integer id"]}})
+                continue
+            instance = existing.get(pk)
+            if instance is None:
+                errors.append({"index": index, "errors": {"id": ["Expense not found"]}})
+                continue
+            if pk in seen_ids:
+                errors.append({"index": index, "errors": {"id": ["Used by more than one operation"]}})
+                continue
+            seen_ids.add(pk)
+
+        if kind == "delete":
+            deletes.append(instance.id)
+            continue
+
+        data = op.get("data")
+        if not isinstance(data, dict):
+            errors.append({"index": index, "errors": {"data": ["This field is required."]}})
+            continue
+
+        serializer = ExpenseSerializer(instance, data=data, partial=kind == "update")
+        if not serializer.is_valid():
+            errors.append({"index": index, "errors": serializer.errors})
+            continue
+
+        try:
+            if kind == "create":
+                creates.append((index, serializer.build_instance(serializer.validated_data, user, refs)))
+            else:
+                updates.append((index, serializer.apply_to_instance(instance, serializer.validated_data, refs)))
+        except serializers.ValidationError as exc:
+            errors.append({"index": index, "errors": exc.detail})
+
+    return creates, updates, deletes, errors
+
+
+def run_batch(operations, user):
+    """
+    Returns (ok, results). results holds one entry per operation on
+    success, or one entry per failed operation when nothing was applied.
+    """
+    if not isinstance(operations, list) or not operations:
+        raise BatchError("operations must be a non-empty list")
+    if len(operations) > MAX_OPERATIONS:
+        raise BatchError(f"At most {MAX_OPERATIONS} operations per batch")
+
+    refs = get_reference_data()
+    creates, updates, deletes, errors = _validate(operations, user, refs)
+
+    if errors:
+        return False, errors
+
+    with transaction.atomic():
+        created = Expense.objects.bulk_create([instance for _, instance in creates])
+        if updates:
+            Expense.objects.bulk_update([instance for _, instance in updates], UPDATE_FIELDS)
+        if deletes:
+            Expense.objects.filter(user=user, id__in=deletes).delete()
+
+    results = [None] * len(operations)
+    for (index, _), instance in zip(creates, created):
+        results[index] = {"index": index, "op": "create", "id": instance.id, "status": "created"}
+    for index, instance in updates:
+        results[index] = {"index": index, "op": "update", "id": instance.id, "status": "updated"}
+
+    deleted = iter(deletes)
+    for index, op in enumerate(operations):
+        if op["op"] == "delete":
+            results[index] = {"index": index, "op": "delete", "id": next(deleted), "status": "deleted"}
+
+    return True, results
@@ -0,0 +1,507 @@
+"""
+Endpoint benchmarks.
+
+Every route in expenses/urls.py and accounts/urls.py is exercised through
+the Django test client as a real (JWT-authenticated) user against the
+current database, normally one filled by `manage.py seed_data`. Writes
+run inside a transaction that is rolled back, so a run leaves the data
+as it found it.
+
+Per scenario the report holds latency percentiles, the SQL query count
+and the peak Python memory allocated while serving one request. Run it
+with `manage.py benchmark`; reports are plain JSON so two commits can be
+compared with `--compare`.
+"""
+
+import math
+import multiprocessing
+import platform
+import random
+import statistics
+import time
+import tracemalloc
+import uuid
+from contextlib import ExitStack
+from datetime import date
+
+import django
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import OperationalError, connections, transaction
+from django.test import override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts.models import MenuList
+from expense_backend.metrics import QueryTimer
+
+from .filters import add_months
+from .models import Category, SubCategory, PaymentMethod, IncomeType, Expense, CategoryBudget
+
+HOST = "localhost"
+
+
+class Scenario:
+
+    def __init__(self, name, method, path, data=None, format="json", writes=False, params=None, upload=None):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.data = data
+        self.format = format
+        self.writes = writes
+        self.params = params
+        # callable returning the file to send; uploads can only be read once
+        self.upload = upload
+
+    def request(self, client):
+        call = getattr(client, self.method.lower())
+        if self.upload is not None:
+            return call(self.path, {"file": self.upload()}, format="multipart")
+        if self.method == "GET":
+            return call(self.path, self.params)
+        return call(self.path, self.data, format=self.format)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def build_scenarios(user, password=None):
+    """The scenarios runnable for this user; routes needing missing data are left out."""
+    today = date.today()
+    expense = Expense.objects.filter(user=user).order_by("-date", "-id").first()
+    budget = CategoryBudget.objects.filter(user=user).order_by("-year", "-month", "id").first()
+    subcategory = SubCategory.objects.select_related("category").order_by("id").first()
+    category = subcategory.category if subcategory else Category.objects.order_by("id").first()
+    menu = MenuList.objects.order_by("id").first()
+    income_type = IncomeType.objects.order_by("id").first()
+    payment_method = PaymentMethod.objects.order_by("id").first()
+    unbudgeted = (
+        Category.objects.exclude(categorybudget__user=user, categorybudget__year=today.year, categorybudget__month=today.month)
+        .order_by("id")
+        .first()
+    )
+
+    new_expense = {
+        "transaction_type": "Expense",
+        "category": category.id if category else None,
+        "subcategory": subcategory.id if subcategory else None,
+        "amount": "12.50",
+        "date": today.isoformat(),
+        "description": "benchmark",
+    }
+
+    def import_file():
+        row = f"Expense,{new_expense['category'] or ''},{new_expense['subcategory'] or ''},12.50,{today.isoformat()}"
+        content = "transaction_type,category,subcategory,amount,date\n" + "\n".join([row] * 100) + "\n"
+        return SimpleUploadedFile("bench.csv", content.encode(), "text/csv")
+
+    scenarios = [
+        # expenses/urls.py
+        Scenario("api.root", "GET", "/api/"),
+        Scenario("categories.list", "GET", "/api/categories/"),
+        Scenario("payment_methods.list", "GET", "/api/payment-method/"),
+        Scenario("subcategories.list", "GET", "/api/sub-categories/"),
+        Scenario("income_types.list", "GET", "/api/income-type/"),
+        Scenario("expenses.list", "GET", "/api/expense/"),
+        Scenario("expenses.list_filtered", "GET", "/api/expense/", params={"period": "year", "sort": "-amount"}),
+        Scenario("expenses.list_unpaginated", "GET", "/api/expense/", params={"paginate": "false", "period": "month"}),
+        Scenario(
+            "expenses.list_columnar", "GET", "/api/expense/",
+            params={"paginate": "false", "period": "month", "format": "columnar"},
+        ),
+        Scenario("expenses.export_csv", "GET", "/api/expense/export/", params={"format": "csv", "period": "month"}),
+        Scenario("expenses.summary", "GET", "/api/expense-summary/"),
+        Scenario("expenses.summary_month", "GET", "/api/expense-summary/", params={"period": "month"}),
+        Scenario("expenses.timeseries", "GET", "/api/expense-timeseries/", params={"bucket": "month", "period": "year"}),
+        Scenario("expenses.timeseries_daily", "GET", "/api/expense-timeseries/",
+                 params={"bucket": "day", "period": "month", "group_by": "category"}),
+        Scenario("budgets.list", "GET", "/api/category-budget/"),
+        Scenario("budgets.forecast", "GET", "/api/category-budget/forecast/", params={"history": 6}),
+        Scenario("budgets.report", "GET", "/api/category-budget/report/"),
+        Scenario("expenses.list_async", "GET", "/api/async/expense/"),
+        Scenario("expenses.summary_async", "GET", "/api/async/expense-summary/"),
+        Scenario("expenses.dashboard_async", "GET", "/api/async/dashboard/"),
+        Scenario("budgets.list_async", "GET", "/api/async/category-budget/"),
+        Scenario("expenses.create", "POST", "/api/expense/", new_expense, writes=True),
+        Scenario("expenses.import", "POST", "/api/expense/import/", writes=True, upload=import_file),
+        Scenario("expenses.batch", "POST", "/api/expense/batch/",
+                 {"operations": [{"op": "create", "data": new_expense}] * 50}, writes=True),
+        # accounts/urls.py
+        Scenario("accounts.users", "GET", "/users/"),
+        Scenario("accounts.menu", "GET", "/menu-list/"),
+        Scenario("accounts.register", "POST", "/register/", writes=True),
+    ]
+
+    if password is not None:
+        credentials = {"email": user.email, "password": password}
+        scenarios.append(Scenario("accounts.login", "POST", "/login/", credentials))
+        scenarios.append(Scenario("accounts.login_async", "POST", "/login/async/", credentials))
+
+    if category:
+        scenarios.append(Scenario("subcategories.of_category", "GET", f"/api/sub-categories/{category.id}/"))
+        scenarios.append(Scenario("budgets.bulk", "POST", "/api/category-budget/bulk/", {
+            "months": ["{:04d}-{:02d}".format(*add_months(today.year, today.month, offset)) for offset in range(12)],
+            "budgets": [{"category": category.id, "monthly_limit": "400.00"}],
+            "overwrite": True,
+        }, writes=True))
+        scenarios.append(Scenario("categories.update", "PUT", f"/api/categories/{category.id}/",
+                                  {"name": category.name, "icon": category.icon}, writes=True))
+    if subcategory:
+        scenarios.append(Scenario("subcategories.update", "PUT", f"/api/sub-categories/{subcategory.id}/",
+                                  {"name": subcategory.name}, writes=True))
+    if menu:
+        scenarios.append(Scenario("accounts.menu_detail", "GET", f"/menu-list/{menu.id}/"))
+    if payment_method:
+        scenarios.append(Scenario("payment_methods.detail", "GET", f"/api/payment-method/{payment_method.id}/"))
+    if income_type:
+        scenarios.append(Scenario("income_types.update", "PUT", "/api/income-type/",
+                                  {"id": income_type.id, "name": income_type.name}, writes=True))
+    if expense:
+        scenarios.append(Scenario("expenses.detail", "GET", f"/api/expense/{expense.id}/"))
+        scenarios.append(Scenario("expenses.update", "PUT", f"/api/expense/{expense.id}/",
+                                  dict(new_expense, amount="99.99"), writes=True))
+        scenarios.append(Scenario("expenses.delete", "DELETE", f"/api/expense/{expense.id}/", writes=True))
+    if budget:
+        scenarios.append(Scenario("budgets.update", "PUT", f"/api/category-budget/{budget.id}/",
+                                  {"monthly_limit": "1234.00"}, writes=True))
+        scenarios.append(Scenario("budgets.delete", "DELETE", f"/api/category-budget/{budget.id}/", writes=True))
+    if unbudgeted:
+        scenarios.append(Scenario("budgets.create", "POST", "/api/category-budget/",
+                                  {"category": unbudgeted.id, "monthly_limit": "500.00"}, writes=True))
+
+    return scenarios
+
+
+class BenchmarkRunner:
+
+    def __init__(self, user, iterations=20, warmup=2):
+        self.user = user
+        self.iterations = iterations
+        self.warmup = warmup
+        self.client = APIClient(HTTP_HOST=HOST)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def prepare(self, scenario):
+        # register needs a fresh username on every call
+        if scenario.name == "accounts.register":
+            name = f"bench_{uuid.uuid4().hex[:12]}"
+            scenario.data = {"username": name, "email": f"{name}@example.com",
+                             "password": "bench-pass-123", "password2": "bench-pass-123"}
+
+    def call(self, scenario):
+        """One request: (status, seconds, queries). Writes are rolled back."""
+        self.prepare(scenario)
+        timer = QueryTimer()
+
+        with ExitStack() as stack:
+            if scenario.writes:
+                stack.enter_context(transaction.atomic())
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timer))
+
+            start = time.perf_counter()
+            response = scenario.request(self.client)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - start
+
+            if scenario.writes:
+                transaction.set_rollback(True)
+
+        return response.status_code, elapsed, timer.count
+
+    def peak_memory(self, scenario):
+        tracemalloc.start()
+        try:
+            self.call(scenario)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak
+
+    def run_scenario(self, scenario):
+        for _ in range(self.warmup):
+            self.call(scenario)
+
+        statuses, timings, queries = set(), [], []
+        for _ in range(self.iterations):
+            status, elapsed, count = self.call(scenario)
+            statuses.add(status)
+            timings.append(elapsed * 1000)
+            queries.append(count)
+
+        return {
+            "method": scenario.method,
+            "path": scenario.path,
+            "status": sorted(statuses),
+            "iterations": self.iterations,
+            "p50_ms": round(percentile(timings, 50), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "p99_ms": round(percentile(timings, 99), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "queries": max(queries),
+            "peak_memory_kib": round(self.peak_memory(scenario) / 1024, 1),
+        }
+
+    def run(self, scenarios):
+        with override_settings(ALLOWED_HOSTS=[HOST]):
+            results = {scenario.name: self.run_scenario(scenario) for scenario in scenarios}
+
+        return {
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connections["default"].vendor,
+                "db_profile": getattr(settings, "DB_PROFILE", "default"),
+            },
+            "dataset": {
+                "user": self.user.username,
+                "user_expenses": Expense.objects.filter(user=self.user).count(),
+                "total_expenses": Expense.objects.count(),
+            },
+            "scenarios": results,
+        }
+
+
+def compare(baseline, current, keys=("p50_ms", "p95_ms", "queries", "peak_memory_kib")):
+    """Rows of (scenario, key, before, after, change %) for scenarios in both reports."""
+    rows = []
+    for name, after in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if before is None:
+            continue
+        for key in keys:
+            old, new = before.get(key), after.get(key)
+            if old is None or new is None:
+                continue
+            change = (new - old) / old * 100 if old else 0.0
+            rows.append((name, key, old, new, round(change, 1)))
+    return rows
+
+
+# ---- SERIALIZERS ----
+
+def run_serializers(user, rows=1000, repeat=5):
+    """
+    Rows per second turning `rows` of the user's expenses into response
+    bytes: ExpenseSerializer + JSONRenderer (the detail path) against
+    the values() projection + FastJSONRenderer (the list path) and the
+    columnar format. Each path includes its query; the best of `repeat`
+    runs is kept. parse_ms is json.loads() of the body, a stand-in for
+    the client's JSON.parse().
+    """
+    import json
+
+    from rest_framework.renderers import JSONRenderer
+
+    from .projections import expense_values, expense_dicts, expense_columns
+    from .renderers import FastJSONRenderer, orjson
+    from .serializers import ExpenseSerializer
+
+    expenses = Expense.objects.filter(user=user).order_by("-date", "-id")[:rows]
+    count = expenses.count()
+
+    def serializer_path():
+        return JSONRenderer().render(ExpenseSerializer(expenses.with_related(), many=True).data)
+
+    def projection_path():
+        return FastJSONRenderer().render(expense_dicts(expense_values(expenses)))
+
+    def columnar_path():
+        return FastJSONRenderer().render(expense_columns(expense_values(expenses)))
+
+    results = {}
+    paths = (("serializer", serializer_path), ("projection", projection_path), ("columnar", columnar_path))
+    for name, path in paths:
+        body = path()
+        best = min(_timed(path) for _ in range(repeat))
+        parse = min(_timed(lambda: json.loads(body)) for _ in range(repeat))
+        results[name] = {
+            "rows_per_second": round(count / best) if best else None,
+            "ms": round(best * 1000, 3),
+            "parse_ms": round(parse * 1000, 3),
+            "bytes": len(body),
+        }
+
+    return {
+        "rows": count,
+        "orjson": orjson is not None,
+        "identical": serializer_path() == projection_path(),
+        **results,
+    }
+
+
+def _timed(func):
+    started = time.perf_counter()
+    func()
+    return time.perf_counter() - started
+
+
+# ---- COMPRESSION ----
+
+COMPRESSION_SCENARIOS = (
+    "categories.list",
+    "expenses.list",
+    "expenses.list_unpaginated",
+    "expenses.list_columnar",
+    "expenses.export_csv",
+    "expenses.summary",
+    "expenses.timeseries_daily",
+    "accounts.menu",
+)
+
+
+def run_compression(user, iterations=10):
+    """
+    Bytes on the wire and CPU per request for the main GET endpoints,
+    once per Content-Encoding the middleware can produce. cpu_ms is the
+    median process time of a request including reading its body;
+    "cost" is the extra over the uncompressed request.
+    """
+    from expense_backend.compression import brotli
+
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    client = APIClient(HTTP_HOST=HOST)
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {RefreshToken.for_user(user).access_token}")
+
+    def fetch(scenario, encoding):
+        started = time.process_time()
+        response = client.get(scenario.path, scenario.params, HTTP_ACCEPT_ENCODING=encoding)
+        if response.streaming:
+            size = sum(len(chunk) for chunk in response.streaming_content)
+        else:
+            size = len(response.content)
+        return response.get("Content-Encoding", "identity"), size, time.process_time() - started
+
+    results = {}
+    with override_settings(ALLOWED_HOSTS=[HOST]):
+        for scenario in build_scenarios(user):
+            if scenario.name not in COMPRESSION_SCENARIOS:
+                continue
+            result = results[scenario.name] = {}
+            for encoding in encodings:
+                fetch(scenario, encoding)
+                samples = [fetch(scenario, encoding) for _ in range(iterations)]
+                used, size, _ = samples[-1]
+                result[encoding] = {
+                    "content_encoding": used,
+                    "bytes": size,
+                    "cpu_ms": round(statistics.median(spent for _, _, spent in samples) * 1000, 3),
+                }
+            plain = result["identity"]
+            for encoding in encodings[1:]:
+                compressed = result[encoding]
+                compressed["ratio"] = round(compressed["bytes"] / plain["bytes"], 3) if plain["bytes"] else None
+                compressed["cost_ms"] = round(compressed["cpu_ms"] - plain["cpu_ms"], 3)
+
+    return {"encodings": encodings, "iterations": iterations, "scenarios": results}
+
+
+# ---- CONCURRENCY ----
+
+CONCURRENCY_MARKER = "concurrency-benchmark"
+
+
+def _concurrency_worker(index, read, write, token, seconds, write_ratio, seed, gate, results):
+    rng = random.Random(seed + index)
+    client = APIClient(HTTP_HOST=HOST)
+    client.credentials(HTTP_AUTHORIZATION=token)
+    counts = {"reads": 0, "writes": 0, "locked": 0, "failed": 0}
+    timings = {"read": [], "write": []}
+
+    gate.wait()
+    deadline = time.perf_counter() + seconds
+    try:
+        while time.perf_counter() < deadline:
+            kind = "write" if rng.random() < write_ratio else "read"
+            started = time.perf_counter()
+            try:
+                response = (write if kind == "write" else read).request(client)
+            except OperationalError as exc:
+                counts["locked" if "locked" in str(exc) else "failed"] += 1
+                continue
+            if response.status_code >= 400:
+                counts["failed"] += 1
+                continue
+            timings[kind].append((time.perf_counter() - started) * 1000)
+            counts[kind + "s"] += 1
+    finally:
+        connections.close_all()
+        results.put((counts, timings))
+
+
+def run_concurrency(user, workers=8, seconds=10.0, write_ratio=0.3, seed=0):
+    """
+    Mixed read/write load from several forked worker processes, each with
+    its own database connection, the way gunicorn workers share the
+    database: reads list the user's expenses, writes POST a new expense.
+    Rows written are deleted afterwards.
+    """
+    scenarios = {scenario.name: scenario for scenario in build_scenarios(user)}
+    read, write = scenarios["expenses.list"], scenarios["expenses.create"]
+    write.data = dict(write.data, description=CONCURRENCY_MARKER)
+    token = f"Bearer {RefreshToken.for_user(user).access_token}"
+
+    context = multiprocessing.get_context("fork")
+    gate = context.Barrier(workers)
+    results = context.Queue()
+
+    # forked children must open their own connections
+    connections.close_all()
+
+    with override_settings(ALLOWED_HOSTS=[HOST]):
+        processes = [
+            context.Process(
+                target=_concurrency_worker,
+                args=(index, read, write, token, seconds, write_ratio, seed, gate, results),
+            )
+            for index in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        collected = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+
+    totals = {"reads": 0, "writes": 0, "locked": 0, "failed": 0}
+    timings = {"read": [], "write": []}
+    for counts, spent in collected:
+        for key, value in counts.items():
+            totals[key] += value
+        for key, values in spent.items():
+            timings[key].extend(values)
+
+    Expense.objects.filter(user=user, description=CONCURRENCY_MARKER).delete()
+
+    journal_mode = None
+    if connections["default"].vendor == "sqlite":
+        with connections["default"].cursor() as cursor:
+            cursor.execute("PRAGMA journal_mode")
+            journal_mode = cursor.fetchone()[0]
+
+    def latency(values):
+        if not values:
+            return None
+        return {"p50_ms": round(percentile(values, 50), 3), "p95_ms": round(percentile(values, 95), 3)}
+
+    return {
+        "db_profile": getattr(settings, "DB_PROFILE", "default"),
+        "journal_mode": journal_mode,
+        "workers": workers,
+        "seconds": seconds,
+        "write_ratio": write_ratio,
+        "ops_per_second": round((totals["reads"] + totals["writes"]) / seconds, 1),
+        "reads_per_second": round(totals["reads"] / seconds, 1),
+        "writes_per_second": round(totals["writes"] / seconds, 1),
+        "locked_errors": totals["locked"],
+        "other_errors": totals["failed"],
+        "read_latency": latency(timings["read"]),
+        "write_latency": latency(timings["write"]),
+    }
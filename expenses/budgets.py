@@ -0,0 +1,243 @@
+"""
+Budgets across months.
+
+budget_report() lays out a category x month matrix of budget against
+actual spend from one CategoryBudget query and one grouped rollup query.
+save_budgets() writes a set of monthly limits, or a copy of one month's
+budgets, into any number of months with one bulk upsert.
+"""
+
+import functools
+import operator
+from datetime import date
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from . import rollups, versioning
+from .filters import add_months, month_end, parse_month
+from .models import CategoryBudget
+from .reference_cache import get_reference_data
+from .serializers import CategoryBudgetSerializer
+
+DEFAULT_REPORT_MONTHS = 12
+MAX_REPORT_MONTHS = 36
+
+MAX_BULK_MONTHS = 24
+
+
+class BudgetError(ValueError):
+    pass
+
+
+def month_span(first, last):
+    """[(year, month), ...] from first to last inclusive."""
+    months = []
+    while first <= last:
+        months.append(first)
+        first = add_months(*first, 1)
+    return months
+
+
+def parse_report_range(params, today=None):
+    """?from=YYYY-MM&to=YYYY-MM, defaulting to the twelve months up to this one."""
+    today = today or date.today()
+
+    last = parse_month(params["to"], "to") if params.get("to") else (today.year, today.month)
+    if params.get("from"):
+        first = parse_month(params["from"], "from")
+    else:
+        first = add_months(*last, 1 - DEFAULT_REPORT_MONTHS)
+
+    if first > last:
+        raise ValidationError({"error": "from must not be after to"})
+    if len(month_span(first, last)) > MAX_REPORT_MONTHS:
+        raise ValidationError({"error": f"At most {MAX_REPORT_MONTHS} months per report"})
+
+    return first, last
+
+
+def _months_q(months):
+    return functools.reduce(operator.or_, (Q(year=year, month=month) for year, month in months))
+
+
+def _total(cells, field):
+    return sum((cell[field] for cell in cells if cell[field] is not None), Decimal("0"))
+
+
+def budget_report(user, first, last, names):
+    """
+    {"months": ["YYYY-MM", ...], "categories": [...], "totals": [...]}
+
+    One row per category with a budget or spend in the range, one cell
+    per month. variance is budget - actual (negative when over); months
+    without a budget have budget, variance and over_budget null.
+    """
+    months = month_span(first, last)
+    start, end = date(*first, 1), month_end(*last)
+
+    budgets = {
+        (category_id, year, month): (budget_id, limit)
+        for budget_id, category_id, year, month, limit in CategoryBudget.objects.filter(
+            rollups.month_range_q(start, end), user=user
+        ).values_list("id", "category_id", "year", "month", "monthly_limit")
+    }
+    actuals = {
+        (category_id, year, month): total
+        for category_id, year, month, total in rollups.spend_by_category_month(user, start, end)
+    }
+
+    category_ids = {key[0] for key in budgets} | {key[0] for key in actuals}
+    ordered = sorted(category_ids, key=lambda pk: (names.get(pk, ""), pk))
+
+    categories = []
+    for category_id in ordered:
+        cells = []
+        for year, month in months:
+            key = (category_id, year, month)
+            actual = actuals.get(key) or Decimal("0")
+            budget_id, limit = budgets.get(key, (None, None))
+            cells.append({
+                "budget_id": budget_id,
+                "budget": limit,
+                "actual": actual,
+                "variance": None if limit is None else limit - actual,
+                "over_budget": None if limit is None else actual > limit,
+            })
+
+        categories.append({
+            "category": {"id": category_id, "name": names.get(category_id)},
+            "cells": cells,
+            "totals": {
+                "budget": _total(cells, "budget"),
+                "actual": _total(cells, "actual"),
+                "over_budget_months": sum(1 for cell in cells if cell["over_budget"]),
+            },
+        })
+
+    totals = []
+    for index in range(len(months)):
+        column = [row["cells"][index] for row in categories]
+        budget, actual = _total(column, "budget"), _total(column, "actual")
+        totals.append({"budget": budget, "actual": actual, "variance": budget - actual})
+
+    return {
+        "months": [f"{year:04d}-{month:02d}" for year, month in months],
+        "categories": categories,
+        "totals": totals,
+    }
+
+
+# ---- BULK SAVE ----
+
+def _parse_months(value):
+    if not isinstance(value, list) or not value:
+        raise BudgetError("months must be a non-empty list of YYYY-MM")
+    try:
+        months = sorted({parse_month(item) for item in value})
+    except ValidationError:
+        raise BudgetError("months must be a non-empty list of YYYY-MM")
+    if len(months) > MAX_BULK_MONTHS:
+        raise BudgetError(f"At most {MAX_BULK_MONTHS} months at a time")
+    return months
+
+
+def _parse_limits(items):
+    """({category_id: monthly_limit}, errors) for a list of {category, monthly_limit}."""
+    if not isinstance(items, list) or not items:
+        raise BudgetError("budgets must be a non-empty list")
+
+    refs = get_reference_data()
+    limits, errors = {}, []
+
+    for index, item in enumerate(items):
+        serializer = CategoryBudgetSerializer(data=item if isinstance(item, dict) else {})
+        if not serializer.is_valid():
+            errors.append({"index": index, "errors": serializer.errors})
+            continue
+
+        category_id = serializer.validated_data["category"]
+        if category_id not in refs.category:
+            errors.append({"index": index, "errors": {"category": [f"Invalid category id {category_id}"]}})
+        elif category_id in limits:
+            errors.append({"index": index, "errors": {"category": ["Listed more than once"]}})
+        else:
+            limits[category_id] = serializer.validated_data["monthly_limit"]
+
+    return limits, errors
+
+
+def save_budgets(user, months, limits, overwrite=False):
+    """
+    Give every category in limits its monthly limit in each month.
+    Existing budgets are updated when overwrite is set, otherwise kept.
+    Returns {"created", "updated", "skipped"} counts.
+    """
+    rows = [
+        CategoryBudget(user=user, category_id=category_id, year=year, month=month, monthly_limit=limit)
+        for year, month in months
+        for category_id, limit in limits.items()
+    ]
+
+    with transaction.atomic():
+        existing = set(
+            CategoryBudget.objects.filter(_months_q(months), user=user, category_id__in=limits)
+            .values_list("category_id", "year", "month")
+        )
+        new = [row for row in rows if (row.category_id, row.year, row.month) not in existing]
+
+        if overwrite:
+            CategoryBudget.objects.bulk_create(
+                rows,
+                update_conflicts=True,
+                unique_fields=["user", "category", "year", "month"],
+                update_fields=["monthly_limit"],
+            )
+        else:
+            CategoryBudget.objects.bulk_create(new, ignore_conflicts=True)
+
+        # bulk_create sends no post_save, so bump the user's version here
+        if overwrite or new:
+            versioning.bump(versioning.user_key(user.id))
+
+    kept = len(rows) - len(new)
+    return {
+        "created": len(new),
+        "updated": kept if overwrite else 0,
+        "skipped": 0 if overwrite else kept,
+    }
+
+
+def run_bulk_save(data, user):
+    """
+    Returns (ok, result): the save_budgets() counts, or per-item errors
+    when nothing was written. data holds "months" and either "budgets"
+    ([{category, monthly_limit}]) or "copy_from" ("YYYY-MM").
+    """
+    if not isinstance(data, dict):
+        raise BudgetError("Expected a JSON object")
+
+    months = _parse_months(data.get("months"))
+
+    if ("budgets" in data) == ("copy_from" in data):
+        raise BudgetError("Send either budgets or copy_from")
+
+    if "budgets" in data:
+        limits, errors = _parse_limits(data["budgets"])
+        if errors:
+            return False, errors
+    else:
+        try:
+            year, month = parse_month(data["copy_from"], "copy_from")
+        except ValidationError:
+            raise BudgetError("copy_from must be YYYY-MM")
+        limits = dict(
+            CategoryBudget.objects.filter(user=user, year=year, month=month)
+            .values_list("category_id", "monthly_limit")
+        )
+        if not limits:
+            raise BudgetError(f"No budgets in {year:04d}-{month:02d} to copy")
+
+    return True, save_budgets(user, months, limits, overwrite=bool(data.get("overwrite")))
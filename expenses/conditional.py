@@ -0,0 +1,111 @@
+"""
+Conditional GET for read endpoints.
+
+@conditional_get("user", "reference") derives a strong ETag from the
+request (path, query string, negotiated format, user), today's date and
+the current stamps of the listed version scopes, all read in one query.
+A matching If-None-Match / If-Modified-Since is answered with 304 before
+the view runs any of its own queries or serializers.
+
+The date is there because defaults such as "the current month" or
+?period=month resolve against today: after midnight the same URL may
+mean another range without any write, so validators from yesterday
+must not match.
+"""
+
+import functools
+import hashlib
+from datetime import date, datetime, time
+
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from . import versioning
+
+USER = "user"
+
+
+def _scope_keys(request, scopes):
+    return [versioning.user_key(request.user.id) if scope == USER else scope for scope in scopes]
+
+
+def make_etag(request, stamps):
+    renderer = getattr(request, "accepted_renderer", None)
+    parts = [
+        request.path,
+        request.META.get("QUERY_STRING", ""),
+        renderer.format if renderer else "",
+        str(request.user.id),
+        date.today().isoformat(),
+    ]
+    for key in sorted(stamps):
+        version, updated_at = stamps[key]
+        parts.append(f"{key}={version}@{updated_at.isoformat() if updated_at else ''}")
+
+    return '"%s"' % hashlib.sha1("|".join(parts).encode()).hexdigest()
+
+
+def last_modified(stamps):
+    times = [updated_at for _, updated_at in stamps.values() if updated_at is not None]
+    # never before the start of today, when date-relative defaults last moved
+    midnight = datetime.combine(date.today(), time.min)
+    # whole seconds, the resolution of the HTTP date headers
+    return int(max([midnight.timestamp(), *(t.timestamp() for t in times)]))
+
+
+def _validators(request, stamps):
+    # views can reuse the stamps instead of reading the versions again
+    request.data_stamps = stamps
+    return make_etag(request, stamps), last_modified(stamps)
+
+
+def _finish(response, etag, modified):
+    response["ETag"] = etag
+    if modified is not None:
+        response.headers.setdefault("Last-Modified", http_date(modified))
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+def conditional_get(*scopes):
+    def decorator(method):
+
+        @functools.wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            stamps = versioning.get_stamps(_scope_keys(request, scopes))
+            etag, modified = _validators(request, stamps)
+
+            response = get_conditional_response(request, etag=etag, last_modified=modified)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            return _finish(response, etag, modified)
+
+        return wrapper
+
+    return decorator
+
+
+def aconditional_get(*scopes):
+    """conditional_get for async function views (see async_views.py)."""
+    def decorator(view):
+
+        @functools.wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            stamps = await versioning.aget_stamps(_scope_keys(request, scopes))
+            etag, modified = _validators(request, stamps)
+
+            response = get_conditional_response(request, etag=etag, last_modified=modified)
+            if response is None:
+                response = await view(request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            return _finish(response, etag, modified)
+
+        return wrapper
+
+    return decorator
+
@@ -0,0 +1,187 @@
+import calendar
+from datetime import date
+from decimal import Decimal, InvalidOperation
+
+from rest_framework.exceptions import ValidationError
+
+PERIODS = ("month", "quarter", "year")
+
+
+def month_end(year, month):
+    return date(year, month, calendar.monthrange(year, month)[1])
+
+
+def add_months(year, month, delta):
+    index = year * 12 + month - 1 + delta
+    return index // 12, index % 12 + 1
+
+
+def period_range(period, today=None):
+    """Return the (start, end) dates of the current month / quarter / year."""
+    today = today or date.today()
+
+    if period == "month":
+        return date(today.year, today.month, 1), month_end(today.year, today.month)
+
+    if period == "quarter":
+        first_month = 3 * ((today.month - 1) // 3) + 1
+        return date(today.year, first_month, 1), month_end(today.year, first_month + 2)
+
+    if period == "year":
+        return date(today.year, 1, 1), date(today.year, 12, 31)
+
+    raise ValidationError({"error": f"period must be one of: {', '.join(PERIODS)}"})
+
+
+def _parse_date(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({"error": f"Invalid '{name}' date, expected YYYY-MM-DD"})
+
+
+def parse_date_range(params):
+    """
+    Read ?from=YYYY-MM-DD&to=YYYY-MM-DD or ?period=month|quarter|year.
+
+    Returns (start, end), both inclusive; either side may be None for an
+    open range.
+    """
+    period = params.get("period")
+    if period:
+        return period_range(period)
+
+    start = _parse_date(params, "from")
+    end = _parse_date(params, "to")
+
+    if start and end and start > end:
+        raise ValidationError({"error": "'from' must be on or before 'to'"})
+
+    return start, end
+
+
+def parse_year_month(params, today=None):
+    """Read ?year=YYYY&month=M, defaulting to the current month."""
+    today = today or date.today()
+
+    try:
+        year = int(params.get("year") or today.year)
+        month = int(params.get("month") or today.month)
+    except ValueError:
+        raise ValidationError({"error": "year and month must be integers"})
+
+    if not 1 <= month <= 12 or not 1 <= year <= 9999:
+        raise ValidationError({"error": "Invalid year / month"})
+
+    return year, month
+
+
+def parse_month(value, name="month"):
+    """(year, month) from "YYYY-MM"."""
+    try:
+        year, month = (int(part) for part in str(value).split("-"))
+    except ValueError:
+        raise ValidationError({"error": f"{name} must be YYYY-MM"})
+
+    if not 1 <= month <= 12 or not 1 <= year <= 9999:
+        raise ValidationError({"error": f"{name} must be YYYY-MM"})
+
+    return year, month
+
+
+def date_range_filter(start, end, field="date"):
+    """kwargs for .filter() restricting field to the inclusive range."""
+    lookups = {}
+    if start:
+        lookups[f"{field}__gte"] = start
+    if end:
+        lookups[f"{field}__lte"] = end
+    return lookups
+
+
+TRANSACTION_TYPES = ("Income", "Expense")
+
+# ?sort= value -> (field, descending); every order is served by an index
+SORTS = {
+    "-date": ("date", True),
+    "date": ("date", False),
+    "-amount": ("amount", True),
+    "amount": ("amount", False),
+}
+
+ID_FILTERS = ("category", "subcategory", "payment_method", "income_type")
+
+# primary keys are signed 64-bit; larger values overflow the database driver
+MAX_ID = 2 ** 63 - 1
+
+
+def _parse_id(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        pk = int(value)
+    except ValueError:
+        pk = None
+    if pk is None or not 1 <= pk <= MAX_ID:
+        raise ValidationError({"error": f"'{name}' must be an integer id"})
+    return pk
+
+
+def _parse_amount(params, name):
+    value = params.get(name)
+    if not value:
+        return None
+    try:
+        amount = Decimal(value)
+    except InvalidOperation:
+        amount = None
+    if amount is None or not amount.is_finite():
+        raise ValidationError({"error": f"'{name}' must be a number"})
+    return amount
+
+
+def parse_sort(params):
+    """?sort=-date|date|-amount|amount -> (field, descending), newest first by default."""
+    sort = params.get("sort") or "-date"
+    if sort not in SORTS:
+        raise ValidationError({"error": f"sort must be one of: {', '.join(SORTS)}"})
+    return SORTS[sort]
+
+
+def filter_expenses(queryset, params):
+    """
+    Apply the list / export filters to an Expense queryset:
+
+    ?from=&to= or ?period=         date range
+    ?transaction_type=             Income | Expense
+    ?category= ?subcategory=
+    ?payment_method= ?income_type= ids
+    ?min_amount= ?max_amount=      inclusive amount range
+    """
+    start, end = parse_date_range(params)
+    queryset = queryset.filter(**date_range_filter(start, end))
+
+    transaction_type = params.get("transaction_type")
+    if transaction_type:
+        if transaction_type not in TRANSACTION_TYPES:
+            raise ValidationError({"error": "Invalid type (Income / Expense only)"})
+        queryset = queryset.filter(transaction_type=transaction_type)
+
+    for name in ID_FILTERS:
+        pk = _parse_id(params, name)
+        if pk is not None:
+            queryset = queryset.filter(**{f"{name}_id": pk})
+
+    min_amount = _parse_amount(params, "min_amount")
+    if min_amount is not None:
+        queryset = queryset.filter(amount__gte=min_amount)
+
+    max_amount = _parse_amount(params, "max_amount")
+    if max_amount is not None:
+        queryset = queryset.filter(amount__lte=max_amount)
+
+    return queryset
@@ -0,0 +1,163 @@
+"""
+Month-end spend forecast per budgeted category.
+
+One grouped query returns the daily spend of every budgeted category
+over the target month and the trailing months before it; the rest is a
+single pass that lays those totals out as one array of days per
+(category, month) and projects each category from them:
+
+    forecast = spent so far
+               + w       * run-rate spend for the days left
+               + (1 - w) * what the trailing months spent after this point
+
+where w is the share of the month already elapsed, so early in the
+month the forecast leans on the category's usual curve (rent on the
+1st, a weekly shop) and late in the month on what has actually been
+spent. "This point" is the same fraction of each trailing month, so
+months of different length line up.
+"""
+
+import calendar
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.db.models import Sum
+from rest_framework.exceptions import ValidationError
+
+from .filters import add_months
+from .models import Expense
+
+HISTORY_MONTHS = 3
+MAX_HISTORY_MONTHS = 12
+
+CENTS = Decimal("0.01")
+
+
+def parse_history(params):
+    """Read ?history=N, the number of trailing months to learn from."""
+    try:
+        history = int(params.get("history") or HISTORY_MONTHS)
+    except ValueError:
+        raise ValidationError({"error": "history must be an integer"})
+
+    if not 0 <= history <= MAX_HISTORY_MONTHS:
+        raise ValidationError({"error": f"history must be between 0 and {MAX_HISTORY_MONTHS}"})
+
+    return history
+
+
+def days_in(year, month):
+    return calendar.monthrange(year, month)[1]
+
+
+def daily_spend(user, category_ids, start, end):
+    """(category_id, date, total) Expense rows per day, one grouped query."""
+    return (
+        Expense.objects.filter(
+            user=user,
+            transaction_type="Expense",
+            category_id__in=category_ids,
+            date__gte=start,
+            date__lte=end,
+        )
+        .values("category_id", "date")
+        .annotate(total=Sum("amount"))
+        .order_by()
+        .values_list("category_id", "date", "total")
+    )
+
+
+def project(spent, elapsed, days, history):
+    """
+    Month-end spend for a category that spent `spent` in the first
+    `elapsed` of `days` days. history: (spent by the same point, month
+    total) for each trailing month the category had any spend in.
+    """
+    if elapsed >= days:
+        return spent
+
+    run_rate = spent / elapsed * (days - elapsed) if elapsed else None
+    usual = sum(total - by_now for by_now, total in history) / len(history) if history else None
+
+    if usual is None:
+        return spent + (run_rate or 0)
+    if run_rate is None:
+        return spent + usual
+    weight = Decimal(elapsed) / days
+    return spent + weight * run_rate + (1 - weight) * usual
+
+
+def build_forecast(user, budgets, year, month, history=HISTORY_MONTHS, today=None):
+    """budgets: the month's CategoryBudget rows, with category loaded."""
+    today = today or date.today()
+    days = days_in(year, month)
+    first = date(year, month, 1)
+    last = first + timedelta(days=days - 1)
+
+    if today > last:
+        elapsed = days
+    elif today < first:
+        elapsed = 0
+    else:
+        elapsed = today.day
+
+    # trailing months that are over by today (a month in progress
+    # would understate its own total)
+    months = [add_months(year, month, -offset) for offset in range(history, 0, -1)]
+    months = [(y, m) for y, m in months if date(y, m, days_in(y, m)) < today]
+
+    budgets = list(budgets)
+    category_ids = [budget.category_id for budget in budgets]
+    start = date(*months[0], 1) if months else first
+    end = first + timedelta(days=elapsed - 1)
+
+    # {(category_id, year, month): [spend per day of the month]}
+    daily = {}
+    if end >= start:
+        for category_id, day, total in daily_spend(user, category_ids, start, end):
+            key = (category_id, day.year, day.month)
+            if key not in daily:
+                daily[key] = [Decimal("0")] * days_in(day.year, day.month)
+            daily[key][day.day - 1] += total
+
+    result = []
+    for budget in budgets:
+        current = daily.get((budget.category_id, year, month))
+        spent = sum(current) if current else Decimal("0")
+
+        trailing = []
+        for y, m in months:
+            values = daily.get((budget.category_id, y, m))
+            if values is None:
+                continue
+            cumulative = list(accumulate(values))
+            point = round(elapsed * len(values) / days)
+            trailing.append((cumulative[point - 1] if point else Decimal("0"), cumulative[-1]))
+
+        forecast = project(spent, elapsed, days, trailing).quantize(CENTS)
+        limit = budget.monthly_limit
+
+        result.append({
+            "id": budget.id,
+            "category": {
+                "id": budget.category.id,
+                "name": budget.category.name
+            },
+            "budget": limit,
+            "spent": spent,
+            "daily_run_rate": (spent / elapsed).quantize(CENTS) if elapsed else None,
+            "forecast": forecast,
+            "projected_remaining": limit - forecast,
+            "projected_percent_used": round(forecast / limit * 100, 2) if limit > 0 else None,
+            "will_exceed": forecast > limit,
+            "history_months": len(trailing),
+        })
+
+    return {
+        "year": year,
+        "month": month,
+        "days_in_month": days,
+        "days_elapsed": elapsed,
+        "budgets": result,
+    }
@@ -0,0 +1,164 @@
+"""
+Bulk expense import from an uploaded CSV or NDJSON file.
+
+Rows are read one line at a time, validated with the same rules as
+ExpenseSerializer, and inserted with bulk_create in chunks, one
+transaction per chunk. Invalid rows are reported back by row number and
+never abort the rest of the file.
+"""
+
+import csv
+import json
+
+from django.db import transaction
+
+from .models import Expense
+from .reference_cache import get_reference_data
+from .serializers import ExpenseSerializer
+
+CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+FORMATS = {
+    ".csv": "csv",
+    ".ndjson": "ndjson",
+    ".jsonl": "ndjson",
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+
+class BadRow:
+    """Stands in for a row that could not be read at all."""
+
+    def __init__(self, error):
+        self.error = error
+
+
+NOT_UTF8 = BadRow("Row is not valid UTF-8")
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+def detect_format(upload):
+    name = (upload.name or "").lower()
+    for suffix, kind in FORMATS.items():
+        if suffix.startswith(".") and name.endswith(suffix):
+            return kind
+
+    content_type = (upload.content_type or "").split(";")[0].strip()
+    if content_type in FORMATS:
+        return FORMATS[content_type]
+
+    raise ImportFormatError("Unsupported file type (use .csv or .ndjson)")
+
+
+def _lines(upload):
+    # bytes that are not UTF-8 come through as lone surrogates, so the
+    # rows holding them can be rejected without failing the whole file
+    for line in upload:
+        yield line.decode("utf-8-sig", "surrogateescape")
+
+
+def _is_utf8(text):
+    try:
+        text.encode("utf-8")
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def _csv_rows(upload):
+    reader = csv.DictReader(_lines(upload))
+    while True:
+        # a malformed row (say, a field over csv.field_size_limit()) is
+        # reported like any other bad row; the reader carries on with
+        # the next line
+        try:
+            row = next(reader)
+        except StopIteration:
+            return
+        except csv.Error as exc:
+            yield BadRow(f"Malformed CSV row: {exc}")
+            continue
+
+        # empty cells mean "not given"
+        row = {key: value for key, value in row.items() if key and value not in ("", None)}
+        if all(_is_utf8(key) and _is_utf8(value) for key, value in row.items()):
+            yield row
+        else:
+            yield NOT_UTF8
+
+
+def _ndjson_rows(upload):
+    for line in _lines(upload):
+        line = line.strip()
+        if not line:
+            continue
+        if not _is_utf8(line):
+            yield NOT_UTF8
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _flush(batch):
+    if not batch:
+        return 0
+    with transaction.atomic():
+        Expense.objects.bulk_create(batch)
+    return len(batch)
+
+
+def import_expenses(upload, user):
+    kind = detect_format(upload)
+    rows = _csv_rows(upload) if kind == "csv" else _ndjson_rows(upload)
+
+    lookup = get_reference_data()
+    batch = []
+    created = 0
+    failed = 0
+    errors = []
+
+    def reject(row_number, row_errors):
+        nonlocal failed
+        failed += 1
+        if len(errors) < MAX_REPORTED_ERRORS:
+            errors.append({"row": row_number, "errors": row_errors})
+
+    for row_number, row in enumerate(rows, start=1):
+        if isinstance(row, BadRow):
+            reject(row_number, {"error": row.error})
+            continue
+        if not isinstance(row, dict):
+            reject(row_number, {"error": "Row is not a JSON object"})
+            continue
+
+        serializer = ExpenseSerializer(data=row)
+        if not serializer.is_valid():
+            reject(row_number, serializer.errors)
+            continue
+
+        values, row_errors = lookup.resolve(serializer.validated_data)
+        if row_errors:
+            reject(row_number, row_errors)
+            continue
+
+        batch.append(Expense(user=user, created_by=user, **values))
+
+        if len(batch) >= CHUNK_SIZE:
+            created += _flush(batch)
+            batch = []
+
+    created += _flush(batch)
+
+    return {
+        "created": created,
+        "failed": failed,
+        "errors": errors,
+    }
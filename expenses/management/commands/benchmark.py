@@ -0,0 +1,97 @@
+import json
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses.benchmarks import BenchmarkRunner, build_scenarios, compare, run_compression, run_serializers
+from expenses.management.commands.seed_data import DEFAULT_PASSWORD
+
+
+class Command(BaseCommand):
+    help = "Benchmark every API route through the test client and write a JSON report."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", default="seed_user_0", help="Username to run as (default seed_user_0).")
+        parser.add_argument("--password", default=DEFAULT_PASSWORD, help="The user's password, for the login scenario.")
+        parser.add_argument("--iterations", type=int, default=20, help="Timed requests per scenario (default 20).")
+        parser.add_argument("--warmup", type=int, default=2, help="Untimed requests per scenario first (default 2).")
+        parser.add_argument("--only", action="append", help="Scenario name prefix to run (repeatable).")
+        parser.add_argument("--output", default="benchmark.json", help="Report path (default benchmark.json).")
+        parser.add_argument("--compare", help="Earlier report to compare this run with.")
+        parser.add_argument(
+            "--serializer-rows", type=int, default=0,
+            help="Also time serializing this many expense rows: serializer, projection, columnar (default off).",
+        )
+        parser.add_argument(
+            "--compression", action="store_true",
+            help="Also measure bytes on the wire and CPU per request for each Content-Encoding.",
+        )
+
+    def handle(self, *args, **options):
+        if options["iterations"] < 1 or options["warmup"] < 0:
+            raise CommandError("--iterations must be at least 1 and --warmup not negative")
+
+        try:
+            user = User.objects.get(username=options["user"])
+        except User.DoesNotExist:
+            raise CommandError(f"Unknown user {options['user']!r} (run seed_data first?)")
+
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = json.loads(Path(options["compare"]).read_text())
+            except (OSError, ValueError) as exc:
+                raise CommandError(f"Cannot read {options['compare']}: {exc}")
+
+        scenarios = build_scenarios(user, options["password"])
+        if options["only"]:
+            scenarios = [s for s in scenarios if any(s.name.startswith(prefix) for prefix in options["only"])]
+            if not scenarios:
+                raise CommandError("No scenario matches --only")
+
+        report = BenchmarkRunner(user, options["iterations"], options["warmup"]).run(scenarios)
+        if options["serializer_rows"] > 0:
+            report["serializers"] = run_serializers(user, options["serializer_rows"])
+        if options["compression"]:
+            report["compression"] = run_compression(user, options["iterations"])
+        Path(options["output"]).write_text(json.dumps(report, indent=2) + "\n")
+
+        self.stdout.write(f"{'scenario':32} {'status':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8} {'peak KiB':>9}")
+        for name, result in report["scenarios"].items():
+            status = ",".join(str(code) for code in result["status"])
+            self.stdout.write(
+                f"{name:32} {status:>8} {result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} "
+                f"{result['p99_ms']:>9.2f} {result['queries']:>8} {result['peak_memory_kib']:>9.1f}"
+            )
+
+        if "serializers" in report:
+            result = report["serializers"]
+            self.stdout.write("")
+            self.stdout.write(f"Serializing {result['rows']} rows (orjson: {result['orjson']}):")
+            for name in ("serializer", "projection", "columnar"):
+                path = result[name]
+                self.stdout.write(
+                    f"  {name:12} {path['rows_per_second']:>10} rows/s {path['ms']:>9.2f} ms "
+                    f"{path['bytes']:>10} bytes {path['parse_ms']:>9.2f} ms parse"
+                )
+
+        if "compression" in report:
+            self.stdout.write("")
+            self.stdout.write(
+                f"{'compression':32} {'accept':>8} {'sent':>8} {'bytes':>10} {'ratio':>6} {'cpu ms':>8} {'cost ms':>8}"
+            )
+            for name, result in report["compression"]["scenarios"].items():
+                for encoding, row in result.items():
+                    self.stdout.write(
+                        f"{name:32} {encoding:>8} {row['content_encoding']:>8} {row['bytes']:>10} {row.get('ratio', 1):>6} "
+                        f"{row['cpu_ms']:>8.2f} {row.get('cost_ms', 0):>8.2f}"
+                    )
+
+        if baseline is not None:
+            self.stdout.write("")
+            self.stdout.write(f"Compared with {options['compare']}:")
+            for name, key, before, after, change in compare(baseline, report):
+                self.stdout.write(f"  {name:32} {key:16} {before:>10} -> {after:<10} ({change:+.1f}%)")
+
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
@@ -0,0 +1,77 @@
+import json
+import os
+import subprocess
+import sys
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from expenses.benchmarks import run_concurrency
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure mixed read/write throughput from concurrent worker processes against the configured database. "
+        "With --profiles, run once per DJANGO_DB_PROFILE and compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", default="seed_user_0", help="Username to run as (default seed_user_0).")
+        parser.add_argument("--workers", type=int, default=8, help="Concurrent worker processes (default 8).")
+        parser.add_argument("--seconds", type=float, default=10.0, help="Duration of the run (default 10).")
+        parser.add_argument("--write-ratio", type=float, default=0.3, help="Share of requests that write (default 0.3).")
+        parser.add_argument("--profiles", nargs="+", help="Run once per database profile, e.g. --profiles default production.")
+        parser.add_argument("--json", action="store_true", help="Print the result as JSON only.")
+
+    def handle(self, *args, **options):
+        if options["workers"] < 1 or options["seconds"] <= 0 or not 0 <= options["write_ratio"] <= 1:
+            raise CommandError("--workers must be >= 1, --seconds > 0 and --write-ratio within 0..1")
+
+        if options["profiles"]:
+            results = [self.run_profile(profile, options) for profile in options["profiles"]]
+        else:
+            try:
+                user = User.objects.get(username=options["user"])
+            except User.DoesNotExist:
+                raise CommandError(f"Unknown user {options['user']!r} (run seed_data first?)")
+            results = [run_concurrency(user, options["workers"], options["seconds"], options["write_ratio"])]
+
+        if options["json"]:
+            self.stdout.write(json.dumps(results[0] if len(results) == 1 else results))
+            return
+
+        self.stdout.write(
+            f"{'profile':12} {'journal':8} {'ops/s':>8} {'reads/s':>8} {'writes/s':>9} "
+            f"{'locked':>7} {'errors':>7} {'read p95':>9} {'write p95':>10}"
+        )
+        for result in results:
+            read_p95 = (result["read_latency"] or {}).get("p95_ms", 0)
+            write_p95 = (result["write_latency"] or {}).get("p95_ms", 0)
+            self.stdout.write(
+                f"{result['db_profile']:12} {result['journal_mode'] or '-':8} {result['ops_per_second']:>8} "
+                f"{result['reads_per_second']:>8} {result['writes_per_second']:>9} {result['locked_errors']:>7} "
+                f"{result['other_errors']:>7} {read_p95:>9.2f} {write_p95:>10.2f}"
+            )
+
+    def run_profile(self, profile, options):
+        # The journal mode is stored in the database file, so a WAL run would
+        # leak into a later run of the stock profile; start that one from
+        # the default rollback journal
+        if profile == "default" and connection.vendor == "sqlite":
+            with connection.cursor() as cursor:
+                cursor.execute("PRAGMA journal_mode=DELETE")
+        connection.close()
+
+        command = [
+            sys.executable, sys.argv[0], "benchmark_concurrency", "--json",
+            "--user", options["user"],
+            "--workers", str(options["workers"]),
+            "--seconds", str(options["seconds"]),
+            "--write-ratio", str(options["write_ratio"]),
+        ]
+        env = dict(os.environ, DJANGO_DB_PROFILE=profile)
+        completed = subprocess.run(command, env=env, capture_output=True, text=True)
+        if completed.returncode != 0:
+            raise CommandError(f"Profile {profile!r} failed:\n{completed.stderr}")
+        return json.loads(completed.stdout)
@@ -0,0 +1,43 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from expenses import rollups
+
+
+class Command(BaseCommand):
+    help = "Backfill the monthly expense rollups from raw Expense rows, or verify them."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            action="store_true",
+            help="Only compare the rollups with the raw rows; exit non-zero on mismatch.",
+        )
+        parser.add_argument(
+            "--user",
+            action="append",
+            dest="users",
+            help="Username to limit the run to (repeatable). Default: all users.",
+        )
+
+    def handle(self, *args, **options):
+        users = None
+        if options["users"]:
+            users = list(User.objects.filter(username__in=options["users"]))
+            missing = set(options["users"]) - {user.username for user in users}
+            if missing:
+                raise CommandError(f"Unknown user(s): {', '.join(sorted(missing))}")
+
+        if options["verify"]:
+            mismatches = rollups.verify(users)
+            for key, expected, actual in mismatches:
+                self.stderr.write(
+                    f"{dict(zip(rollups.KEY_FIELDS, key))}: expected {expected}, found {actual}"
+                )
+            if mismatches:
+                raise CommandError(f"{len(mismatches)} rollup row(s) out of date")
+            self.stdout.write(self.style.SUCCESS("Rollups match raw expenses"))
+            return
+
+        written = rollups.rebuild(users)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} rollup row(s)"))
@@ -0,0 +1,211 @@
+import math
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from expenses import versioning
+from expenses.models import Category, SubCategory, PaymentMethod, IncomeType, Expense, CategoryBudget
+
+# (category, icon, typical amount, subcategories); earlier entries are
+# picked more often (Zipf-like weights)
+CATALOG = [
+    ("Food", "🍔", 25, ["Groceries", "Restaurants", "Coffee", "Delivery"]),
+    ("Transport", "🚌", 15, ["Fuel", "Taxi", "Transit", "Parking"]),
+    ("Shopping", "🛍️", 60, ["Clothes", "Electronics", "Home", "Gifts"]),
+    ("Bills", "🧾", 80, ["Electricity", "Water", "Internet", "Phone"]),
+    ("Entertainment", "🎬", 30, ["Movies", "Streaming", "Games", "Concerts"]),
+    ("Health", "💊", 45, ["Pharmacy", "Doctor", "Gym", "Dental"]),
+    ("Travel", "✈️", 250, ["Flights", "Hotels", "Car Rental", "Tours"]),
+    ("Housing", "🏠", 900, ["Rent", "Repairs", "Furniture", "Insurance"]),
+    ("Education", "📚", 70, ["Books", "Courses", "Tuition", "Supplies"]),
+]
+
+PAYMENT_METHODS = [("Card", 0.55), ("Cash", 0.25), ("UPI", 0.15), ("Bank Transfer", 0.05)]
+INCOME_TYPES = ["Salary", "Freelance", "Interest"]
+
+DEFAULT_PASSWORD = "seed-password"
+
+
+def month_starts(months, today):
+    first = today.replace(day=1)
+    starts = []
+    for _ in range(months):
+        starts.append(first)
+        first = (first - timedelta(days=1)).replace(day=1)
+    return starts[::-1]
+
+
+class Command(BaseCommand):
+    help = "Seed users, reference data, budgets and expenses with realistic distributions (bulk inserts)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10, help="Users to create (default 10).")
+        parser.add_argument("--expenses", type=int, default=100_000, help="Expense rows in total, over all users (default 100000).")
+        parser.add_argument("--categories", type=int, default=len(CATALOG), help=f"Categories (default {len(CATALOG)}).")
+        parser.add_argument("--subcategories", type=int, default=4, help="Subcategories per category (default 4).")
+        parser.add_argument("--months", type=int, default=24, help="Months of history, ending this month (default 24).")
+        parser.add_argument("--prefix", default="seed", help="Username prefix (default 'seed').")
+        parser.add_argument("--password", default=DEFAULT_PASSWORD, help="Password for the seeded users.")
+        parser.add_argument("--batch-size", type=int, default=5000, help="Rows per INSERT batch (default 5000).")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed, for reproducible data (default 42).")
+
+    def handle(self, *args, **options):
+        for name in ("users", "categories", "subcategories", "months", "batch_size"):
+            if options[name] < 1:
+                raise CommandError(f"--{name.replace('_', '-')} must be at least 1")
+        if options["expenses"] < 0:
+            raise CommandError("--expenses must not be negative")
+
+        self.random = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+
+        categories = self.seed_reference_data(options["categories"], options["subcategories"])
+        users = self.seed_users(options["users"], options["prefix"], options["password"])
+        months = month_starts(options["months"], date.today())
+
+        per_user, extra = divmod(options["expenses"], len(users))
+        created = 0
+        for index, user in enumerate(users):
+            with transaction.atomic():
+                self.seed_budgets(user, categories, months)
+                created += self.seed_expenses(user, categories, months, per_user + (index < extra))
+            self.stdout.write(f"{user.username}: done ({created} rows so far)")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Seeded {len(users)} user(s), {len(categories)} categories and {created} expense row(s)"
+        ))
+
+    # ---- reference data ----
+
+    def seed_reference_data(self, category_count, subcategory_count):
+        catalog = []
+        for index in range(category_count):
+            if index < len(CATALOG):
+                name, icon, typical, subs = CATALOG[index]
+            else:
+                name, icon, typical, subs = f"Category {index + 1}", "❔", 40, []
+            subs = (subs + [f"{name} {i + 1}" for i in range(len(subs), subcategory_count)])[:subcategory_count]
+            catalog.append((name, icon, typical, subs))
+
+        Category.objects.bulk_create(
+            [Category(name=name, icon=icon) for name, icon, _, _ in catalog], ignore_conflicts=True
+        )
+        by_name = Category.objects.in_bulk([name for name, _, _, _ in catalog], field_name="name")
+
+        SubCategory.objects.bulk_create(
+            [SubCategory(category=by_name[name], name=sub) for name, _, _, subs in catalog for sub in subs],
+            ignore_conflicts=True,
+        )
+        PaymentMethod.objects.bulk_create(
+            [PaymentMethod(name=name) for name, _ in PAYMENT_METHODS], ignore_conflicts=True
+        )
+        IncomeType.objects.bulk_create([IncomeType(name=name) for name in INCOME_TYPES], ignore_conflicts=True)
+
+        # bulk_create skips the signals that normally invalidate the cache
+        versioning.bump(versioning.REFERENCE)
+
+        subs_by_category = {}
+        for sub in SubCategory.objects.filter(category__in=by_name.values()):
+            subs_by_category.setdefault(sub.category_id, []).append(sub)
+
+        self.payment_methods = list(PaymentMethod.objects.filter(name__in=[name for name, _ in PAYMENT_METHODS]).order_by("id"))
+        self.payment_weights = [dict(PAYMENT_METHODS)[method.name] for method in self.payment_methods]
+        self.payment_by_name = {method.name: method for method in self.payment_methods}
+        self.income_types = {obj.name: obj for obj in IncomeType.objects.filter(name__in=INCOME_TYPES)}
+
+        return [
+            (by_name[name], subs_by_category.get(by_name[name].id, []), typical)
+            for name, _, typical, _ in catalog
+        ]
+
+    def seed_users(self, count, prefix, password):
+        hashed = make_password(password)
+        names = [f"{prefix}_user_{i}" for i in range(count)]
+        User.objects.bulk_create(
+            [User(username=name, email=f"{name}@example.com", password=hashed) for name in names],
+            ignore_conflicts=True,
+        )
+        return list(User.objects.filter(username__in=names).order_by("id"))
+
+    # ---- per-user data ----
+
+    def seed_budgets(self, user, categories, months):
+        # budgets for most categories; the rest stay unbudgeted as in real data
+        budgeted = categories[: max(1, math.ceil(len(categories) * 0.7))]
+        CategoryBudget.objects.bulk_create(
+            [
+                CategoryBudget(
+                    user=user,
+                    category=category,
+                    year=month.year,
+                    month=month.month,
+                    monthly_limit=Decimal(max(50, round(typical * 8 * self.random.uniform(0.8, 1.5), -1))),
+                )
+                for month in months
+                for category, _, typical in budgeted
+            ],
+            ignore_conflicts=True,
+            batch_size=self.batch_size,
+        )
+        versioning.bump_users([user.id])
+
+    def seed_expenses(self, user, categories, months, count):
+        category_weights = [1 / (rank + 1) for rank in range(len(categories))]
+        today = date.today()
+        batch = []
+        created = 0
+
+        def flush():
+            nonlocal batch, created
+            Expense.objects.bulk_create(batch)
+            created += len(batch)
+            batch = []
+
+        # rows are generated month by month so each batch touches few rollup keys
+        per_month, extra = divmod(count, len(months))
+        for index, first in enumerate(months):
+            last = (first.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+            last = min(last, today)
+            days = (last - first).days + 1
+
+            if "Salary" in self.income_types:
+                batch.append(self.income(user, first, "Salary", self.random.randint(3000, 6000)))
+
+            for _ in range(per_month + (index < extra)):
+                category, subs, typical = self.random.choices(categories, category_weights)[0]
+                # spending is right-skewed: lognormal around the typical amount
+                amount = max(0.5, self.random.lognormvariate(math.log(typical), 0.7))
+                batch.append(Expense(
+                    user=user,
+                    created_by=user,
+                    transaction_type="Expense",
+                    category=category,
+                    subcategory=self.random.choice(subs) if subs else None,
+                    payment_method=self.random.choices(self.payment_methods, self.payment_weights)[0],
+                    amount=Decimal(f"{amount:.2f}"),
+                    date=first + timedelta(days=self.random.randrange(days)),
+                    description="",
+                ))
+                if len(batch) >= self.batch_size:
+                    flush()
+
+        if batch:
+            flush()
+        return created
+
+    def income(self, user, day, kind, amount):
+        return Expense(
+            user=user,
+            created_by=user,
+            transaction_type="Income",
+            income_type=self.income_types[kind],
+            payment_method=self.payment_by_name.get("Bank Transfer"),
+            amount=Decimal(amount),
+            date=day,
+            description="",
+        )
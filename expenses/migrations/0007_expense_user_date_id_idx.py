@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 03:57
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0006_expense_subcategory'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', '-date', '-id'], name='expense_user_date_id_idx'),
+        ),
+    ]
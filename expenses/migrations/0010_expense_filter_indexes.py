@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 04:09
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('expenses', '0009_dataversion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'transaction_type', '-date', '-id'], name='expense_user_type_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'category', '-date', '-id'], name='expense_user_cat_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'subcategory', '-date', '-id'], name='expense_user_subcat_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'payment_method', '-date', '-id'], name='expense_user_pay_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', 'income_type', '-date', '-id'], name='expense_user_inc_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='expense',
+            index=models.Index(fields=['user', '-amount', '-id'], name='expense_user_amount_id_idx'),
+        ),
+    ]
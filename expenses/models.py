@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
 
 # Create your models here.
@@ -32,6 +32,61 @@ class IncomeType(models.Model):
 
 
 
+class ExpenseQuerySet(models.QuerySet):
+
+    def with_related(self):
+        # Everything ExpenseSerializer nests, joined in the same query
+        return self.select_related(
+            "category",
+            "subcategory__category",
+            "payment_method",
+            "income_type",
+            "created_by",
+        )
+
+    # Bulk writes bypass Expense.save()/delete() and their signals, so they
+    # keep the monthly rollups (see expenses/rollups.py) and the per-user
+    # data versions in step themselves.
+    # bulk_update() goes through update() and is covered by it.
+
+    def bulk_create(self, objs, *args, **kwargs):
+        from . import rollups, versioning
+
+        objs = list(objs)
+        with transaction.atomic(using=self.db):
+            created = super().bulk_create(objs, *args, **kwargs)
+            rollups.apply_deltas(rollups.collect(created))
+            versioning.bump_users(obj.user_id for obj in created)
+        return created
+
+    def update(self, **kwargs):
+        from . import rollups, versioning
+
+        with transaction.atomic(using=self.db):
+            pks = list(self.values_list("pk", flat=True))
+            deltas = rollups.aggregate(self.model.objects.filter(pk__in=pks), sign=-1)
+            updated = super().update(**kwargs)
+            rollups.aggregate(self.model.objects.filter(pk__in=pks), deltas=deltas)
+            rollups.apply_deltas(deltas)
+            versioning.bump_users(key[0] for key in deltas)
+        return updated
+
+    update.alters_data = True
+
+    def delete(self):
+        from . import rollups, versioning
+
+        with transaction.atomic(using=self.db):
+            deltas = rollups.aggregate(self, sign=-1)
+            deleted = super().delete()
+            rollups.apply_deltas(deltas)
+            versioning.bump_users(key[0] for key in deltas)
+        return deleted
+
+    delete.alters_data = True
+    delete.queryset_only = True
+
+
 class Expense(models.Model):
 
     TRANSACTION_CHOICES = (
@@ -89,9 +144,65 @@ class Expense(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ExpenseQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Keyset pagination of the expense list: (user, date, id) seeks
+            models.Index(fields=["user", "-date", "-id"], name="expense_user_date_id_idx"),
+
+            # One per list filter / sort, so each is an index range read
+            # that also yields rows in date order (see expenses/filters.py)
+            models.Index(fields=["user", "transaction_type", "-date", "-id"], name="expense_user_type_date_idx"),
+            models.Index(fields=["user", "category", "-date", "-id"], name="expense_user_cat_date_idx"),
+            models.Index(fields=["user", "subcategory", "-date", "-id"], name="expense_user_subcat_date_idx"),
+            models.Index(fields=["user", "payment_method", "-date", "-id"], name="expense_user_pay_date_idx"),
+            models.Index(fields=["user", "income_type", "-date", "-id"], name="expense_user_inc_date_idx"),
+            models.Index(fields=["user", "-amount", "-id"], name="expense_user_amount_id_idx"),
+        ]
+
     def __str__(self):
         return f"{self.category} - {self.amount}"
 
+    # Keep MonthlyRollup and the owner's data version in step with every
+    # single-row write.
+    # The row as it is stored is re-read (and locked) inside the write's
+    # transaction, so moves between months / categories / types take the
+    # amount out of the old rollup row and add it to the new one even
+    # when this instance is stale.
+
+    def save(self, *args, **kwargs):
+        from . import rollups, versioning
+
+        with transaction.atomic():
+            previous = rollups.snapshot_from_db(self.pk) if self.pk is not None else None
+
+            super().save(*args, **kwargs)
+
+            deltas = {}
+            if previous is not None:
+                rollups.add(deltas, *previous, sign=-1)
+            rollups.add(deltas, *rollups.snapshot(self))
+            rollups.apply_deltas(deltas)
+
+            versioning.bump_users({self.user_id, previous[0][0] if previous else self.user_id})
+
+    def delete(self, *args, **kwargs):
+        from . import rollups, versioning
+
+        with transaction.atomic():
+            previous = rollups.snapshot_from_db(self.pk)
+            deleted = super().delete(*args, **kwargs)
+
+            if previous is not None:
+                deltas = {}
+                rollups.add(deltas, *previous, sign=-1)
+                rollups.apply_deltas(deltas)
+
+            versioning.bump_users([self.user_id])
+
+        return deleted
+
 #  Category Budget
 
 class CategoryBudget(models.Model):
@@ -111,3 +222,49 @@ class CategoryBudget(models.Model):
 
     def __str__(self):
         return f"{self.category.name} - {self.month}/{self.year}"
+
+
+#  Monthly Rollup
+#  Pre-aggregated totals per (user, month, type, category, subcategory),
+#  maintained by Expense writes and read by the summary / budget APIs.
+
+class MonthlyRollup(models.Model):
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+
+    year = models.IntegerField()
+    month = models.IntegerField()  # 1–12
+
+    transaction_type = models.CharField(max_length=10, choices=Expense.TRANSACTION_CHOICES)
+
+    # SET_NULL like Expense, so deleting a category folds its totals into
+    # the "no category" bucket exactly as it does for the raw rows
+
+    category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True)
+    subcategory = models.ForeignKey(SubCategory, on_delete=models.SET_NULL, null=True, blank=True)
+
+    total = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["user", "year", "month"], name="rollup_user_year_month_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} {self.month}/{self.year} {self.transaction_type} - {self.total}"
+
+
+#  Data Version
+#  A counter per cache scope (e.g. "reference"), bumped on every write to
+#  the data it covers. Each worker process compares it with the version
+#  it last loaded to decide whether its in-memory copy is still fresh.
+
+class DataVersion(models.Model):
+
+    key = models.CharField(max_length=100, primary_key=True)
+    version = models.PositiveBigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.key} v{self.version}"
@@ -0,0 +1,144 @@
+import base64
+import json
+
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from .filters import MAX_ID
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+def _row_value(row, name):
+    # Rows may be model instances or values() dicts
+    if isinstance(row, dict):
+        return row[name]
+    return getattr(row, name)
+
+
+def encode_cursor(value, pk, direction):
+    raw = json.dumps([str(value), pk, direction]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        value, pk, direction = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError):
+        raise ValidationError({"error": "Invalid cursor"})
+
+    # encode_cursor() always writes the value as a string
+    valid = (
+        direction in ("next", "prev")
+        and isinstance(value, str)
+        and isinstance(pk, int) and not isinstance(pk, bool)
+        and -MAX_ID <= pk <= MAX_ID
+    )
+    if not valid:
+        raise ValidationError({"error": "Invalid cursor"})
+
+    return value, pk, direction
+
+
+def get_page_size(params):
+    page_size = params.get("page_size")
+    if page_size in (None, ""):
+        return DEFAULT_PAGE_SIZE
+
+    try:
+        page_size = int(page_size)
+    except ValueError:
+        raise ValidationError({"error": "page_size must be an integer"})
+
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValidationError({"error": f"page_size must be between 1 and {MAX_PAGE_SIZE}"})
+
+    return page_size
+
+
+class KeysetPaginator:
+    """
+    Cursor pagination keyed on (field, id).
+
+    Each page is a range read that starts right after the previous page's
+    last row, so page N costs the same as page 1 (no OFFSET scanning).
+    """
+
+    def __init__(self, field="date", descending=True, page_size=DEFAULT_PAGE_SIZE):
+        self.field = field
+        self.descending = descending
+        self.page_size = page_size
+
+    def _ordering(self, reverse=False):
+        descending = self.descending != reverse
+        prefix = "-" if descending else ""
+        return [f"{prefix}{self.field}", f"{prefix}id"]
+
+    def _seek(self, queryset, value, pk, forward):
+        # "forward" means further along the requested ordering
+        lower = self.descending == forward
+        op = "lt" if lower else "gt"
+
+        bound = Q(**{f"{self.field}__{op}e": value})
+        after = Q(**{f"{self.field}__{op}": value}) | Q(**{f"id__{op}": pk})
+        return queryset.filter(bound & after)
+
+    def _parse_value(self, queryset, value):
+        field = queryset.model._meta.get_field(self.field)
+        try:
+            return field.to_python(value)
+        except DjangoValidationError:
+            raise ValidationError({"error": "Invalid cursor"})
+
+    def page_query(self, queryset, cursor=None):
+        """
+        The query for one page (one row extra to detect a following page),
+        and the direction it reads in: "next", or "prev" for a page read
+        backwards from a prev cursor.
+        """
+        direction = "next"
+
+        if cursor:
+            value, pk, direction = decode_cursor(cursor)
+            value = self._parse_value(queryset, value)
+            queryset = self._seek(queryset, value, pk, forward=direction == "next")
+
+        ordering = self._ordering(reverse=direction == "prev")
+        return queryset.order_by(*ordering)[:self.page_size + 1], direction
+
+    def paginate(self, queryset, cursor=None):
+        page, direction = self.page_query(queryset, cursor)
+        return self._page(list(page), direction, cursor)
+
+    async def apaginate(self, queryset, cursor=None):
+        page, direction = self.page_query(queryset, cursor)
+        return self._page([row async for row in page], direction, cursor)
+
+    def _page(self, rows, direction, cursor):
+        """(rows, next_cursor, prev_cursor) from the rows one page query fetched."""
+        size = self.page_size
+
+        if direction == "prev":
+            has_prev = len(rows) > size
+            rows = rows[:size][::-1]
+            has_next = True
+        else:
+            has_next = len(rows) > size
+            rows = rows[:size]
+            has_prev = cursor is not None
+
+        next_cursor = None
+        prev_cursor = None
+
+        if rows and has_next:
+            last = rows[-1]
+            next_cursor = encode_cursor(_row_value(last, self.field), _row_value(last, "id"), "next")
+
+        if rows and has_prev:
+            first = rows[0]
+            prev_cursor = encode_cursor(_row_value(first, self.field), _row_value(first, "id"), "prev")
+
+        return rows, next_cursor, prev_cursor
@@ -0,0 +1,188 @@
+"""
+Read-only fast path for expense rows.
+
+expense_values() selects one flat values() projection (the related
+names come from the same joins with_related() uses) and expense_dict()
+assembles ExpenseSerializer's output shape from it with plain dict
+building, no serializer fields involved. The result is key-for-key and
+value-for-value what ExpenseSerializer(...).data returns, so rendered
+responses are byte-identical.
+
+expense_columns() is the compact alternative (?format=columnar): one
+array per field, foreign keys as ids, and each referenced category,
+subcategory, income type, payment method and user once in "refs".
+"""
+
+from django.utils import timezone
+
+FIELDS = (
+    "id",
+    "transaction_type",
+    "amount",
+    "date",
+    "description",
+    "created_at",
+    "category_id",
+    "category__name",
+    "category__icon",
+    "subcategory_id",
+    "subcategory__name",
+    "subcategory__icon",
+    "subcategory__category_id",
+    "subcategory__category__name",
+    "subcategory__category__icon",
+    "income_type_id",
+    "income_type__name",
+    "payment_method_id",
+    "payment_method__name",
+    "created_by_id",
+    "created_by__username",
+    "created_by__email",
+)
+
+
+def expense_values(queryset):
+    return queryset.values(*FIELDS)
+
+
+def _datetime(value):
+    # DRF DateTimeField: current time zone, ISO 8601, "Z" for UTC
+    if timezone.is_aware(value):
+        value = timezone.localtime(value)
+    else:
+        value = timezone.make_aware(value)
+    text = value.isoformat()
+    if text.endswith("+00:00"):
+        text = text[:-6] + "Z"
+    return text
+
+
+def expense_dict(row):
+    category_id = row["category_id"]
+    subcategory_id = row["subcategory_id"]
+    income_type_id = row["income_type_id"]
+    payment_method_id = row["payment_method_id"]
+    created_by_id = row["created_by_id"]
+    created_at = row["created_at"]
+
+    return {
+        "id": row["id"],
+        "transaction_type": row["transaction_type"],
+        # the column is DECIMAL(10, 2): already quantized by the backend
+        "amount": format(row["amount"], "f"),
+        "date": row["date"].isoformat(),
+        "description": row["description"],
+        "category_data": None if category_id is None else {
+            "id": category_id,
+            "name": row["category__name"],
+            "icon": row["category__icon"],
+        },
+        "subcategory_data": None if subcategory_id is None else {
+            "id": subcategory_id,
+            "name": row["subcategory__name"],
+            "icon": row["subcategory__icon"],
+            "category_data": {
+                "id": row["subcategory__category_id"],
+                "name": row["subcategory__category__name"],
+                "icon": row["subcategory__category__icon"],
+            },
+        },
+        "income_type_data": None if income_type_id is None else {
+            "id": income_type_id,
+            "name": row["income_type__name"],
+        },
+        "payment_method_data": None if payment_method_id is None else {
+            "id": payment_method_id,
+            "name": row["payment_method__name"],
+        },
+        "created_by": None if created_by_id is None else {
+            "id": created_by_id,
+            "username": row["created_by__username"],
+            "email": row["created_by__email"],
+        },
+        "created_at": None if created_at is None else _datetime(created_at),
+    }
+
+
+def expense_dicts(rows):
+    return [expense_dict(row) for row in rows]
+
+
+def expense_columns(rows):
+    """
+    {"columns": {field: [value per row]}, "refs": {kind: {id: object}}}
+
+    Values are formatted as in expense_dict(); foreign-key columns hold
+    ids (or null) that index the matching "refs" dictionary. JSON object
+    keys are strings, so refs are keyed by str(id).
+    """
+    columns = {
+        "id": [],
+        "transaction_type": [],
+        "amount": [],
+        "date": [],
+        "description": [],
+        "category": [],
+        "subcategory": [],
+        "income_type": [],
+        "payment_method": [],
+        "created_by": [],
+        "created_at": [],
+    }
+    # keyed by id while collecting, by str(id) in the output
+    categories, subcategories, income_types, payment_methods, users = {}, {}, {}, {}, {}
+
+    for row in rows:
+        category_id = row["category_id"]
+        subcategory_id = row["subcategory_id"]
+        income_type_id = row["income_type_id"]
+        payment_method_id = row["payment_method_id"]
+        created_by_id = row["created_by_id"]
+        created_at = row["created_at"]
+
+        columns["id"].append(row["id"])
+        columns["transaction_type"].append(row["transaction_type"])
+        columns["amount"].append(format(row["amount"], "f"))
+        columns["date"].append(row["date"].isoformat())
+        columns["description"].append(row["description"])
+        columns["category"].append(category_id)
+        columns["subcategory"].append(subcategory_id)
+        columns["income_type"].append(income_type_id)
+        columns["payment_method"].append(payment_method_id)
+        columns["created_by"].append(created_by_id)
+        columns["created_at"].append(None if created_at is None else _datetime(created_at))
+
+        if category_id is not None and category_id not in categories:
+            categories[category_id] = {"name": row["category__name"], "icon": row["category__icon"]}
+        if subcategory_id is not None and subcategory_id not in subcategories:
+            parent_id = row["subcategory__category_id"]
+            subcategories[subcategory_id] = {
+                "name": row["subcategory__name"],
+                "icon": row["subcategory__icon"],
+                "category": parent_id,
+            }
+            categories.setdefault(parent_id, {
+                "name": row["subcategory__category__name"],
+                "icon": row["subcategory__category__icon"],
+            })
+        if income_type_id is not None and income_type_id not in income_types:
+            income_types[income_type_id] = {"name": row["income_type__name"]}
+        if payment_method_id is not None and payment_method_id not in payment_methods:
+            payment_methods[payment_method_id] = {"name": row["payment_method__name"]}
+        if created_by_id is not None and created_by_id not in users:
+            users[created_by_id] = {
+                "username": row["created_by__username"],
+                "email": row["created_by__email"],
+            }
+
+    refs = {
+        kind: {str(key): value for key, value in objects.items()}
+        for kind, objects in (
+            ("category", categories),
+            ("subcategory", subcategories),
+            ("income_type", income_types),
+            ("payment_method", payment_methods),
+            ("user", users),
+        )
+    }
+    return {"columns": columns, "refs": refs}
@@ -0,0 +1,96 @@
+"""
+In-process cache of the reference tables: categories, subcategories,
+payment methods and income types.
+
+Each worker keeps one snapshot of all four tables. Every read checks the
+global "reference" version (one primary-key lookup) and reloads the
+whole snapshot when another process has written since it was taken.
+"""
+
+import threading
+
+from . import versioning
+from .models import Category, SubCategory, PaymentMethod, IncomeType
+
+_lock = threading.Lock()
+_snapshot = None
+
+
+class ReferenceData:
+
+    def __init__(self, stamp):
+        # serializers use this module for their lookups
+        from .serializers import (
+            CategorySerializer,
+            SubCategorySerializer,
+            PaymentMethodSerializer,
+            IncomeTypeSerializer,
+        )
+
+        self.stamp = stamp
+
+        categories = list(Category.objects.order_by("name"))
+        subcategories = list(SubCategory.objects.select_related("category").order_by("name"))
+        payment_methods = list(PaymentMethod.objects.order_by("name"))
+        income_types = list(IncomeType.objects.order_by("name"))
+
+        # id -> instance, used by the write paths
+        self.category = {obj.id: obj for obj in categories}
+        self.subcategory = {obj.id: obj for obj in subcategories}
+        self.payment_method = {obj.id: obj for obj in payment_methods}
+        self.income_type = {obj.id: obj for obj in income_types}
+
+        # serialized lists, ordered by name, used by the list endpoints
+        self.category_list = CategorySerializer(categories, many=True).data
+        self.subcategory_list = SubCategorySerializer(subcategories, many=True).data
+        self.payment_method_list = PaymentMethodSerializer(payment_methods, many=True).data
+        self.income_type_list = IncomeTypeSerializer(income_types, many=True).data
+
+    def subcategories_of(self, category_id):
+        return [sub for sub in self.subcategory_list if sub["category_data"]["id"] == category_id]
+
+    def resolve(self, validated_data):
+        """Swap the category / subcategory / income_type / payment_method ids
+        for instances; returns (values, errors)."""
+        values = dict(validated_data)
+        errors = {}
+
+        for field in ("category", "subcategory", "income_type", "payment_method"):
+            pk = values.pop(field, None)
+            if not pk:
+                values[field] = None
+                continue
+
+            obj = getattr(self, field).get(pk)
+            if obj is None:
+                errors[field] = [f"Invalid {field} id {pk}"]
+            values[field] = obj
+
+        return values, errors
+
+
+def get_reference_data(stamp=None):
+    """
+    The current snapshot. Pass the "reference" stamp when the caller has
+    already read it (see conditional.conditional_get) to skip the lookup.
+    """
+    global _snapshot
+
+    # read the stamp before loading, so a write that lands mid-load only
+    # causes one extra reload, never a stale snapshot
+    if stamp is None:
+        stamp = versioning.get_stamp(versioning.REFERENCE)
+
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.stamp == stamp:
+        return snapshot
+
+    with _lock:
+        if _snapshot is None or _snapshot.stamp != stamp:
+            _snapshot = ReferenceData(stamp)
+        return _snapshot
+
+
+def clear():
+    global _snapshot
+    _snapshot = None
@@ -0,0 +1,64 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # optional: FastJSONRenderer falls back to the stock encoder
+    orjson = None
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer on orjson when it is installed, with the same bytes out:
+    compact separators, raw UTF-8, and anything orjson does not handle
+    natively the DRF way (Decimal as a number, datetimes with "Z" and
+    millisecond precision, lazy strings, ...) through the DRF encoder.
+    Indented output (the browsable API) and a missing orjson take the
+    stock path.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or not self.compact or self.ensure_ascii or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data,
+            default=self.encoder_class().default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME,
+        )
+        # same strict-javascript-subset escaping as JSONRenderer
+        return ret.replace("\u2028".encode(), b"\\u2028").replace("\u2029".encode(), b"\\u2029")
+
+
+class ColumnarJSONRenderer(FastJSONRenderer):
+    """
+    ?format=columnar on the expense list: the view builds the columnar
+    body (projections.expense_columns), this only names the format.
+    """
+
+    media_type = "application/vnd.expenses.columnar+json"
+    format = "columnar"
+
+
+class _StreamFormatRenderer(BaseRenderer):
+    """
+    Lets ?format=csv / ?format=ndjson (or the Accept header) select an
+    export format. The export view streams its own body, so these only
+    ever render error payloads, which go out as JSON.
+    """
+
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return JSONRenderer().render(data)
+
+
+class CSVRenderer(_StreamFormatRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+
+class NDJSONRenderer(_StreamFormatRenderer):
+    media_type = "application/x-ndjson"
+    format = "ndjson"
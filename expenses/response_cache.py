@@ -0,0 +1,92 @@
+"""
+Per-user response cache for read endpoints.
+
+@cached_response goes under @conditional_get and keeps the view's
+response data in the cache named by RESPONSE_CACHE["ALIAS"]. The key is
+the request's ETag: path, query string, format, user, today's date and
+the versions of the user's rows and of the reference data. Every
+expense or budget write bumps the user's version (bulk paths included,
+see models.py, signals.py and budgets.py), so after a write, or after
+midnight, the user's requests map to new keys and old entries are never
+read again; they age out of the backend by TIMEOUT or LRU culling.
+
+A hit runs no queries beyond the version lookup conditional_get does
+anyway. Lookups are counted in metrics.RESPONSE_CACHE; a failing backend
+is counted as an error and the view runs as if the cache were empty.
+
+Settings (all optional):
+
+    RESPONSE_CACHE = {
+        "ENABLED": True,
+        "ALIAS": "responses",   # entry in CACHES
+        "TIMEOUT": 300,         # seconds
+    }
+"""
+
+import functools
+import logging
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.response import Response
+
+from expense_backend import metrics
+
+from .conditional import make_etag
+
+logger = logging.getLogger(__name__)
+
+DEFAULTS = {
+    "ENABLED": True,
+    "ALIAS": "responses",
+    "TIMEOUT": 300,
+}
+
+MISSING = object()
+
+
+def get_setting(name):
+    return getattr(settings, "RESPONSE_CACHE", {}).get(name, DEFAULTS[name])
+
+
+def cache_key(request):
+    return "response:" + make_etag(request, request.data_stamps).strip('"')
+
+
+def _count(request, result):
+    metrics.RESPONSE_CACHE.inc((("result", result), ("view", metrics.view_label(request))))
+
+
+def cached_response(method):
+
+    @functools.wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if not get_setting("ENABLED"):
+            return method(self, request, *args, **kwargs)
+
+        cache = caches[get_setting("ALIAS")]
+        key = cache_key(request)
+
+        try:
+            data = cache.get(key, MISSING)
+        except Exception:
+            logger.exception("Response cache lookup failed")
+            _count(request, "error")
+            return method(self, request, *args, **kwargs)
+
+        if data is not MISSING:
+            _count(request, "hit")
+            return Response(data)
+
+        _count(request, "miss")
+        response = method(self, request, *args, **kwargs)
+
+        if response.status_code == 200:
+            try:
+                cache.set(key, response.data, get_setting("TIMEOUT"))
+            except Exception:
+                logger.exception("Response cache store failed")
+
+        return response
+
+    return wrapper
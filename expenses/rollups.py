@@ -0,0 +1,248 @@
+"""
+Monthly rollups: running totals of Expense rows per
+(user, year, month, transaction_type, category, subcategory).
+
+Writes feed signed deltas in through apply_deltas(); the summary and
+budget endpoints read the rollups, so their cost grows with months x
+categories instead of with the number of transactions.
+"""
+
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+from django.db.models.functions import ExtractMonth, ExtractYear
+
+from .filters import date_range_filter, month_end
+from .models import Expense, MonthlyRollup
+
+# Fields an Expense must have loaded for its rollup key to be known
+TRACKED_FIELDS = frozenset(
+    ["user_id", "date", "transaction_type", "category_id", "subcategory_id", "amount"]
+)
+
+KEY_FIELDS = ("user_id", "year", "month", "transaction_type", "category_id", "subcategory_id")
+
+
+# ---- WRITE SIDE ----
+
+def snapshot(expense):
+    """(key, amount) for the rollup row this expense counts towards."""
+    day = Expense._meta.get_field("date").to_python(expense.date)
+    amount = Expense._meta.get_field("amount").to_python(expense.amount)
+    key = (
+        expense.user_id,
+        day.year,
+        day.month,
+        expense.transaction_type,
+        expense.category_id,
+        expense.subcategory_id,
+    )
+    return key, amount
+
+
+def snapshot_from_db(pk):
+    """snapshot() of the row as stored, locked until the transaction ends."""
+    row = Expense.objects.select_for_update().filter(pk=pk).only(*TRACKED_FIELDS).first()
+    return snapshot(row) if row is not None else None
+
+
+def add(deltas, key, amount, sign=1, count=1):
+    total, rows = deltas.get(key, (Decimal("0"), 0))
+    deltas[key] = (total + sign * amount, rows + sign * count)
+    return deltas
+
+
+def collect(expenses, sign=1, deltas=None):
+    """Deltas for a batch of in-memory expenses."""
+    deltas = {} if deltas is None else deltas
+    for expense in expenses:
+        add(deltas, *snapshot(expense), sign=sign)
+    return deltas
+
+
+def aggregate(queryset, sign=1, deltas=None):
+    """Deltas for every row of an Expense queryset, in one grouped query."""
+    deltas = {} if deltas is None else deltas
+    rows = (
+        queryset.annotate(_year=ExtractYear("date"), _month=ExtractMonth("date"))
+        .values("user_id", "_year", "_month", "transaction_type", "category_id", "subcategory_id")
+        .annotate(_total=Sum("amount"), _count=Count("id"))
+        .order_by()
+    )
+    for row in rows:
+        key = (
+            row["user_id"],
+            row["_year"],
+            row["_month"],
+            row["transaction_type"],
+            row["category_id"],
+            row["subcategory_id"],
+        )
+        add(deltas, key, row["_total"], sign=sign, count=row["_count"])
+    return deltas
+
+
+def apply_deltas(deltas):
+    """Add signed (total, count) deltas to their rollup rows."""
+    with transaction.atomic():
+        for key, (total, count) in deltas.items():
+            if not total and not count:
+                continue
+
+            lookup = dict(zip(KEY_FIELDS, key))
+
+            # Update a single row: after a category is deleted several rows
+            # can share a key, and they must not all receive the delta
+            target = MonthlyRollup.objects.filter(**lookup).values("pk")[:1]
+            updated = MonthlyRollup.objects.filter(pk__in=target).update(
+                total=F("total") + total,
+                count=F("count") + count,
+            )
+
+            if not updated:
+                MonthlyRollup.objects.create(total=total, count=count, **lookup)
+
+
+# ---- READ SIDE ----
+
+def is_month_aligned(start, end):
+    """True when [start, end] covers whole months, so rollups can answer it."""
+    starts_ok = start is None or start.day == 1
+    ends_ok = end is None or end == month_end(end.year, end.month)
+    return starts_ok and ends_ok
+
+
+def month_range_q(start, end):
+    q = Q()
+    if start:
+        q &= Q(year__gt=start.year) | Q(year=start.year, month__gte=start.month)
+    if end:
+        q &= Q(year__lt=end.year) | Q(year=end.year, month__lte=end.month)
+    return q
+
+
+def category_totals(user, start=None, end=None):
+    """
+    Rows of {category__name, income, expense} for the date range.
+
+    Whole-month ranges are answered from the rollups; anything else falls
+    back to one conditional aggregate over the raw rows.
+    """
+    income = Q(transaction_type="Income")
+    expense = Q(transaction_type="Expense")
+
+    if is_month_aligned(start, end):
+        return (
+            MonthlyRollup.objects.filter(month_range_q(start, end), user=user, count__gt=0)
+            .values("category__name")
+            .annotate(
+                income=Sum("total", filter=income),
+                expense=Sum("total", filter=expense),
+            )
+            .order_by()
+        )
+
+    return (
+        Expense.objects.filter(user=user, **date_range_filter(start, end))
+        .values("category__name")
+        .annotate(
+            income=Sum("amount", filter=income),
+            expense=Sum("amount", filter=expense),
+        )
+        .order_by()
+    )
+
+
+def spend_by_category_query(user, year, month, category_ids):
+    """(category_id, total expense) rows for one month."""
+    return (
+        MonthlyRollup.objects.filter(
+            user=user,
+            year=year,
+            month=month,
+            transaction_type="Expense",
+            category_id__in=category_ids,
+        )
+        .values("category_id")
+        .annotate(total=Sum("total"))
+        .order_by()
+        .values_list("category_id", "total")
+    )
+
+
+def spend_by_category(user, year, month, category_ids):
+    """{category_id: total expense} for one month."""
+    return dict(spend_by_category_query(user, year, month, category_ids))
+
+
+def spend_by_category_month(user, start, end):
+    """(category_id, year, month, total expense) rows for a whole-month range."""
+    return (
+        MonthlyRollup.objects.filter(
+            month_range_q(start, end),
+            user=user,
+            transaction_type="Expense",
+            category__isnull=False,
+        )
+        .values("category_id", "year", "month")
+        .annotate(total=Sum("total"))
+        .order_by()
+        .values_list("category_id", "year", "month", "total")
+    )
+
+
+# ---- BACKFILL / VERIFY ----
+
+def _expenses_for(users):
+    queryset = Expense.objects.all()
+    if users is not None:
+        queryset = queryset.filter(user__in=users)
+    return queryset
+
+
+def _rollups_for(users):
+    queryset = MonthlyRollup.objects.all()
+    if users is not None:
+        queryset = queryset.filter(user__in=users)
+    return queryset
+
+
+def rebuild(users=None):
+    """Recompute the rollups from raw rows. Returns the number of rows written."""
+    with transaction.atomic():
+        _rollups_for(users).delete()
+        deltas = aggregate(_expenses_for(users))
+        MonthlyRollup.objects.bulk_create(
+            [
+                MonthlyRollup(total=total, count=count, **dict(zip(KEY_FIELDS, key)))
+                for key, (total, count) in deltas.items()
+            ],
+            batch_size=1000,
+        )
+    return len(deltas)
+
+
+def verify(users=None):
+    """List of (key, expected, actual) where the rollups disagree with raw rows."""
+    expected = aggregate(_expenses_for(users))
+
+    actual = {}
+    rows = (
+        _rollups_for(users)
+        .values(*KEY_FIELDS)
+        .annotate(_total=Sum("total"), _count=Sum("count"))
+        .order_by()
+    )
+    for row in rows:
+        key = tuple(row[field] for field in KEY_FIELDS)
+        if row["_total"] or row["_count"]:
+            actual[key] = (row["_total"], row["_count"])
+
+    mismatches = []
+    for key in expected.keys() | actual.keys():
+        want = expected.get(key, (Decimal("0"), 0))
+        have = actual.get(key, (Decimal("0"), 0))
+        if want != have:
+            mismatches.append((key, want, have))
+    return mismatches
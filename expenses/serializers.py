@@ -1,10 +1,19 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from .models import Category, SubCategory, PaymentMethod, IncomeType, Expense, CategoryBudget
+from .reference_cache import get_reference_data
 
 User = get_user_model()
 
 
+def _lookup(refs, field, pk):
+    # FK lookups are served from the in-process reference cache
+    obj = getattr(refs, field).get(pk)
+    if obj is None:
+        raise serializers.ValidationError({field: [f"Invalid {field} id {pk}"]})
+    return obj
+
+
 class CategorySerializer(serializers.ModelSerializer):
     class Meta:
         model = Category
@@ -27,7 +36,7 @@ class SubCategorySerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         category_id = validated_data.pop("category")
-        category = Category.objects.get(id=category_id)
+        category = _lookup(get_reference_data(), "category", category_id)
         
         return SubCategory.objects.create(
             category=category,
@@ -37,7 +46,7 @@ class SubCategorySerializer(serializers.ModelSerializer):
     def update(self, instance, validated_data):
         if "category" in validated_data:
             category_id = validated_data.pop("category")
-            instance.category = Category.objects.get(id=category_id)
+            instance.category = _lookup(get_reference_data(), "category", category_id)
 
         return super().update(instance, validated_data)
 
@@ -136,19 +145,32 @@ class ExpenseSerializer(serializers.ModelSerializer):
 
     # STEP 3 — Create object
     def create(self, validated_data):
+        user = self.context["request"].user
+        expense = self.build_instance(validated_data, user)
+        expense.save(force_insert=True)
+        return expense
+
+    def update(self, instance, validated_data):
+        self.apply_to_instance(instance, validated_data)
+        instance.save()
+        return instance
+
+    # Unsaved create / update steps, shared with the bulk endpoints
+
+    def build_instance(self, validated_data, user, refs=None):
+        validated_data = dict(validated_data)
         category_id = validated_data.pop("category", None)
         subcategory_id = validated_data.pop("subcategory", None)
         income_type_id = validated_data.pop("income_type", None)
         payment_method_id = validated_data.pop("payment_method", None)
 
-        category = Category.objects.get(id=category_id) if category_id else None
-        subcategory = SubCategory.objects.get(id=subcategory_id) if subcategory_id else None
-        income_type = IncomeType.objects.get(id=income_type_id) if income_type_id else None
-        payment_method = PaymentMethod.objects.get(id=payment_method_id) if payment_method_id else None
-
-        user = self.context["request"].user
+        refs = refs or get_reference_data()
+        category = _lookup(refs, "category", category_id) if category_id else None
+        subcategory = _lookup(refs, "subcategory", subcategory_id) if subcategory_id else None
+        income_type = _lookup(refs, "income_type", income_type_id) if income_type_id else None
+        payment_method = _lookup(refs, "payment_method", payment_method_id) if payment_method_id else None
 
-        return Expense.objects.create(
+        return Expense(
             category=category,
             subcategory=subcategory,
             income_type=income_type,
@@ -158,7 +180,8 @@ class ExpenseSerializer(serializers.ModelSerializer):
             **validated_data
         )
 
-    def update(self, instance, validated_data):
+    def apply_to_instance(self, instance, validated_data, refs=None):
+        validated_data = dict(validated_data)
         category_id = validated_data.pop("category", None)
         subcategory_id = validated_data.pop("subcategory", None)
         income_type_id = validated_data.pop("income_type", None)
@@ -173,59 +196,77 @@ class ExpenseSerializer(serializers.ModelSerializer):
             instance.income_type = None
 
         # convert IDs → instances
+        refs = refs or get_reference_data()
         if category_id:
-            instance.category = Category.objects.get(id=category_id)
+            instance.category = _lookup(refs, "category", category_id)
         if subcategory_id:
-            instance.subcategory = SubCategory.objects.get(id=subcategory_id)
+            instance.subcategory = _lookup(refs, "subcategory", subcategory_id)
         if income_type_id:
-            instance.income_type = IncomeType.objects.get(id=income_type_id)
+            instance.income_type = _lookup(refs, "income_type", income_type_id)
         if payment_method_id:
-            instance.payment_method = PaymentMethod.objects.get(id=payment_method_id)
+            instance.payment_method = _lookup(refs, "payment_method", payment_method_id)
 
         # update normal fields
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        instance.save()
         return instance
 
 #  Category Budget
 
 from datetime import date
+from django.db import IntegrityError, transaction
+
+BUDGET_EXISTS = "A budget for this category and month already exists"
 
 class CategoryBudgetSerializer(serializers.ModelSerializer):
 
     category = serializers.IntegerField(write_only=True)
 
+    # optional: a budget for another month than the current one
+    year = serializers.IntegerField(required=False, min_value=1, max_value=9999)
+    month = serializers.IntegerField(required=False, min_value=1, max_value=12)
+
     class Meta:
         model = CategoryBudget
         fields = [
             "id",
             "category",
             "monthly_limit",
+            "year",
+            "month",
         ]
 
     def create(self, validated_data):
         category_id = validated_data.pop("category")
-        category = Category.objects.get(id=category_id)
+        category = _lookup(get_reference_data(), "category", category_id)
         user = self.context["request"].user
         today = date.today()
 
-        return CategoryBudget.objects.create(
-            category=category,
-            user=user,
-            month=today.month,
-            year=today.year,
-            **validated_data
-        )
+        validated_data.setdefault("year", today.year)
+        validated_data.setdefault("month", today.month)
+
+        try:
+            with transaction.atomic():
+                return CategoryBudget.objects.create(
+                    category=category,
+                    user=user,
+                    **validated_data
+                )
+        except IntegrityError:
+            raise serializers.ValidationError({"error": BUDGET_EXISTS})
 
     def update(self, instance, validated_data):
         if "category" in validated_data:
             category_id = validated_data.pop("category")
-            instance.category = Category.objects.get(id=category_id)
+            instance.category = _lookup(get_reference_data(), "category", category_id)
 
         for attr, value in validated_data.items():
             setattr(instance, attr, value)
 
-        instance.save()
+        try:
+            with transaction.atomic():
+                instance.save()
+        except IntegrityError:
+            raise serializers.ValidationError({"error": BUDGET_EXISTS})
         return instance
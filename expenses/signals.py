@@ -0,0 +1,22 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import versioning
+from .models import Category, SubCategory, PaymentMethod, IncomeType, CategoryBudget
+
+
+@receiver([post_save, post_delete], sender=Category)
+@receiver([post_save, post_delete], sender=SubCategory)
+@receiver([post_save, post_delete], sender=PaymentMethod)
+@receiver([post_save, post_delete], sender=IncomeType)
+def bump_reference_version(sender, **kwargs):
+    versioning.bump(versioning.REFERENCE)
+
+
+# Expense bumps its own user version in save()/delete() and the bulk
+# queryset methods; a post_delete receiver would stop queryset deletes
+# from running as a single DELETE
+
+@receiver([post_save, post_delete], sender=CategoryBudget)
+def bump_user_version(sender, instance, **kwargs):
+    versioning.bump(versioning.user_key(instance.user_id))
@@ -0,0 +1,83 @@
+"""
+Response bodies of the summary and budget endpoints.
+
+Built from already-fetched rows, so the sync views and their async
+counterparts (async_views.py) return exactly the same payloads.
+"""
+
+
+def summary_payload(rows, start, end):
+    """rows: {category__name, income, expense} as from rollups.category_totals."""
+    total_income = 0
+    total_expense = 0
+    graph_data = []
+
+    for row in rows:
+        if row["income"] is not None:
+            total_income += row["income"]
+        if row["expense"] is not None:
+            total_expense += row["expense"]
+
+            # CATEGORY-WISE TOTAL EXPENSE (Graph)
+            graph_data.append({
+                "category": row["category__name"],
+                "total": row["expense"]
+            })
+
+    graph_data.sort(key=lambda item: item["total"], reverse=True)
+
+    total_balance = total_income - total_expense
+
+    #  HIGHEST SPENDING CATEGORY
+
+    highest_category = graph_data[0] if graph_data else None
+    lowest_category = graph_data[-1] if graph_data else None
+
+    return {
+        "from": start,
+        "to": end,
+        "total_income": total_income,
+        "total_expense": total_expense,
+        "total_balance": total_balance,
+        "highest_category": highest_category,
+        "lowest_category": lowest_category,
+        "graph_data": graph_data
+    }
+
+
+def budget_payload(budgets, spent_by_category):
+    """budgets with category loaded; spent_by_category as from rollups.spend_by_category."""
+    result = []
+
+    for budget in budgets:
+        spent = spent_by_category.get(budget.category_id) or 0
+        limit = budget.monthly_limit
+
+        # Remaining should not go below 0
+
+        remaining = max(limit - spent, 0)
+
+        # Percent used should not exceed 100
+
+        if limit > 0:
+            percent_used = min((spent / limit) * 100, 100)
+        else:
+            percent_used = 0
+
+        percent_remains = max(100 - percent_used, 0)
+
+        result.append({
+            "id": budget.id,
+            "category": {
+                "id": budget.category.id,
+                "name": budget.category.name
+            },
+            "budget": budget.monthly_limit,
+            "spent": spent,
+            "remaining": remaining,
+            "percent_used": round(percent_used, 2),
+            "percent_remains": round(percent_remains, 2),
+            "over_budget": spent > budget.monthly_limit
+        })
+
+    return result
@@ -1,3 +1,1556 @@
-from django.test import TestCase
+import base64
+import csv
+import gzip
+import json
+import re
+import time
+import zlib
+from asgiref.sync import async_to_sync
+from contextlib import ExitStack, contextmanager
+from itertools import combinations
+from unittest import skipUnless
+from unittest.mock import patch
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCacheClient, RedisSerializer
+from django.core.management import call_command
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.db.utils import ConnectionHandler
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import urls as accounts_urls
+from accounts.models import MenuList
+from expense_backend import compression, metrics
+from expense_backend.cache_backends import response_cache
+from expense_backend.db_profiles import sqlite_database
+
+from . import rollups, reference_cache, renderers
+from . import urls as expenses_urls
+from .benchmarks import build_scenarios
+from .filters import filter_expenses, SORTS
+from .forecast import build_forecast
+from .pagination import KeysetPaginator, encode_cursor
+from .projections import expense_values, expense_dicts
+from .renderers import FastJSONRenderer
+from .serializers import ExpenseSerializer
+from .models import Category, SubCategory, PaymentMethod, IncomeType, Expense, CategoryBudget, MonthlyRollup
+
+
+class _NextMonth(date):
+
+    @classmethod
+    def today(cls):
+        return date.today() + timedelta(days=32)
+
+
+def next_month():
+    """Moves "today" a month on for the ETags and the date defaults."""
+    stack = ExitStack()
+    for module in ("expenses.conditional", "expenses.filters", "expenses.budgets"):
+        stack.enter_context(patch(f"{module}.date", _NextMonth))
+    return stack
+
+
+class ExpenseTestMixin:
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="alice", email="alice@example.com", password="pass12345")
+        self.client.force_authenticate(self.user)
+
+        self.category = Category.objects.create(name="Food", icon="🍔")
+        self.subcategory = SubCategory.objects.create(category=self.category, name="Groceries")
+        self.payment_method = PaymentMethod.objects.create(name="Card")
+        self.income_type = IncomeType.objects.create(name="Salary")
+
+    def make_expense(self, amount="10.00", day=None, **kwargs):
+        fields = {
+            "user": self.user,
+            "created_by": self.user,
+            "transaction_type": "Expense",
+            "category": self.category,
+            "subcategory": self.subcategory,
+            "payment_method": self.payment_method,
+            "amount": Decimal(amount),
+            "date": day or date(2025, 1, 1),
+        }
+        fields.update(kwargs)
+        return Expense.objects.create(**fields)
+
+
+class QueryBudgetMixin:
+    """
+    assertMaxQueries(n) fails when the block runs more than n queries.
+
+    Use it on read endpoints with enough rows that a per-row lookup would
+    blow the budget, so N+1 regressions show up as test failures.
+    """
+
+    @contextmanager
+    def assertMaxQueries(self, limit):
+        with CaptureQueriesContext(connection) as ctx:
+            yield ctx
+        executed = len(ctx.captured_queries)
+        if executed > limit:
+            queries = "\n".join(q["sql"] for q in ctx.captured_queries)
+            self.fail(f"{executed} queries executed, limit is {limit}:\n{queries}")
+
+
+class ExpenseListPaginationTests(ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        start = date(2025, 1, 1)
+        # two rows per day so the id tiebreak is exercised
+        self.expenses = [
+            self.make_expense(day=start + timedelta(days=i // 2))
+            for i in range(7)
+        ]
+
+    def test_walks_pages_forward_and_back(self):
+        expected = [e.id for e in sorted(self.expenses, key=lambda e: (e.date, e.id), reverse=True)]
+
+        first = self.client.get("/api/expense/", {"page_size": 3}).json()
+        self.assertIsNone(first["prev"])
+        second = self.client.get("/api/expense/", {"page_size": 3, "cursor": first["next"]}).json()
+        third = self.client.get("/api/expense/", {"page_size": 3, "cursor": second["next"]}).json()
+        self.assertIsNone(third["next"])
+
+        seen = [row["id"] for page in (first, second, third) for row in page["results"]]
+        self.assertEqual(seen, expected)
+
+        back = self.client.get("/api/expense/", {"page_size": 3, "cursor": third["prev"]}).json()
+        self.assertEqual(back["results"], second["results"])
+
+    def test_unpaginated_flag_returns_plain_list(self):
+        response = self.client.get("/api/expense/", {"paginate": "false"})
+        self.assertEqual(len(response.json()), 7)
+
+    def test_invalid_cursor(self):
+        response = self.client.get("/api/expense/", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+        def crafted(*parts):
+            return base64.urlsafe_b64encode(json.dumps(parts).encode()).decode().rstrip("=")
+
+        for cursor in (
+            crafted(["x"], 5, "next"),
+            crafted({}, 5, "next"),
+            crafted(12, 5, "next"),
+            crafted("2025-01-01", True, "next"),
+            crafted("2025-01-01", 2 ** 70, "next"),
+            crafted("2025-01-01", 5, "sideways"),
+        ):
+            with self.subTest(cursor=cursor):
+                response = self.client.get("/api/expense/", {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"error": "Invalid cursor"})
+
+
+class ExpenseReadQueryTests(QueryBudgetMixin, ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        other_category = Category.objects.create(name="Travel")
+        other_sub = SubCategory.objects.create(category=other_category, name="Flights")
+        for i in range(10):
+            self.make_expense(day=date(2025, 1, 1 + i))
+            self.make_expense(day=date(2025, 2, 1 + i), category=other_category, subcategory=other_sub)
+            self.make_expense(
+                day=date(2025, 3, 1 + i), transaction_type="Income",
+                category=None, subcategory=None, income_type=self.income_type,
+            )
+
+    def test_list_query_count(self):
+        # data version lookup + the page
+        with self.assertMaxQueries(2):
+            response = self.client.get("/api/expense/", {"page_size": 30})
+        self.assertEqual(len(response.json()["results"]), 30)
+
+    def test_unpaginated_list_query_count(self):
+        with self.assertMaxQueries(2):
+            response = self.client.get("/api/expense/", {"paginate": "false"})
+        self.assertEqual(len(response.json()), 30)
+
+    def test_detail_query_count(self):
+        expense = Expense.objects.filter(user=self.user, transaction_type="Expense").first()
+        with self.assertMaxQueries(2):
+            response = self.client.get(f"/api/expense/{expense.id}/")
+        data = response.json()
+        self.assertEqual(data["subcategory_data"]["category_data"]["name"], expense.category.name)
+        self.assertEqual(data["created_by"]["username"], "alice")
+
+
+class ExpenseProjectionTests(ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_expense("12.50", description="caf\u00e9 \u2028 line")
+        self.make_expense(
+            "1000.00", transaction_type="Income", category=None, subcategory=None,
+            income_type=self.income_type, payment_method=None, created_by=None,
+        )
+        self.make_expense("0.05", description='quote " and \\ slash')
+
+    def assert_same_bytes(self, renderer):
+        expenses = Expense.objects.filter(user=self.user).order_by("id")
+        expected = JSONRenderer().render(ExpenseSerializer(expenses.with_related(), many=True).data)
+        self.assertEqual(renderer.render(expense_dicts(expense_values(expenses))), expected)
+
+    def test_projection_renders_like_the_serializer(self):
+        self.assert_same_bytes(FastJSONRenderer())
+
+    def test_fallback_without_orjson(self):
+        with patch.object(renderers, "orjson", None):
+            self.assert_same_bytes(FastJSONRenderer())
+
+    def test_list_matches_detail(self):
+        rows = self.client.get("/api/expense/", {"paginate": "false"}).json()
+        for row in rows:
+            self.assertEqual(row, self.client.get(f"/api/expense/{row['id']}/").json())
+
+
+class ExpenseColumnarTests(ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        for i in range(4):
+            self.make_expense(day=date(2025, 1, 1 + i))
+        self.make_expense(
+            "1000.00", day=date(2025, 1, 9), transaction_type="Income", category=None,
+            subcategory=None, income_type=self.income_type, payment_method=None, created_by=None,
+        )
+
+    def expand(self, body):
+        # rebuild the row shape from the columns and refs
+        columns, refs = body["columns"], body["refs"]
+
+        def ref(kind, id, **extra):
+            return None if id is None else {"id": id, **refs[kind][str(id)], **extra}
+
+        rows = []
+        for i in range(len(columns["id"])):
+            subcategory = ref("subcategory", columns["subcategory"][i])
+            if subcategory is not None:
+                subcategory["category_data"] = ref("category", subcategory.pop("category"))
+            rows.append({
+                "id": columns["id"][i],
+                "transaction_type": columns["transaction_type"][i],
+                "amount": columns["amount"][i],
+                "date": columns["date"][i],
+                "description": columns["description"][i],
+                "category_data": ref("category", columns["category"][i]),
+                "subcategory_data": subcategory,
+                "income_type_data": ref("income_type", columns["income_type"][i]),
+                "payment_method_data": ref("payment_method", columns["payment_method"][i]),
+                "created_by": ref("user", columns["created_by"][i]),
+                "created_at": columns["created_at"][i],
+            })
+        return rows
+
+    def test_same_rows_as_the_default_format(self):
+        expected = self.client.get("/api/expense/", {"paginate": "false"}).json()
+        response = self.client.get("/api/expense/", {"paginate": "false", "format": "columnar"})
+
+        self.assertEqual(response["Content-Type"], "application/vnd.expenses.columnar+json")
+        body = response.json()
+        self.assertEqual(self.expand(body), expected)
+        # each referenced object once
+        self.assertEqual(list(body["refs"]["category"]), [str(self.category.id)])
+        self.assertEqual(list(body["refs"]["user"]), [str(self.user.id)])
+
+    def test_paginated(self):
+        expected = self.client.get("/api/expense/", {"page_size": 3}).json()
+        page = self.client.get("/api/expense/", {"page_size": 3, "format": "columnar"}).json()
+
+        self.assertEqual(page["next"], expected["next"])
+        self.assertEqual(self.expand(page["results"]), expected["results"])
+
+    def test_etag_depends_on_format(self):
+        plain = self.client.get("/api/expense/")
+        columnar = self.client.get("/api/expense/", HTTP_ACCEPT="application/vnd.expenses.columnar+json")
+        self.assertIn("columns", columnar.json()["results"])
+        self.assertNotEqual(plain["ETag"], columnar["ETag"])
+
+
+class ExpenseSummaryTests(QueryBudgetMixin, ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.travel = Category.objects.create(name="Travel")
+        flights = SubCategory.objects.create(category=self.travel, name="Flights")
+        self.make_expense("30.00", day=date(2025, 1, 5))
+        self.make_expense("20.00", day=date(2025, 2, 5))
+        self.make_expense("100.00", day=date(2025, 2, 9), category=self.travel, subcategory=flights)
+        self.make_expense(
+            "500.00", day=date(2025, 2, 1), transaction_type="Income",
+            category=None, subcategory=None, income_type=self.income_type,
+        )
+
+    def test_all_time_totals_in_one_query(self):
+        # data version lookup + one aggregate
+        with self.assertMaxQueries(2):
+            data = self.client.get("/api/expense-summary/").json()
+
+        self.assertEqual(data["total_income"], 500)
+        self.assertEqual(data["total_expense"], 150)
+        self.assertEqual(data["total_balance"], 350)
+        self.assertEqual(data["highest_category"], {"category": "Travel", "total": 100})
+        self.assertEqual(data["lowest_category"], {"category": "Food", "total": 50})
+
+    def test_date_range(self):
+        data = self.client.get("/api/expense-summary/", {"from": "2025-01-01", "to": "2025-01-31"}).json()
+        self.assertEqual(data["total_income"], 0)
+        self.assertEqual(data["total_expense"], 30)
+        self.assertEqual(data["graph_data"], [{"category": "Food", "total": 30}])
+
+    def test_invalid_period(self):
+        response = self.client.get("/api/expense-summary/", {"period": "week"})
+        self.assertEqual(response.status_code, 400)
+
+
+class ExpenseTimeSeriesTests(QueryBudgetMixin, ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cash = PaymentMethod.objects.create(name="Cash")
+        self.make_expense("30.00", day=date(2025, 1, 6))
+        self.make_expense("20.00", day=date(2025, 1, 8), payment_method=self.cash)
+        self.make_expense("15.00", day=date(2025, 3, 2))
+        self.make_expense(
+            "500.00", day=date(2025, 1, 31), transaction_type="Income",
+            category=None, subcategory=None, income_type=self.income_type,
+        )
+
+    def test_monthly_buckets_fill_gaps_in_one_query(self):
+        # data version lookup + one grouped query
+        with self.assertMaxQueries(2):
+            data = self.client.get("/api/expense-timeseries/").json()
+
+        self.assertEqual(data["periods"], ["2025-01-01", "2025-02-01", "2025-03-01"])
+        self.assertEqual(data["series"], [{"group": None, "income": [500, 0, 0], "expense": [50, 0, 15]}])
+
+    def test_weekly_buckets_cover_the_requested_range(self):
+        data = self.client.get(
+            "/api/expense-timeseries/", {"bucket": "week", "from": "2025-01-01", "to": "2025-01-20"}
+        ).json()
+
+        # ISO weeks start on Monday; 2025-01-01 falls in the week of 2024-12-30
+        self.assertEqual(data["periods"], ["2024-12-30", "2025-01-06", "2025-01-13", "2025-01-20"])
+        self.assertEqual(data["series"][0]["expense"], [0, 50, 0, 0])
+
+    def test_group_by_payment_method(self):
+        data = self.client.get(
+            "/api/expense-timeseries/",
+            {"bucket": "day", "group_by": "payment_method", "from": "2025-01-06", "to": "2025-01-08"},
+        ).json()
+
+        self.assertEqual(data["series"], [
+            {"group": {"id": self.payment_method.id, "name": "Card"}, "income": [0, 0, 0], "expense": [30, 0, 0]},
+            {"group": {"id": self.cash.id, "name": "Cash"}, "income": [0, 0, 0], "expense": [0, 0, 20]},
+        ])
+
+    def test_invalid_parameters(self):
+        for params in ({"bucket": "hour"}, {"group_by": "description"}, {"bucket": "day", "from": "2000-01-01"}):
+            self.assertEqual(self.client.get("/api/expense-timeseries/", params).status_code, 400)
+
+
+class CategoryBudgetTests(QueryBudgetMixin, ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        for i in range(5):
+            category = Category.objects.create(name=f"Budgeted {i}")
+            sub = SubCategory.objects.create(category=category, name=f"Sub {i}")
+            CategoryBudget.objects.create(
+                user=self.user, category=category, year=2024, month=6, monthly_limit=Decimal("100.00")
+            )
+            self.make_expense("40.00", day=date(2024, 6, 10), category=category, subcategory=sub)
+            self.make_expense("80.00", day=date(2024, 6, 20), category=category, subcategory=sub)
+            # outside the month, must not count
+            self.make_expense("999.00", day=date(2024, 7, 1), category=category, subcategory=sub)
+
+    def test_historical_month_in_constant_queries(self):
+        # data version lookup + budgets + one grouped spend query
+        with self.assertMaxQueries(3):
+            data = self.client.get("/api/category-budget/", {"year": 2024, "month": 6}).json()
+
+        self.assertEqual(len(data), 5)
+        for row in data:
+            self.assertEqual(row["spent"], 120)
+            self.assertEqual(row["remaining"], 0)
+            self.assertTrue(row["over_budget"])
+
+    def test_month_without_budgets(self):
+        self.assertEqual(self.client.get("/api/category-budget/", {"year": 2024, "month": 5}).json(), [])
+
+    def test_invalid_month(self):
+        response = self.client.get("/api/category-budget/", {"year": 2024, "month": 13})
+        self.assertEqual(response.status_code, 400)
+
+
+class MonthlyRollupTests(ExpenseTestMixin, APITestCase):
+
+    def totals(self):
+        return {
+            (r.year, r.month, r.transaction_type, r.category_id): (r.total, r.count)
+            for r in MonthlyRollup.objects.filter(count__gt=0)
+        }
+
+    def test_single_row_writes(self):
+        travel = Category.objects.create(name="Travel")
+        flights = SubCategory.objects.create(category=travel, name="Flights")
+
+        expense = self.make_expense("10.00", day=date(2025, 1, 3))
+        self.make_expense("5.00", day=date(2025, 1, 9))
+        self.assertEqual(self.totals(), {(2025, 1, "Expense", self.category.id): (Decimal("15.00"), 2)})
+
+        # move to another month and category through the API
+        response = self.client.put(f"/api/expense/{expense.id}/", {
+            "transaction_type": "Expense",
+            "category": travel.id,
+            "subcategory": flights.id,
+            "date": "2025-02-01",
+            "amount": "12.00",
+        })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.totals(), {
+            (2025, 1, "Expense", self.category.id): (Decimal("5.00"), 1),
+            (2025, 2, "Expense", travel.id): (Decimal("12.00"), 1),
+        })
+
+        self.client.delete(f"/api/expense/{expense.id}/")
+        self.assertEqual(self.totals(), {(2025, 1, "Expense", self.category.id): (Decimal("5.00"), 1)})
+        self.assertEqual(rollups.verify(), [])
+
+    def test_queryset_bulk_writes(self):
+        Expense.objects.bulk_create([
+            Expense(user=self.user, category=self.category, subcategory=self.subcategory,
+                    amount=Decimal("2.50"), date=date(2025, 3, day))
+            for day in range(1, 11)
+        ])
+        Expense.objects.filter(date__day__lte=4).update(date=date(2025, 4, 1))
+        Expense.objects.filter(date__day=10).delete()
+
+        self.assertEqual(self.totals(), {
+            (2025, 3, "Expense", self.category.id): (Decimal("12.50"), 5),
+            (2025, 4, "Expense", self.category.id): (Decimal("10.00"), 4),
+        })
+        self.assertEqual(rollups.verify(), [])
+
+    def test_save_after_refresh_from_db(self):
+        expense = self.make_expense("10.00", day=date(2025, 1, 3))
+        self.make_expense("5.00", day=date(2025, 1, 9))
+
+        Expense.objects.filter(pk=expense.pk).update(amount=Decimal("99.00"))
+        expense.refresh_from_db()
+        expense.amount = Decimal("5.00")
+        expense.save()
+
+        self.assertEqual(self.totals(), {(2025, 1, "Expense", self.category.id): (Decimal("10.00"), 2)})
+        self.assertEqual(rollups.verify(), [])
+
+    def test_writes_from_a_stale_instance(self):
+        expense = self.make_expense("10.00", day=date(2025, 1, 3))
+        stale = Expense.objects.get(pk=expense.pk)
+
+        # another request moves the row to February first
+        fresh = Expense.objects.get(pk=expense.pk)
+        fresh.date = date(2025, 2, 1)
+        fresh.amount = Decimal("20.00")
+        fresh.save()
+
+        stale.amount = Decimal("7.00")
+        stale.save()
+        self.assertEqual(self.totals(), {(2025, 1, "Expense", self.category.id): (Decimal("7.00"), 1)})
+        self.assertEqual(rollups.verify(), [])
+
+        fresh.delete()
+        self.assertEqual(self.totals(), {})
+        self.assertEqual(rollups.verify(), [])
+
+    def test_deleted_category_folds_into_no_category(self):
+        travel = Category.objects.create(name="Travel")
+        self.make_expense("7.00", category=travel, subcategory=None)
+        travel.delete()
+        self.make_expense("3.00", category=None, subcategory=None)
+        self.assertEqual(rollups.verify(), [])
+
+    def test_rebuild_command(self):
+        self.make_expense("10.00")
+        MonthlyRollup.objects.all().delete()
+        self.assertNotEqual(rollups.verify(), [])
+
+        call_command("rebuild_rollups", stdout=StringIO())
+        call_command("rebuild_rollups", "--verify", stdout=StringIO())
+
+
+class ExpenseImportTests(QueryBudgetMixin, ExpenseTestMixin, APITestCase):
+
+    def upload(self, name, content):
+        return self.client.post(
+            "/api/expense/import/",
+            {"file": SimpleUploadedFile(name, content if isinstance(content, bytes) else content.encode())},
+            format="multipart",
+        )
+
+    def test_csv_import_reports_bad_rows(self):
+        header = "transaction_type,amount,date,category,subcategory,income_type,payment_method,description\n"
+        good = f"Expense,12.50,2025-01-02,{self.category.id},{self.subcategory.id},,{self.payment_method.id},lunch\n"
+        rows = [
+            good * 3,
+            f"Expense,1.00,2025-01-02,{self.category.id},,,,\n",           # no subcategory
+            f"Income,900.00,2025-01-31,,,{self.income_type.id},,salary\n",
+            "Expense,1.00,2025-01-02,9999,9999,,,\n",                       # unknown ids
+        ]
+        response = self.upload("bank.csv", header + "".join(rows))
+
+        data = response.json()
+        self.assertEqual(data["created"], 4)
+        self.assertEqual(data["failed"], 2)
+        self.assertEqual([error["row"] for error in data["errors"]], [4, 6])
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 4)
+        self.assertEqual(rollups.verify(), [])
+
+    def test_ndjson_import_is_batched(self):
+        row = json.dumps({
+            "transaction_type": "Expense",
+            "amount": "3.00",
+            "date": "2025-05-05",
+            "category": self.category.id,
+            "subcategory": self.subcategory.id,
+        })
+        # reference lookups + one insert + rollup upkeep, not one round trip per row
+        with self.assertMaxQueries(20):
+            response = self.upload("export.ndjson", "\n".join([row] * 200 + ["not json"]))
+
+        data = response.json()
+        self.assertEqual(data["created"], 200)
+        self.assertEqual(data["errors"], [{"row": 201, "errors": {"error": "Row is not a JSON object"}}])
+
+    def test_rows_that_are_not_utf8_are_reported(self):
+        not_utf8 = {"error": "Row is not valid UTF-8"}
+        row = json.dumps({
+            "transaction_type": "Expense",
+            "amount": "3.00",
+            "date": "2025-05-05",
+            "category": self.category.id,
+            "subcategory": self.subcategory.id,
+        }).encode()
+        response = self.upload("export.ndjson", b"\n".join([row, b"\xff\xfe", row]))
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["created"], data["failed"]), (2, 1))
+        self.assertEqual(data["errors"], [{"row": 2, "errors": not_utf8}])
+
+        header = b"transaction_type,amount,date,category,subcategory,description\n"
+        good = f"Expense,1.00,2025-01-02,{self.category.id},{self.subcategory.id},".encode()
+        response = self.upload("bank.csv", header + good + b"caf\xe9\n" + good + "café".encode() + b"\n")
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["created"], data["failed"]), (1, 1))
+        self.assertEqual(data["errors"], [{"row": 1, "errors": not_utf8}])
+
+    def test_malformed_csv_rows_are_reported(self):
+        header = "transaction_type,amount,date,category,subcategory,description\n"
+        good = f"Expense,1.00,2025-01-02,{self.category.id},{self.subcategory.id},lunch\n"
+        oversized = f"Expense,1.00,2025-01-02,{self.category.id},{self.subcategory.id},{'x' * (csv.field_size_limit() + 1)}\n"
+        response = self.upload("bank.csv", header + good + oversized + good)
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual((data["created"], data["failed"]), (2, 1))
+        self.assertEqual(data["errors"][0]["row"], 2)
+        self.assertTrue(data["errors"][0]["errors"]["error"].startswith("Malformed CSV row"))
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 2)
+
+    def test_unknown_file_type(self):
+        response = self.upload("notes.txt", "hello")
+        self.assertEqual(response.status_code, 400)
+
+
+class ExpenseExportTests(ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.make_expense("12.50", day=date(2025, 1, 2), description='lunch, "big"')
+        self.make_expense("4.00", day=date(2025, 2, 2))
+        self.make_expense(
+            "900.00", day=date(2025, 2, 28), transaction_type="Income",
+            category=None, subcategory=None, income_type=self.income_type,
+        )
+
+    def read(self, response):
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_export(self):
+        response = self.client.get("/api/expense/export/", {"format": "csv"})
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+
+        lines = self.read(response).splitlines()
+        self.assertEqual(lines[0], "id,date,transaction_type,amount,category,subcategory,income_type,payment_method,description,created_at")
+        self.assertEqual(len(lines), 4)
+        self.assertIn('2025-01-02,Expense,12.50,Food,Groceries,,Card,"lunch, ""big"""', lines[3])
+
+    def test_ndjson_export_with_filters(self):
+        response = self.client.get(
+            "/api/expense/export/",
+            {"format": "ndjson", "from": "2025-02-01", "to": "2025-02-28", "transaction_type": "Expense"},
+        )
+        rows = [json.loads(line) for line in self.read(response).splitlines()]
+        self.assertEqual(len(rows), 1)
+        self.assertEqual(rows[0]["amount"], "4.00")
+        self.assertEqual(rows[0]["category"], "Food")
+
+    def test_list_uses_same_filters(self):
+        data = self.client.get("/api/expense/", {"transaction_type": "Income"}).json()
+        self.assertEqual([row["transaction_type"] for row in data["results"]], ["Income"])
+
+    def test_invalid_filter(self):
+        response = self.client.get("/api/expense/export/", {"format": "ndjson", "transaction_type": "Gift"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(json.loads(response.content), {"error": "Invalid type (Income / Expense only)"})
+
+
+class ReferenceCacheTests(QueryBudgetMixin, ExpenseTestMixin, APITestCase):
+
+    def test_lists_served_from_cache_until_a_write(self):
+        self.client.get("/api/categories/")
+
+        # one version check per request
+        with self.assertMaxQueries(4):
+            self.assertEqual([c["name"] for c in self.client.get("/api/categories/").json()], ["Food"])
+            self.client.get("/api/payment-method/")
+            self.client.get("/api/income-type/")
+            subs = self.client.get(f"/api/sub-categories/{self.category.id}/").json()
+        self.assertEqual([s["name"] for s in subs], ["Groceries"])
+
+        Category.objects.create(name="Bills")
+        names = [c["name"] for c in self.client.get("/api/categories/").json()]
+        self.assertEqual(names, ["Bills", "Food"])
+
+    def test_write_path_lookups(self):
+        reference_cache.get_reference_data()
+
+        payload = {
+            "transaction_type": "Expense",
+            "amount": "9.99",
+            "date": "2025-01-01",
+            "category": self.category.id,
+            "subcategory": self.subcategory.id,
+            "payment_method": self.payment_method.id,
+        }
+        # reference version check, insert, rollup and user version upkeep,
+        # savepoints; no per-FK lookups
+        with self.assertMaxQueries(12):
+            response = self.client.post("/api/expense/", payload)
+        self.assertEqual(response.status_code, 201)
+
+        response = self.client.post("/api/expense/", dict(payload, category=9999))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("category", response.json())
+
+
+class ConditionalGetTests(QueryBudgetMixin, ExpenseTestMixin, APITestCase):
+
+    def test_not_modified_until_the_users_data_changes(self):
+        self.make_expense("10.00")
+
+        first = self.client.get("/api/expense-summary/")
+        etag = first["ETag"]
+        self.assertTrue(first.has_header("Last-Modified"))
+
+        with self.assertMaxQueries(1):
+            cached = self.client.get("/api/expense-summary/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(cached["ETag"], etag)
+
+        # different parameters, different representation
+        other = self.client.get("/api/expense-summary/", {"period": "year"}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(other.status_code, 200)
+
+        self.make_expense("5.00")
+        changed = self.client.get("/api/expense-summary/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed["ETag"], etag)
+
+    def test_other_users_writes_keep_etag(self):
+        etag = self.client.get("/api/category-budget/")["ETag"]
+
+        bob = User.objects.create_user(username="bob", password="pass12345")
+        Expense.objects.create(
+            user=bob, category=self.category, subcategory=self.subcategory,
+            amount=Decimal("1.00"), date=date(2025, 1, 1),
+        )
+        response = self.client.get("/api/category-budget/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_date_rollover_invalidates(self):
+        # budgets default to the current month; ?period is relative to today
+        requests = [("/api/category-budget/", {}), ("/api/expense-summary/", {"period": "month"})]
+        first = [self.client.get(path, params) for path, params in requests]
+
+        with next_month():
+            for (path, params), response in zip(requests, first):
+                later = self.client.get(
+                    path, params,
+                    HTTP_IF_NONE_MATCH=response["ETag"], HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+                )
+                self.assertEqual(later.status_code, 200, path)
+                self.assertNotEqual(later["ETag"], response["ETag"])
+
+    def test_reference_lists(self):
+        etag = self.client.get("/api/categories/")["ETag"]
+        self.assertEqual(self.client.get("/api/categories/", HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        self.category.name = "Dining"
+        self.category.save()
+        self.assertEqual(self.client.get("/api/categories/", HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class ExpenseBatchTests(QueryBudgetMixin, ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.travel = Category.objects.create(name="Travel")
+        self.flights = SubCategory.objects.create(category=self.travel, name="Flights")
+        self.expenses = [self.make_expense("10.00", day=date(2025, 1, 1 + i)) for i in range(20)]
+
+    def post(self, operations):
+        return self.client.post("/api/expense/batch/", {"operations": operations}, format="json")
+
+    def test_mixed_batch(self):
+        recategorize = [
+            {"op": "update", "id": e.id, "data": {
+                "transaction_type": "Expense", "category": self.travel.id, "subcategory": self.flights.id,
+            }}
+            for e in self.expenses[:10]
+        ]
+        deletes = [{"op": "delete", "id": e.id} for e in self.expenses[10:15]]
+        creates = [{"op": "create", "data": {
+            "transaction_type": "Income", "income_type": self.income_type.id,
+            "amount": "100.00", "date": "2025-02-01",
+        }}]
+
+        # lookups, one insert, one update, one delete and their rollup upkeep;
+        # independent of the number of operations
+        with self.assertMaxQueries(40):
+            response = self.post(recategorize + deletes + creates)
+        self.assertEqual(response.status_code, 200)
+
+        results = response.json()["results"]
+        self.assertEqual([r["status"] for r in results], ["updated"] * 10 + ["deleted"] * 5 + ["created"])
+
+        self.assertEqual(Expense.objects.filter(user=self.user, category=self.travel).count(), 10)
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 16)
+        self.assertEqual(rollups.verify(), [])
+
+    def test_query_count_independent_of_batch_size(self):
+        def batch(expenses):
+            half = len(expenses) // 2
+            return [
+                *({"op": "update", "id": e.id, "data": {
+                    "transaction_type": "Expense", "category": self.travel.id,
+                    "subcategory": self.flights.id, "amount": "12.00",
+                }} for e in expenses[:half]),
+                *({"op": "delete", "id": e.id} for e in expenses[half:]),
+                *({"op": "create", "data": {
+                    "transaction_type": "Expense", "category": self.category.id,
+                    "subcategory": self.subcategory.id, "amount": "5.00", "date": "2025-01-15",
+                }} for _ in expenses),
+            ]
+
+        def count(operations):
+            with CaptureQueriesContext(connection) as ctx, transaction.atomic():
+                response = self.post(operations)
+                self.assertEqual(response.status_code, 200, response.content)
+                transaction.set_rollback(True)
+            return len(ctx.captured_queries)
+
+        count(batch(self.expenses[:2]))  # warm the reference cache
+        # 4 and 40 operations
+        self.assertEqual(count(batch(self.expenses[:2])), count(batch(self.expenses)))
+
+    def test_invalid_operation_rolls_back_everything(self):
+        response = self.post([
+            {"op": "delete", "id": self.expenses[0].id},
+            {"op": "update", "id": self.expenses[1].id, "data": {"transaction_type": "Expense"}},
+            {"op": "delete", "id": 999999},
+            {"op": "create", "data": {"transaction_type": "Expense", "category": 9999,
+                                      "subcategory": self.subcategory.id, "amount": "1", "date": "2025-01-01"}},
+        ])
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([e["index"] for e in response.json()["errors"]], [1, 2, 3])
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 20)
+
+    def test_malformed_ids(self):
+        response = self.post([
+            {"op": "delete", "id": [1]},
+            {"op": "update", "id": {"pk": 1}, "data": {}},
+            {"op": "delete", "id": True},
+            {"op": "delete", "id": "1"},
+            {"op": "delete", "id": 2 ** 70},
+            {"op": "delete", "id": self.expenses[0].id},
+        ])
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()["errors"]
+        self.assertEqual([e["index"] for e in errors], [0, 1, 2, 3, 4])
+        self.assertEqual(errors[2]["errors"], {"id": ["Must be an integer id"]})
+        self.assertEqual(errors[4]["errors"], {"id": ["Must be an integer id"]})
+        self.assertEqual(Expense.objects.filter(user=self.user).count(), 20)
+
+    def test_body_must_be_an_object(self):
+        response = self.client.post("/api/expense/batch/", [{"op": "delete", "id": 1}], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"error": "Expected a JSON object"})
+
+    def test_other_users_rows_are_not_found(self):
+        bob = User.objects.create_user(username="bob", password="pass12345")
+        theirs = Expense.objects.create(user=bob, amount=Decimal("1.00"), date=date(2025, 1, 1))
+        response = self.post([{"op": "delete", "id": theirs.id}])
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(Expense.objects.filter(id=theirs.id).exists())
+
+
+class ExpenseFilterTests(ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.cash = PaymentMethod.objects.create(name="Cash")
+        for i, amount in enumerate(["5.00", "50.00", "20.00", "20.00", "80.00"]):
+            self.make_expense(amount, day=date(2025, 1, 1 + i), payment_method=self.cash if i % 2 else self.payment_method)
+
+    def amounts(self, **params):
+        return [row["amount"] for row in self.client.get("/api/expense/", params).json()["results"]]
+
+    def test_filters(self):
+        self.assertEqual(self.amounts(payment_method=self.cash.id), ["20.00", "50.00"])
+        self.assertEqual(self.amounts(min_amount="20", max_amount="50"), ["20.00", "20.00", "50.00"])
+        self.assertEqual(self.amounts(category=self.category.id, to="2025-01-02"), ["50.00", "5.00"])
+
+    def test_amount_sort_pages(self):
+        first = self.client.get("/api/expense/", {"sort": "-amount", "page_size": 2}).json()
+        second = self.client.get("/api/expense/", {"sort": "-amount", "page_size": 2, "cursor": first["next"]}).json()
+        third = self.client.get("/api/expense/", {"sort": "-amount", "page_size": 2, "cursor": second["next"]}).json()
+        amounts = [row["amount"] for page in (first, second, third) for row in page["results"]]
+        self.assertEqual(amounts, ["80.00", "50.00", "20.00", "20.00", "5.00"])
+
+    def test_invalid_parameters(self):
+        for params in ({"sort": "description"}, {"category": "food"}, {"min_amount": "lots"}):
+            self.assertEqual(self.client.get("/api/expense/", params).status_code, 400)
+
+    def test_out_of_range_ids(self):
+        for value in ("0", "-1", str(2 ** 63), "9" * 40):
+            with self.subTest(value=value):
+                response = self.client.get("/api/expense/", {"category": value})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"error": "'category' must be an integer id"})
+
+        self.assertEqual(self.amounts(category=str(2 ** 63 - 1)), [])
+
+
+@skipUnless(connection.vendor == "sqlite", "EXPLAIN QUERY PLAN output is SQLite specific")
+class ExpenseFilterPlanTests(ExpenseTestMixin, APITestCase):
+    """
+    Every supported filter / sort combination must be an index search on
+    expenses_expense, never a full table scan.
+    """
+
+    # name: (params, column, the index that serves it)
+    FILTERS = {
+        "date": ({"from": "2025-01-01", "to": "2025-03-31"}, "date", "expense_user_date_id_idx"),
+        "transaction_type": ({"transaction_type": "Expense"}, "transaction_type", "expense_user_type_date_idx"),
+        "category": ({"category": "1"}, "category_id", "expense_user_cat_date_idx"),
+        "subcategory": ({"subcategory": "1"}, "subcategory_id", "expense_user_subcat_date_idx"),
+        "payment_method": ({"payment_method": "1"}, "payment_method_id", "expense_user_pay_date_idx"),
+        "income_type": ({"income_type": "1"}, "income_type_id", "expense_user_inc_date_idx"),
+        "amount": ({"min_amount": "5", "max_amount": "50"}, "amount", "expense_user_amount_id_idx"),
+    }
+
+    SORT_INDEXES = {"date": "expense_user_date_id_idx", "amount": "expense_user_amount_id_idx"}
+
+    def indexes(self, plan):
+        return re.findall(r"SEARCH expenses_expense USING (?:COVERING )?INDEX (\w+)", plan)
+
+    def plan(self, names, sort, cursor=None):
+        params = {}
+        for name in names:
+            params.update(self.FILTERS[name][0])
+
+        field, descending = SORTS[sort]
+        paginator = KeysetPaginator(field=field, descending=descending)
+        queryset = filter_expenses(Expense.objects.filter(user=self.user), params)
+        page, _ = paginator.page_query(queryset, cursor)
+        return page.explain()
+
+    def test_no_combination_scans_the_table(self):
+        for size in range(len(self.FILTERS) + 1):
+            for names in combinations(self.FILTERS, size):
+                for sort in SORTS:
+                    plan = self.plan(names, sort)
+                    self.assertNotIn("SCAN expenses_expense", plan, f"{names} sort={sort}:\n{plan}")
+
+                    # one of the composite indexes made for these filters or this sort
+                    candidates = {self.FILTERS[name][2] for name in names} | {self.SORT_INDEXES[SORTS[sort][0]]}
+                    used = self.indexes(plan)
+                    self.assertEqual(len(used), 1, f"{names} sort={sort}:\n{plan}")
+                    self.assertIn(used[0], candidates, f"{names} sort={sort}:\n{plan}")
+
+    def test_single_filters_use_their_index(self):
+        for sort in SORTS:
+            self.assertEqual(self.indexes(self.plan([], sort)), [self.SORT_INDEXES[SORTS[sort][0]]], sort)
+
+        for name, (_, _, index) in self.FILTERS.items():
+            for sort in SORTS:
+                # amount sorts walk the amount index unless a date range narrows the rows first
+                if SORTS[sort][0] == "amount" and name != "date":
+                    expected = "expense_user_amount_id_idx"
+                else:
+                    expected = index
+                self.assertEqual(self.indexes(self.plan([name], sort)), [expected], f"{name} sort={sort}")
+
+    def test_date_ordered_filters_seek_on_their_column(self):
+        for name, (_, column, index) in self.FILTERS.items():
+            for sort in ("-date", "date"):
+                plan = self.plan([name], sort)
+                self.assertRegex(plan, rf"SEARCH expenses_expense USING (COVERING )?INDEX {index} \(user_id=\? AND {column}[=<>]", plan)
+
+    def test_cursor_pages_seek_on_the_sort_key(self):
+        cursors = {"date": encode_cursor("2025-01-01", 5, "next"), "amount": encode_cursor("5.00", 5, "next")}
+        for sort, (field, _) in SORTS.items():
+            plan = self.plan([], sort, cursor=cursors[field])
+            self.assertRegex(plan, rf"\(user_id=\? AND {field}[<>]", plan)
+
+
+class BudgetForecastTests(QueryBudgetMixin, ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.travel = Category.objects.create(name="Travel")
+        flights = SubCategory.objects.create(category=self.travel, name="Flights")
+
+        # Food: 100 on the 1st and 200 on the 20th of Jan and Feb
+        for month in (1, 2):
+            self.make_expense("100.00", day=date(2025, month, 1))
+            self.make_expense("200.00", day=date(2025, month, 20))
+        self.make_expense("100.00", day=date(2025, 3, 1))
+        self.make_expense("20.00", day=date(2025, 3, 5))
+        self.make_expense("50.00", day=date(2025, 3, 2), category=self.travel, subcategory=flights)
+        self.make_expense(
+            "900.00", day=date(2025, 3, 3), transaction_type="Income",
+            category=None, subcategory=None, income_type=self.income_type,
+        )
+
+        for category, limit in ((self.category, "300.00"), (self.travel, "500.00")):
+            CategoryBudget.objects.create(
+                user=self.user, category=category, year=2025, month=3, monthly_limit=Decimal(limit)
+            )
+
+    def forecast(self, year=2025, month=3, today=date(2025, 3, 10)):
+        budgets = CategoryBudget.objects.filter(user=self.user, year=year, month=month).select_related("category")
+        result = build_forecast(self.user, budgets, year, month, today=today)
+        return {row["category"]["name"]: row for row in result["budgets"]}
+
+    def test_blends_run_rate_with_trailing_curve(self):
+        food = self.forecast()["Food"]
+
+        self.assertEqual(food["spent"], Decimal("120.00"))
+        self.assertEqual(food["daily_run_rate"], Decimal("12.00"))
+        self.assertEqual(food["history_months"], 2)
+        # 10 of 31 days on the run rate (21 days x 12.00), 21 of 31 on
+        # the 200.00 the trailing months spent after day 10
+        expected = Decimal("120") + (Decimal(10) * 252 + Decimal(21) * 200) / 31
+        self.assertEqual(food["forecast"], expected.quantize(Decimal("0.01")))
+        self.assertTrue(food["will_exceed"])
+
+    def test_without_history_uses_the_run_rate(self):
+        travel = self.forecast()["Travel"]
+        self.assertEqual(travel["history_months"], 0)
+        self.assertEqual(travel["forecast"], Decimal("155.00"))
+        self.assertEqual(travel["projected_remaining"], Decimal("345.00"))
+        self.assertFalse(travel["will_exceed"])
+
+    def test_past_and_future_months(self):
+        past = self.forecast(today=date(2025, 4, 2))["Food"]
+        self.assertEqual(past["forecast"], past["spent"])
+
+        CategoryBudget.objects.create(user=self.user, category=self.category, year=2025, month=4, monthly_limit=Decimal("250.00"))
+        future = self.forecast(month=4)["Food"]
+        # March is still in progress, so only Jan and Feb count
+        self.assertEqual((future["spent"], future["history_months"]), (Decimal("0"), 2))
+        self.assertEqual(future["forecast"], Decimal("300.00"))
+
+    def test_endpoint(self):
+        with self.assertMaxQueries(2):
+            response = self.client.get("/api/category-budget/forecast/", {"year": 2025, "month": 3})
+        data = response.json()
+        self.assertEqual(data["days_in_month"], 31)
+        self.assertEqual(len(data["budgets"]), 2)
+
+        response = self.client.get("/api/category-budget/forecast/", {"history": 13})
+        self.assertEqual(response.status_code, 400)
+
+
+class BudgetReportTests(QueryBudgetMixin, ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.travel = Category.objects.create(name="Travel")
+        flights = SubCategory.objects.create(category=self.travel, name="Flights")
+
+        for month, limit in ((1, "100.00"), (2, "100.00")):
+            self.budget(self.category, 2025, month, limit)
+        self.budget(self.travel, 2025, 2, "50.00")
+
+        self.make_expense("120.00", day=date(2025, 1, 10))
+        self.make_expense("40.00", day=date(2025, 2, 10))
+        self.make_expense("30.00", day=date(2025, 3, 10), category=self.travel, subcategory=flights)
+        self.make_expense(
+            "900.00", day=date(2025, 1, 3), transaction_type="Income",
+            category=None, subcategory=None, income_type=self.income_type,
+        )
+
+    def budget(self, category, year, month, limit):
+        return CategoryBudget.objects.create(
+            user=self.user, category=category, year=year, month=month, monthly_limit=Decimal(limit)
+        )
+
+    def report(self, **params):
+        return self.client.get("/api/category-budget/report/", {"from": "2025-01", "to": "2025-03", **params})
+
+    def test_matrix(self):
+        self.report()
+        with self.assertMaxQueries(3):
+            data = self.report().json()
+
+        self.assertEqual(data["months"], ["2025-01", "2025-02", "2025-03"])
+        food, travel = data["categories"]
+        self.assertEqual((food["category"]["name"], travel["category"]["name"]), ("Food", "Travel"))
+
+        amounts = lambda cell: [None if cell[k] is None else Decimal(str(cell[k])) for k in ("budget", "actual", "variance")]
+        self.assertEqual([amounts(cell) for cell in food["cells"]], [
+            [Decimal("100"), Decimal("120"), Decimal("-20")],
+            [Decimal("100"), Decimal("40"), Decimal("60")],
+            [None, Decimal("0"), None],
+        ])
+        self.assertEqual([cell["over_budget"] for cell in food["cells"]], [True, False, None])
+        self.assertEqual([cell["over_budget"] for cell in travel["cells"]], [None, False, None])
+        self.assertEqual(food["totals"]["over_budget_months"], 1)
+        self.assertEqual(Decimal(str(data["totals"][2]["actual"])), Decimal("30"))
+
+    def test_default_range_moves_with_the_date(self):
+        response = self.client.get("/api/category-budget/report/")
+        with next_month():
+            later = self.client.get("/api/category-budget/report/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(later.status_code, 200)
+        self.assertNotEqual(later.json()["months"], response.json()["months"])
+
+    def test_invalid_ranges(self):
+        self.assertEqual(self.report(**{"from": "2025-04"}).status_code, 400)
+        self.assertEqual(self.report(**{"from": "2022-01"}).status_code, 400)
+        self.assertEqual(self.report(to="2025-13").status_code, 400)
+
+    def bulk(self, body):
+        return self.client.post("/api/category-budget/bulk/", body, format="json")
+
+    def test_bulk_create_then_overwrite(self):
+        etag = self.client.get("/api/category-budget/", {"year": 2026, "month": 1})["ETag"]
+        body = {
+            "months": ["2026-01", "2026-02"],
+            "budgets": [{"category": self.category.id, "monthly_limit": "150.00"},
+                        {"category": self.travel.id, "monthly_limit": "60.00"}],
+        }
+
+        self.assertEqual(self.bulk(body).json(), {"created": 4, "updated": 0, "skipped": 0})
+        self.assertNotEqual(self.client.get("/api/category-budget/", {"year": 2026, "month": 1})["ETag"], etag)
+
+        body["budgets"][0]["monthly_limit"] = "175.00"
+        self.assertEqual(self.bulk(body).json(), {"created": 0, "updated": 0, "skipped": 4})
+        self.assertEqual(self.bulk(dict(body, overwrite=True)).json(), {"created": 0, "updated": 4, "skipped": 0})
+
+        limits = CategoryBudget.objects.filter(user=self.user, category=self.category, year=2026).values_list("monthly_limit", flat=True)
+        self.assertEqual(list(limits), [Decimal("175.00")] * 2)
+
+    def test_bulk_copy(self):
+        response = self.bulk({"months": ["2025-05", "2025-06"], "copy_from": "2025-02"})
+        self.assertEqual(response.json()["created"], 4)
+        self.assertEqual(CategoryBudget.objects.filter(user=self.user, year=2025, month=6).count(), 2)
+
+        self.assertEqual(self.bulk({"months": ["2025-07"], "copy_from": "2024-02"}).status_code, 400)
+
+    def test_bulk_errors_write_nothing(self):
+        response = self.bulk({
+            "months": ["2026-01"],
+            "budgets": [{"category": self.category.id, "monthly_limit": "10.00"},
+                        {"category": 9999, "monthly_limit": "10.00"}],
+        })
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()["errors"][0]["index"], 1)
+        self.assertFalse(CategoryBudget.objects.filter(year=2026).exists())
+
+        self.assertEqual(self.bulk({"months": ["2026-01"], "copy_from": "2025-01", "budgets": []}).status_code, 400)
+        self.assertEqual(self.bulk({"months": ["January"], "copy_from": "2025-01"}).status_code, 400)
+
+    def test_create_for_an_explicit_month(self):
+        body = {"category": self.travel.id, "monthly_limit": "80.00", "year": 2026, "month": 3}
+        self.assertEqual(self.client.post("/api/category-budget/", body, format="json").status_code, 201)
+        self.assertTrue(CategoryBudget.objects.filter(user=self.user, category=self.travel, year=2026, month=3).exists())
+
+        duplicate = self.client.post("/api/category-budget/", body, format="json")
+        self.assertEqual(duplicate.status_code, 400)
+
+
+@override_settings(METRICS={"ENDPOINT": True, "TOKEN": "scrape-token"})
+class RequestMetricsTests(ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        metrics.clear()
+        self.make_expense()
+
+    def scrape(self, token="scrape-token"):
+        return self.client.get("/metrics/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_server_timing_and_histograms(self):
+        response = self.client.get("/api/expense-summary/")
+        self.assertRegex(response["Server-Timing"], r'^app;dur=[\d.]+, db;dur=[\d.]+;desc="2 queries"$')
+
+        text = self.scrape().content.decode()
+        labels = 'method="GET",view="expense-summary"'
+        self.assertIn(f"http_request_duration_seconds_count{{{labels}}} 1", text)
+        self.assertIn(f'http_request_db_queries_bucket{{{labels},le="2"}} 1', text)
+        self.assertIn(f'http_request_db_queries_bucket{{{labels},le="1"}} 0', text)
+
+    @override_settings(METRICS={"SERVER_TIMING": False, "ENDPOINT": False})
+    def test_settings_switch_parts_off(self):
+        self.assertNotIn("Server-Timing", self.client.get("/api/expense-summary/"))
+        self.assertEqual(self.scrape().status_code, 404)
+
+    def test_endpoint_needs_the_token_or_staff(self):
+        self.client.force_authenticate(None)
+        self.assertEqual(self.client.get("/metrics/").status_code, 403)
+        self.assertEqual(self.scrape("wrong").status_code, 403)
+        self.assertEqual(self.scrape().status_code, 200)
+
+        # an API user is not enough; a staff session is
+        self.client.force_login(self.user)
+        self.assertEqual(self.client.get("/metrics/").status_code, 403)
+        self.user.is_staff = True
+        self.user.save()
+        self.assertEqual(self.client.get("/metrics/").status_code, 200)
+
+    def test_off_by_default(self):
+        with self.settings(METRICS={}):
+            self.assertEqual(self.scrape().status_code, 404)
+
+
+class CompressionTests(ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        for i in range(40):
+            self.make_expense(day=date(2025, 1, 1 + i % 28), description=f"groceries {i}")
+
+    def test_gzip_json(self):
+        plain = self.client.get("/api/expense/", {"paginate": "false"})
+        response = self.client.get("/api/expense/", {"paginate": "false"}, HTTP_ACCEPT_ENCODING="gzip, deflate")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), plain.content)
+        self.assertEqual(response["ETag"], "W/" + plain["ETag"])
+
+        cached = self.client.get(
+            "/api/expense/", {"paginate": "false"},
+            HTTP_ACCEPT_ENCODING="gzip", HTTP_IF_NONE_MATCH=response["ETag"],
+        )
+        self.assertEqual(cached.status_code, 304)
+
+    def test_small_or_refused_responses_are_sent_as_is(self):
+        small = self.client.get("/api/categories/", HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", small)
+
+        refused = self.client.get("/api/expense/", {"paginate": "false"}, HTTP_ACCEPT_ENCODING="gzip;q=0, identity")
+        self.assertNotIn("Content-Encoding", refused)
+
+    def test_pages_are_not_compressed(self):
+        # HTML pages hold CSRF tokens: compressing them would be a BREACH oracle
+        request = RequestFactory().get("/admin/", HTTP_ACCEPT_ENCODING="gzip")
+        for content_type in ("text/html; charset=utf-8", "text/plain"):
+            page = HttpResponse("<p>csrfmiddlewaretoken</p>" * 200, content_type=content_type)
+            response = compression.CompressionMiddleware(lambda request: page)(request)
+            self.assertNotIn("Content-Encoding", response)
+
+    @override_settings(COMPRESSION={"ENABLED": False})
+    def test_disabled(self):
+        response = self.client.get("/api/expense/", {"paginate": "false"}, HTTP_ACCEPT_ENCODING="gzip")
+        self.assertNotIn("Content-Encoding", response)
+
+    @patch("expenses.exporter.CHUNK_SIZE", 10)
+    def test_streaming_export_compressed_per_chunk(self):
+        plain = b"".join(self.client.get("/api/expense/export/", {"format": "csv"}).streaming_content)
+        response = self.client.get("/api/expense/export/", {"format": "csv"}, HTTP_ACCEPT_ENCODING="gzip")
+
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        chunks = list(response.streaming_content)
+        self.assertGreater(len(chunks), 2)
+        # each chunk is flushed, so what arrived so far already decodes
+        partial = zlib.decompressobj(31).decompress(b"".join(chunks[:2]))
+        self.assertTrue(plain.startswith(partial) and partial)
+        self.assertEqual(gzip.decompress(b"".join(chunks)), plain)
+
+    def test_choose_encoding(self):
+        with patch.object(compression, "brotli", None):
+            self.assertEqual(compression.choose_encoding("br, gzip"), "gzip")
+            self.assertEqual(compression.choose_encoding("*"), "gzip")
+            self.assertIsNone(compression.choose_encoding("br, identity"))
+            self.assertIsNone(compression.choose_encoding("GZIP;q=0"))
+        with patch.object(compression, "brotli", object()):
+            self.assertEqual(compression.choose_encoding("gzip, br"), "br")
+            self.assertEqual(compression.choose_encoding("gzip, br;q=0.5"), "gzip")
+
+    @skipUnless(compression.brotli, "brotli is not installed")
+    def test_brotli(self):
+        plain = self.client.get("/api/expense/", {"paginate": "false"})
+        response = self.client.get("/api/expense/", {"paginate": "false"}, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(compression.brotli.decompress(response.content), plain.content)
+
+
+class FakeRedis:
+    """
+    In-process stand-in for a Redis server: the commands Django's
+    RedisCacheClient sends, on one dict per server URL. Values come back
+    as bytes, as from a real server.
+    """
+
+    servers = {}
+
+    def __init__(self, url):
+        self.data = self.servers.setdefault(url, {})
+
+    def _live(self, key):
+        value, expires = self.data.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def get(self, key):
+        return self._live(key)
+
+    def mget(self, keys):
+        return [self._live(key) for key in keys]
+
+    def set(self, key, value, ex=None, nx=False):
+        if nx and self._live(key) is not None:
+            return None
+        if not isinstance(value, bytes):
+            value = str(value).encode()
+        self.data[key] = (value, None if ex is None else time.monotonic() + ex)
+        return True
+
+    def exists(self, key):
+        return int(self._live(key) is not None)
+
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def expire(self, key, seconds):
+        if self._live(key) is None:
+            return False
+        self.data[key] = (self.data[key][0], time.monotonic() + seconds)
+        return True
+
+    def persist(self, key):
+        if self._live(key) is None:
+            return False
+        self.data[key] = (self.data[key][0], None)
+        return True
+
+    def incr(self, key, delta=1):
+        value = int(self._live(key) or 0) + delta
+        self.data[key] = (str(value).encode(), self.data.get(key, (None, None))[1])
+        return value
+
+    def flushdb(self):
+        self.data.clear()
+        return True
+
+
+class FakeRedisCacheClient(RedisCacheClient):
+    """RedisCacheClient talking to FakeRedis instead of a connection pool."""
+
+    def __init__(self, servers, **options):
+        self._servers = servers
+        self._serializer = RedisSerializer()
+
+    def get_client(self, key=None, *, write=False):
+        return FakeRedis(self._servers[0])
+
+
+class ResponseCacheTests(QueryBudgetMixin, ExpenseTestMixin, APITestCase):
+    backend = "locmem"
+
+    def setUp(self):
+        super().setUp()
+        if self.backend == "file":
+            location = self.enterContext(TemporaryDirectory())
+        elif self.backend == "redis":
+            location = "redis://stand-in:6379/1"
+            self.enterContext(patch("django.core.cache.backends.redis.RedisCacheClient", FakeRedisCacheClient))
+        else:
+            location = None
+        self.enterContext(override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "responses": response_cache(self.backend, location),
+        }))
+        caches["responses"].clear()
+        metrics.clear()
+        self.make_expense("30.00", day=date(2025, 1, 5))
+        self.params = {"from": "2025-01-01", "to": "2025-01-31"}
+
+    def summary(self):
+        return self.client.get("/api/expense-summary/", self.params).json()
+
+    def count(self, result):
+        return metrics.RESPONSE_CACHE.value((("result", result), ("view", "expense-summary")))
+
+    def test_hit_runs_only_the_version_lookup(self):
+        first = self.summary()
+        with self.assertMaxQueries(1):
+            second = self.summary()
+
+        self.assertEqual(first, second)
+        self.assertEqual((self.count("miss"), self.count("hit")), (1, 1))
+        self.assertIn(
+            'response_cache_requests_total{result="hit",view="expense-summary"} 1',
+            metrics.render(),
+        )
+
+    def test_writes_invalidate(self):
+        self.summary()
+
+        self.client.post("/api/expense/", {
+            "transaction_type": "Expense", "category": self.category.id, "subcategory": self.subcategory.id,
+            "amount": "20.00", "date": "2025-01-07",
+        }, format="json")
+        self.assertEqual(Decimal(str(self.summary()["total_expense"])), Decimal("50.00"))
+
+        # bulk queryset write
+        Expense.objects.filter(user=self.user).update(amount=Decimal("1.00"))
+        self.assertEqual(Decimal(str(self.summary()["total_expense"])), Decimal("2.00"))
+        self.assertEqual(self.count("hit"), 0)
+
+    def test_budget_bulk_save_invalidates(self):
+        params = {"year": 2026, "month": 1}
+        self.assertEqual(self.client.get("/api/category-budget/", params).json(), [])
+
+        self.client.post("/api/category-budget/bulk/", {
+            "months": ["2026-01"], "budgets": [{"category": self.category.id, "monthly_limit": "10.00"}],
+        }, format="json")
+        self.assertEqual(len(self.client.get("/api/category-budget/", params).json()), 1)
+
+    def test_entries_are_per_user(self):
+        self.summary()
+        other = User.objects.create_user(username="bob", password="pass12345")
+        self.client.force_authenticate(other)
+        self.assertEqual(self.summary()["total_expense"], 0)
+
+    def test_failing_backend_falls_back_to_the_view(self):
+        with patch.object(caches["responses"], "get", side_effect=ConnectionError), \
+                self.assertLogs("expenses.response_cache", "ERROR"):
+            self.assertEqual(Decimal(str(self.summary()["total_expense"])), Decimal("30.00"))
+        self.assertEqual(self.count("error"), 1)
+
+    @override_settings(RESPONSE_CACHE={"ENABLED": False})
+    def test_disabled(self):
+        self.summary()
+        self.summary()
+        self.assertEqual(self.count("miss") + self.count("hit"), 0)
+
+    def test_backend_settings(self):
+        self.assertEqual(response_cache("redis", "redis://cache:6379/2"), {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": "redis://cache:6379/2",
+            "KEY_PREFIX": "responses",
+        })
+        self.assertEqual(response_cache()["BACKEND"], "django.core.cache.backends.locmem.LocMemCache")
+        with self.assertRaises(ImproperlyConfigured):
+            response_cache("memcached")
+
+
+class FileResponseCacheTests(ResponseCacheTests):
+    backend = "file"
+
+    def test_entries_are_files(self):
+        self.summary()
+        self.assertTrue(any(Path(caches["responses"]._dir).iterdir()))
+
+
+class RedisResponseCacheTests(ResponseCacheTests):
+    backend = "redis"
+
+    def test_entries_live_in_redis(self):
+        self.assertIsInstance(caches["responses"]._cache, FakeRedisCacheClient)
+        self.summary()
+        keys = list(FakeRedis("redis://stand-in:6379/1").data)
+        self.assertEqual(len(keys), 1)
+        self.assertTrue(keys[0].startswith("responses:1:response:"))
+
+
+class SeedAndBenchmarkTests(APITestCase):
+
+    def test_seed_then_benchmark(self):
+        call_command("seed_data", users=2, expenses=300, months=3, stdout=StringIO())
+
+        self.assertEqual(User.objects.filter(username__startswith="seed_user_").count(), 2)
+        self.assertEqual(Expense.objects.filter(transaction_type="Expense").count(), 300)
+        self.assertEqual(rollups.verify(), [])
+        before = Expense.objects.count()
+
+        with TemporaryDirectory() as tmp:
+            output = Path(tmp) / "report.json"
+            call_command(
+                "benchmark", iterations=2, warmup=0, only=["expenses.", "budgets."],
+                output=str(output), serializer_rows=50, compression=True, stdout=StringIO(),
+            )
+            report = json.loads(output.read_text())
+
+        results = report["scenarios"]
+        self.assertIn("expenses.summary", results)
+        self.assertTrue(all(result["status"][0] < 400 for result in results.values()), results)
+        self.assertLessEqual(results["expenses.summary"]["queries"], 3)
+        # writes were rolled back
+        self.assertEqual(Expense.objects.count(), before)
+        self.assertEqual(report["dataset"]["total_expenses"], before)
+        self.assertTrue(report["serializers"]["identical"])
+        self.assertLess(report["serializers"]["columnar"]["bytes"], report["serializers"]["projection"]["bytes"])
+        unpaginated = report["compression"]["scenarios"]["expenses.list_unpaginated"]
+        self.assertEqual(unpaginated["gzip"]["content_encoding"], "gzip")
+        self.assertLess(unpaginated["gzip"]["bytes"], unpaginated["identity"]["bytes"])
+
+    def test_every_route_has_a_scenario(self):
+        call_command("seed_data", users=1, expenses=50, months=2, stdout=StringIO())
+        user = User.objects.get(username__startswith="seed_user_")
+        MenuList.objects.create(menu_name="Expenses", icon="wallet", path="/expenses")
+
+        def views(patterns):
+            for pattern in patterns:
+                if hasattr(pattern, "url_patterns"):
+                    yield from views(pattern.url_patterns)
+                else:
+                    yield pattern.callback, str(pattern.pattern)
+
+        routes = dict(views(accounts_urls.urlpatterns + expenses_urls.urlpatterns))
+        for scenario in build_scenarios(user, "seed-password"):
+            routes.pop(resolve(scenario.path).func, None)
+        self.assertEqual(sorted(routes.values()), [])
+
+
+class DatabaseProfileTests(SimpleTestCase):
+
+    def test_production_profile_tunes_each_connection(self):
+        with TemporaryDirectory() as tmp:
+            handler = ConnectionHandler({
+                "default": sqlite_database(":memory:"),
+                "profile": sqlite_database(Path(tmp) / "db.sqlite3", "production"),
+            })
+            try:
+                with handler["profile"].cursor() as cursor:
+                    pragmas = {}
+                    for name in ("journal_mode", "synchronous", "busy_timeout", "temp_store"):
+                        cursor.execute(f"PRAGMA {name}")
+                        pragmas[name] = cursor.fetchone()[0]
+            finally:
+                handler.close_all()
+
+        # synchronous 1 = NORMAL, temp_store 2 = MEMORY
+        self.assertEqual(pragmas, {"journal_mode": "wal", "synchronous": 1, "busy_timeout": 20000, "temp_store": 2})
+        self.assertEqual(handler.settings["profile"]["CONN_MAX_AGE"], 600)
+
+    def test_default_profile_is_untouched(self):
+        self.assertEqual(sqlite_database("db.sqlite3"), {"ENGINE": "django.db.backends.sqlite3", "NAME": "db.sqlite3"})
+        with self.assertRaises(ImproperlyConfigured):
+            sqlite_database("db.sqlite3", "fast")
+
+
+class AsyncDashboardTests(QueryBudgetMixin, ExpenseTestMixin, APITestCase):
+
+    def setUp(self):
+        super().setUp()
+        today = date.today()
+        self.make_expense("30.00", day=today.replace(day=1))
+        self.make_expense("20.00", day=today.replace(day=1))
+        self.make_expense(
+            "500.00", day=today.replace(day=1), transaction_type="Income",
+            category=None, subcategory=None, income_type=self.income_type,
+        )
+        CategoryBudget.objects.create(user=self.user, category=self.category, year=today.year, month=today.month, monthly_limit=Decimal("100.00"))
+        self.token = f"Bearer {RefreshToken.for_user(self.user).access_token}"
+
+    def aget(self, path, params=None, **headers):
+        headers.setdefault("Authorization", self.token)
+        return async_to_sync(self.async_client.get)(path, params or {}, headers=headers)
+
+    def test_same_payloads_as_sync_views(self):
+        for sync_path, async_path, params in [
+            ("/api/expense-summary/", "/api/async/expense-summary/", {"period": "month"}),
+            ("/api/category-budget/", "/api/async/category-budget/", {}),
+            ("/api/expense/", "/api/async/expense/", {"page_size": 2, "sort": "-amount"}),
+        ]:
+            with self.subTest(async_path):
+                response = self.aget(async_path, params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json(), self.client.get(sync_path, params).json())
+
+    def test_dashboard_fan_out(self):
+        # auth user + data versions + summary + budgets (2) + recent expenses
+        with self.assertMaxQueries(6):
+            response = self.aget("/api/async/dashboard/", {"page_size": 2})
+
+        # the metrics middleware sees the async ORM's queries too
+        self.assertIn('desc="6 queries"', response["Server-Timing"])
+
+        data = response.json()
+        self.assertEqual(data["summary"]["total_expense"], 50)
+        self.assertEqual(data["budgets"][0]["spent"], 50)
+        self.assertEqual(len(data["recent_expenses"]), 2)
+
+        etag = response["ETag"]
+        self.assertEqual(self.aget("/api/async/dashboard/", {"page_size": 2}, If_None_Match=etag).status_code, 304)
+
+    def test_etags_move_with_the_date(self):
+        for path in ("/api/async/dashboard/", "/api/async/category-budget/", "/api/async/expense-summary/"):
+            response = self.aget(path, {"period": "month"})
+            with next_month():
+                later = self.aget(path, {"period": "month"}, **{"If-None-Match": response["ETag"]})
+            self.assertEqual(later.status_code, 200, path)
+            same_day = self.aget(path, {"period": "month"}, **{"If-None-Match": response["ETag"]})
+            self.assertEqual(same_day.status_code, 304, path)
+
+    def test_errors(self):
+        self.assertEqual(self.aget("/api/async/expense-summary/", Authorization="").status_code, 401)
+        self.assertEqual(self.aget("/api/async/expense-summary/", Authorization="Bearer nope").status_code, 401)
+
+        response = self.aget("/api/async/expense-summary/", {"period": "week"})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), self.client.get("/api/expense-summary/", {"period": "week"}).json())
+
+        response = async_to_sync(self.async_client.post)("/api/async/dashboard/", headers={"Authorization": self.token})
+        self.assertEqual(response.status_code, 405)
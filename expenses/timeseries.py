@@ -0,0 +1,115 @@
+"""
+Income / expense totals over time.
+
+One grouped query buckets the rows with database-side date truncation;
+the result is laid out as aligned columns (one slot per bucket, empty
+buckets filled with zero) in a single pass over the grouped rows.
+"""
+
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth, TruncWeek
+from rest_framework.exceptions import ValidationError
+
+from .filters import date_range_filter
+from .models import Expense
+
+BUCKETS = {
+    "day": TruncDay,
+    "week": TruncWeek,    # ISO weeks, starting Monday
+    "month": TruncMonth,
+}
+
+GROUP_BY = {
+    "category": "category_id",
+    "payment_method": "payment_method_id",
+}
+
+MAX_BUCKETS = 1000
+
+
+def truncate(day, bucket):
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def step(day, bucket):
+    if bucket == "week":
+        return day + timedelta(days=7)
+    if bucket == "month":
+        return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return day + timedelta(days=1)
+
+
+def bucket_starts(start, end, bucket):
+    periods = []
+    current = truncate(start, bucket)
+    while current <= end:
+        periods.append(current)
+        if len(periods) > MAX_BUCKETS:
+            raise ValidationError({"error": f"Too many buckets (max {MAX_BUCKETS}), narrow the date range"})
+        current = step(current, bucket)
+    return periods
+
+
+def build_timeseries(user, bucket, start=None, end=None, group_by=None, names=None):
+    """
+    names maps group ids to display names (from the reference cache).
+    """
+    if bucket not in BUCKETS:
+        raise ValidationError({"error": f"bucket must be one of: {', '.join(BUCKETS)}"})
+    if group_by is not None and group_by not in GROUP_BY:
+        raise ValidationError({"error": f"group_by must be one of: {', '.join(GROUP_BY)}"})
+
+    group_field = GROUP_BY.get(group_by)
+    columns = ["period", "transaction_type"] + ([group_field] if group_field else [])
+
+    rows = list(
+        Expense.objects.filter(user=user, **date_range_filter(start, end))
+        .annotate(period=BUCKETS[bucket]("date"))
+        .values(*columns)
+        .annotate(total=Sum("amount"))
+        .order_by()
+    )
+
+    first = start or min((row["period"] for row in rows), default=None)
+    last = end or max((row["period"] for row in rows), default=None)
+    periods = bucket_starts(first, last, bucket) if first and last else []
+    index = {period: i for i, period in enumerate(periods)}
+
+    series = {}
+
+    def column_set(group):
+        if group not in series:
+            series[group] = {
+                "Income": [Decimal("0")] * len(periods),
+                "Expense": [Decimal("0")] * len(periods),
+            }
+        return series[group]
+
+    if not group_field:
+        column_set(None)
+
+    for row in rows:
+        group = row[group_field] if group_field else None
+        column_set(group)[row["transaction_type"]][index[row["period"]]] += row["total"]
+
+    names = names or {}
+    return {
+        "bucket": bucket,
+        "group_by": group_by,
+        "periods": periods,
+        "series": [
+            {
+                "group": None if not group_field else {"id": group, "name": names.get(group)},
+                "income": values["Income"],
+                "expense": values["Expense"],
+            }
+            for group, values in sorted(series.items(), key=lambda item: (item[0] is None, item[0] or 0))
+        ],
+    }
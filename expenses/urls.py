@@ -5,8 +5,16 @@ from .views import SubCategoryAPI
 from .views import PaymentMethodViewSet
 from .views import IncomeTypeAPI
 from .views import ExpenseAPI
+from .views import ExpenseImportAPI
+from .views import ExpenseExportAPI
+from .views import ExpenseBatchAPI
 from .views import ExpenseSummaryAPI
+from .views import ExpenseTimeSeriesAPI
 from .views import CategoryBudgetAPI
+from .views import CategoryBudgetForecastAPI
+from .views import CategoryBudgetReportAPI
+from .views import CategoryBudgetBulkAPI
+from . import async_views
 
 
 router = DefaultRouter()
@@ -20,9 +28,22 @@ urlpatterns = [
     path("income-type/", IncomeTypeAPI.as_view(), name="income-type"),
     path("expense/", ExpenseAPI.as_view(), name="expense"),
     path("expense/<int:id>/", ExpenseAPI.as_view(), name="expense_detail"),
+    path("expense/import/", ExpenseImportAPI.as_view(), name="expense-import"),
+    path("expense/export/", ExpenseExportAPI.as_view(), name="expense-export"),
+    path("expense/batch/", ExpenseBatchAPI.as_view(), name="expense-batch"),
     path("expense-summary/", ExpenseSummaryAPI.as_view(), name="expense-summary"),
+    path("expense-timeseries/", ExpenseTimeSeriesAPI.as_view(), name="expense-timeseries"),
     path("category-budget/", CategoryBudgetAPI.as_view()),
     path("category-budget/<int:id>/", CategoryBudgetAPI.as_view()),
+    path("category-budget/forecast/", CategoryBudgetForecastAPI.as_view(), name="category-budget-forecast"),
+    path("category-budget/report/", CategoryBudgetReportAPI.as_view(), name="category-budget-report"),
+    path("category-budget/bulk/", CategoryBudgetBulkAPI.as_view(), name="category-budget-bulk"),
+
+    # async (ASGI) versions of the dashboard reads
+    path("async/expense/", async_views.expense_list, name="async-expense"),
+    path("async/expense-summary/", async_views.expense_summary, name="async-expense-summary"),
+    path("async/category-budget/", async_views.category_budget, name="async-category-budget"),
+    path("async/dashboard/", async_views.dashboard, name="async-dashboard"),
 ]
 
 urlpatterns += router.urls
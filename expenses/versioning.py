@@ -0,0 +1,67 @@
+"""
+Version counters for cache invalidation across worker processes.
+
+Writers call bump(key) in the same transaction as the change; readers
+call get_stamp(key) (one primary-key lookup) and reload whatever they
+cached whenever the stamp differs from the one they loaded it under.
+"""
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import DataVersion
+
+REFERENCE = "reference"
+
+# (version, updated_at) of a key that has never been bumped
+EMPTY_STAMP = (0, None)
+
+
+def user_key(user_id):
+    """Scope of one user's own rows (expenses, budgets)."""
+    return f"user:{user_id}"
+
+
+def get_stamps(keys):
+    stamps = {key: EMPTY_STAMP for key in keys}
+    rows = DataVersion.objects.filter(key__in=keys).values_list("key", "version", "updated_at")
+    for key, version, updated_at in rows:
+        stamps[key] = (version, updated_at)
+    return stamps
+
+
+async def aget_stamps(keys):
+    stamps = {key: EMPTY_STAMP for key in keys}
+    rows = DataVersion.objects.filter(key__in=keys).values_list("key", "version", "updated_at")
+    async for key, version, updated_at in rows:
+        stamps[key] = (version, updated_at)
+    return stamps
+
+
+def get_stamp(key):
+    return get_stamps([key])[key]
+
+
+def bump(key):
+    updated = DataVersion.objects.filter(key=key).update(
+        version=F("version") + 1,
+        updated_at=timezone.now(),
+    )
+    if updated:
+        return
+
+    try:
+        with transaction.atomic():
+            DataVersion.objects.create(key=key, version=1)
+    except IntegrityError:
+        # created concurrently by another writer
+        DataVersion.objects.filter(key=key).update(
+            version=F("version") + 1,
+            updated_at=timezone.now(),
+        )
+
+
+def bump_users(user_ids):
+    for user_id in sorted(set(user_ids)):
+        bump(user_key(user_id))
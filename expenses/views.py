@@ -15,9 +15,18 @@ from .serializers import PaymentMethodSerializer
 from .serializers import IncomeTypeSerializer
 from .serializers import ExpenseSerializer
 from .serializers import CategoryBudgetSerializer
+from .pagination import KeysetPaginator, get_page_size
+from .reference_cache import get_reference_data
+from .conditional import conditional_get
+from .response_cache import cached_response
+from . import versioning
+from .filters import filter_expenses, parse_sort
+from .projections import expense_values, expense_dicts, expense_columns
+from .renderers import ColumnarJSONRenderer
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status, permissions
+from rest_framework.settings import api_settings
 
 
 class CategoryViewSet(viewsets.ModelViewSet):
@@ -25,25 +34,34 @@ class CategoryViewSet(viewsets.ModelViewSet):
     serializer_class = CategorySerializer
     permission_classes = [permissions.IsAuthenticated]  
 
+    # list is served from the reference cache
+
+    @conditional_get(versioning.REFERENCE)
+    def list(self, request, *args, **kwargs):
+        refs = get_reference_data(request.data_stamps[versioning.REFERENCE])
+        return Response(refs.category_list)
+
 class SubCategoryAPI(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     # GET all OR GET by category_id
 
+    @conditional_get(versioning.REFERENCE)
     def get(self, request, id=None):
 
+        refs = get_reference_data(request.data_stamps[versioning.REFERENCE])
+
         if id is not None:
 
             # GET /sub-categories/<id>/
-            subs = SubCategory.objects.filter(category_id=id).order_by("name")
+            subs = refs.subcategories_of(id)
 
         else:
 
             # GET /sub-categories/
-            subs = SubCategory.objects.all().order_by("name")
+            subs = refs.subcategory_list
 
-        serializer = SubCategorySerializer(subs, many=True)
-        return Response(serializer.data)
+        return Response(subs)
 
     # CREATE subcategory
 
@@ -85,15 +103,22 @@ class PaymentMethodViewSet(viewsets.ModelViewSet):
     serializer_class = PaymentMethodSerializer
     permission_classes = [permissions.IsAuthenticated] 
 
+    # list is served from the reference cache
+
+    @conditional_get(versioning.REFERENCE)
+    def list(self, request, *args, **kwargs):
+        refs = get_reference_data(request.data_stamps[versioning.REFERENCE])
+        return Response(refs.payment_method_list)
+
 class IncomeTypeAPI(APIView):
     permission_classes = [permissions.IsAuthenticated]
 
     # ✔ GET ALL INCOME TYPE
 
+    @conditional_get(versioning.REFERENCE)
     def get(self, request):
-        types = IncomeType.objects.all().order_by("name")
-        serializer = IncomeTypeSerializer(types, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        types = get_reference_data(request.data_stamps[versioning.REFERENCE]).income_type_list
+        return Response(types, status=status.HTTP_200_OK)
 
     # ✔ CREATE NEW INCOME TYPE
 
@@ -145,12 +170,52 @@ class IncomeTypeAPI(APIView):
     
 class ExpenseAPI(APIView):
     permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, ColumnarJSONRenderer]
 
-    # GET all expenses for logged-in user
-    def get(self, request):
-        expenses = Expense.objects.filter(user=request.user).order_by("-date")
-        serializer = ExpenseSerializer(expenses, many=True)
-        return Response(serializer.data, status=200)
+    # GET expenses for logged-in user, newest first
+    # ?cursor=<next/prev>&page_size=N  -> keyset paginated page
+    # ?paginate=false                  -> full unpaginated list (legacy)
+    # ?sort=-date|date|-amount|amount
+    # ?format=columnar                 -> lists as per-field arrays + refs
+    # filters: see filters.filter_expenses
+    # GET /expense/<id>/               -> single expense
+
+    @conditional_get("user", versioning.REFERENCE)
+    def get(self, request, id=None):
+        expenses = Expense.objects.filter(user=request.user).with_related()
+
+        if id is not None:
+            try:
+                expense = expenses.get(id=id)
+            except Expense.DoesNotExist:
+                return Response({"error": "Expense not found"}, status=404)
+            return Response(ExpenseSerializer(expense).data, status=200)
+
+        # lists skip the serializer: flat values() rows built into the
+        # same JSON shape, or the columnar one (see projections.py)
+        build = expense_columns if request.accepted_renderer.format == "columnar" else expense_dicts
+        expenses = expense_values(filter_expenses(expenses, request.query_params))
+        sort_field, descending = parse_sort(request.query_params)
+
+        if request.query_params.get("paginate", "").lower() == "false":
+            prefix = "-" if descending else ""
+            expenses = expenses.order_by(f"{prefix}{sort_field}", f"{prefix}id")
+            return Response(build(expenses), status=200)
+
+        paginator = KeysetPaginator(
+            field=sort_field,
+            descending=descending,
+            page_size=get_page_size(request.query_params),
+        )
+        rows, next_cursor, prev_cursor = paginator.paginate(
+            expenses, request.query_params.get("cursor")
+        )
+
+        return Response({
+            "next": next_cursor,
+            "prev": prev_cursor,
+            "results": build(rows),
+        }, status=200)
 
     # CREATE Expense
 
@@ -195,56 +260,135 @@ class ExpenseAPI(APIView):
         expense.delete()
         return Response({"message": "Expense deleted successfully"})
 
+from rest_framework.parsers import MultiPartParser
+from .importer import import_expenses, ImportFormatError
+
+
+class ExpenseImportAPI(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    # POST multipart "file": .csv (header row) or .ndjson (one object per line)
+    # Fields per row are the same as POST /expense/
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"error": "file is required"}, status=400)
+
+        try:
+            result = import_expenses(upload, request.user)
+        except ImportFormatError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        return Response(result, status=200)
+
+from django.http import StreamingHttpResponse
+from .renderers import CSVRenderer, NDJSONRenderer
+from .exporter import export_rows, stream_csv, stream_ndjson
+
+
+class ExpenseExportAPI(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+    renderer_classes = [CSVRenderer, NDJSONRenderer]
+
+    # GET ?format=csv|ndjson (or Accept: text/csv / application/x-ndjson)
+    # Same ?from=&to= / ?period= / ?transaction_type= filters as GET /expense/
+
+    def get(self, request):
+        expenses = filter_expenses(Expense.objects.filter(user=request.user), request.query_params)
+        rows = export_rows(expenses)
+
+        renderer = request.accepted_renderer
+        if renderer.format == "ndjson":
+            stream = stream_ndjson(rows)
+        else:
+            stream = stream_csv(rows)
+
+        response = StreamingHttpResponse(stream, content_type=f"{renderer.media_type}; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="expenses.{renderer.format}"'
+        return response
+
+from .batch import run_batch, BatchError
+
+
+class ExpenseBatchAPI(APIView):
+    permission_classes = [permissions.IsAuthenticated]
+
+    # POST {"operations": [
+    #     {"op": "create", "data": {...}},
+    #     {"op": "update", "id": 12, "data": {...}},
+    #     {"op": "delete", "id": 13},
+    # ]}
+    # All operations are applied in one transaction, or none are.
+
+    def post(self, request):
+        if not isinstance(request.data, dict):
+            return Response({"error": "Expected a JSON object"}, status=400)
+
+        try:
+            ok, results = run_batch(request.data.get("operations"), request.user)
+        except BatchError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        if not ok:
+            return Response({"errors": results}, status=400)
+
+        return Response({"results": results}, status=200)
+
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum
+from .filters import parse_date_range, parse_year_month
+from . import rollups
+from .summaries import summary_payload, budget_payload
 
 class ExpenseSummaryAPI(APIView):
     permission_classes = [IsAuthenticated]
 
+    # ?from=YYYY-MM-DD&to=YYYY-MM-DD or ?period=month|quarter|year
+    # (no parameters = all time)
+
+    @conditional_get("user", versioning.REFERENCE)
+    @cached_response
     def get(self, request):
         user = request.user
+        start, end = parse_date_range(request.query_params)
 
-        total_income = Expense.objects.filter(
-            user=user, transaction_type="Income"
-        ).aggregate(total=Sum("amount"))["total"] or 0
-
-        total_expense = Expense.objects.filter(
-            user=user, transaction_type="Expense"
-        ).aggregate(total=Sum("amount"))["total"] or 0
+        # ONE PASS: income and expense totals per category
+        # (served from the monthly rollups for whole-month ranges)
 
-        total_balance = total_income - total_expense
+        rows = rollups.category_totals(user, start, end)
 
+        return Response(summary_payload(rows, start, end))
+    
 
-        # CATEGORY-WISE TOTAL EXPENSE (Graph)
-
-        category_data = (
-            Expense.objects.filter(user=user, transaction_type="Expense")
-            .values("category__name")
-            .annotate(total=Sum("amount"))
-            .order_by("-total")
-        )
-
-        graph_data = [
-            {
-                "category": item["category__name"],
-                "total": item["total"] or 0
-            }
-            for item in category_data
-        ]
+from .timeseries import build_timeseries
 
-        #  HIGHEST SPENDING CATEGORY
+class ExpenseTimeSeriesAPI(APIView):
+    permission_classes = [IsAuthenticated]
 
-        highest_category = graph_data[0] if graph_data else None
-        lowest_category = graph_data[-1] if graph_data else None
+    # ?bucket=day|week|month (default month)
+    # &group_by=category|payment_method (optional)
+    # &from=YYYY-MM-DD&to=YYYY-MM-DD or &period=month|quarter|year
 
-        return Response({
-            "total_income": total_income,
-            "total_expense": total_expense,
-            "total_balance": total_balance,
-            "highest_category": highest_category,
-            "lowest_category": lowest_category,
-            "graph_data": graph_data
-        })
+    @conditional_get("user", versioning.REFERENCE)
+    def get(self, request):
+        params = request.query_params
+        start, end = parse_date_range(params)
+        group_by = params.get("group_by") or None
+
+        names = {}
+        if group_by in ("category", "payment_method"):
+            refs = get_reference_data(request.data_stamps[versioning.REFERENCE])
+            names = {pk: obj.name for pk, obj in getattr(refs, group_by).items()}
+
+        return Response(build_timeseries(
+            request.user,
+            params.get("bucket", "month"),
+            start,
+            end,
+            group_by=group_by,
+            names=names,
+        ))
     
 
 from datetime import date
@@ -252,58 +396,27 @@ from datetime import date
 class CategoryBudgetAPI(APIView):
     permission_classes = [IsAuthenticated]
 
+    # ?year=YYYY&month=M (defaults to the current month)
+
+    @conditional_get("user", versioning.REFERENCE)
+    @cached_response
     def get(self, request):
         user = request.user
-        today = date.today()
+        year, month = parse_year_month(request.query_params)
 
         budgets = CategoryBudget.objects.filter(
             user=user,
-            month=today.month,
-            year=today.year
+            month=month,
+            year=year
+        ).select_related("category")
+
+        # ONE rollup query for the spend of every budgeted category
+
+        spent_by_category = rollups.spend_by_category(
+            user, year, month, [budget.category_id for budget in budgets]
         )
 
-        result = []
-
-        for budget in budgets:
-            spent = Expense.objects.filter(
-                user=user,
-                category=budget.category,
-                transaction_type="Expense",
-                date__month=today.month,
-                date__year=today.year
-            ).aggregate(total=Sum("amount"))["total"] or 0
-
-            spent = spent or 0
-            limit = budget.monthly_limit
-
-            # Remaining should not go below 0
-
-            remaining = max(limit - spent, 0)
-
-            # Percent used should not exceed 100
-            
-            if limit > 0:
-                percent_used = min((spent / limit) * 100, 100)
-            else:
-                percent_used = 0
-
-            percent_remains = max(100 - percent_used, 0)
-
-            result.append({
-                "id": budget.id,
-                "category": {
-                    "id": budget.category.id,
-                    "name": budget.category.name
-                },
-                "budget": budget.monthly_limit,
-                "spent": spent,
-                "remaining": remaining,
-                "percent_used": round(percent_used, 2),
-                "percent_remains": round(percent_remains, 2),
-                "over_budget": spent > budget.monthly_limit
-            })
-
-        return Response(result)
+        return Response(budget_payload(budgets, spent_by_category))
 
     def post(self, request):
         serializer = CategoryBudgetSerializer(data=request.data, context={"request": request})
@@ -337,4 +450,69 @@ class CategoryBudgetAPI(APIView):
             return Response({"error": "Category Budget not found"}, status=404)
 
         categorybudget.delete()
-        return Response({"message": "Category Budget deleted successfully"})
\ No newline at end of file
+        return Response({"message": "Category Budget deleted successfully"})
+
+from .forecast import build_forecast, parse_history
+
+class CategoryBudgetForecastAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    # ?year=YYYY&month=M (defaults to the current month)
+    # &history=N trailing months of spending curve (default 3, 0-12)
+    # No conditional GET: the forecast moves with the date, not only
+    # with the data, so a data-version ETag would go stale overnight.
+
+    def get(self, request):
+        user = request.user
+        year, month = parse_year_month(request.query_params)
+        history = parse_history(request.query_params)
+
+        budgets = CategoryBudget.objects.filter(
+            user=user,
+            month=month,
+            year=year
+        ).select_related("category")
+
+        # ONE grouped query for the daily spend of every budgeted category
+
+        return Response(build_forecast(user, budgets, year, month, history))
+
+
+from .budgets import budget_report, parse_report_range, run_bulk_save, BudgetError
+
+class CategoryBudgetReportAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    # ?from=YYYY-MM&to=YYYY-MM (default: the 12 months up to this one)
+    # category x month matrix of budget, actual, variance, over_budget
+
+    @conditional_get("user", versioning.REFERENCE)
+    def get(self, request):
+        first, last = parse_report_range(request.query_params)
+
+        refs = get_reference_data(request.data_stamps[versioning.REFERENCE])
+        names = {pk: obj.name for pk, obj in refs.category.items()}
+
+        # ONE budget query + ONE grouped rollup query for the whole range
+
+        return Response(budget_report(request.user, first, last, names))
+
+
+class CategoryBudgetBulkAPI(APIView):
+    permission_classes = [IsAuthenticated]
+
+    # POST {"months": ["2026-01", "2026-02"],
+    #       "budgets": [{"category": 3, "monthly_limit": "250.00"}, ...]}
+    #   or {"months": [...], "copy_from": "2025-12"}
+    # "overwrite": true updates budgets that already exist (default: keep them)
+
+    def post(self, request):
+        try:
+            ok, result = run_bulk_save(request.data, request.user)
+        except BudgetError as exc:
+            return Response({"error": str(exc)}, status=400)
+
+        if not ok:
+            return Response({"errors": result}, status=400)
+
+        return Response(result, status=200)